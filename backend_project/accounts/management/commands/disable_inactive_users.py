@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from accounts.models import User
+from accounts.user_cache import invalidate_users
 from files.models import SystemSettings
 from django.db.models import Q
 
@@ -20,7 +21,9 @@ class Command(BaseCommand):
         ).filter(
             Q(last_login__lt=cutoff) | Q(last_login__isnull=True)
         )
-        count = users_to_disable.count()
-        users_to_disable.update(is_active=False)
+        user_ids = list(users_to_disable.values_list("id", flat=True))
+        count = users_to_disable.filter(id__in=user_ids).update(is_active=False)
+        # .update() skips post_save, so drop the cached copies explicitly
+        invalidate_users(*user_ids)
 
         self.stdout.write(f"Disabled {count} inactive users.")
\ No newline at end of file
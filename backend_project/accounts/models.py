@@ -67,4 +67,41 @@ class SMSLog(models.Model):
     mock = models.BooleanField(default=True) 
 
     def __str__(self):
-        return f"{self.phone_number} | {self.sent_at} | {'MOCK' if self.mock else 'REAL'}"
\ No newline at end of file
+        return f"{self.phone_number} | {self.sent_at} | {'MOCK' if self.mock else 'REAL'}"
+
+
+class SMSOutbox(models.Model):
+    """An SMS waiting for the drain_sms_outbox worker (see utils/notifications.py)."""
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    phone_number = models.CharField(max_length=15)
+    message = models.TextField()
+    # Only one unsent message per key, e.g. "file-rejected:<id>"
+    dedupe_key = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Retry backoff for pending rows; the claim lease for rows being sent
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="accounts_sms_due_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedupe_key"],
+                condition=models.Q(status__in=["pending", "sending"]) & ~models.Q(dedupe_key=""),
+                name="accounts_sms_unsent_dedupe",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.phone_number} | {self.status} | {self.attempts} attempt(s)"
@@ -1,7 +1,10 @@
 # accounts/signals.py
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
+from .models import User
+from .user_cache import invalidate_users
 
 @receiver(user_logged_in)
 def mark_online(sender, user, request, **kwargs):
@@ -14,3 +17,7 @@ def mark_offline(sender, user, request, **kwargs):
     user.is_online = False
     user.last_seen = timezone.now()
     user.save(update_fields=["is_online", "last_seen"])
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_users(instance.pk)
@@ -4,4 +4,9 @@ from django.core.management import call_command
 
 @shared_task
 def disable_inactive_users_task():
-    call_command("disable_inactive_users")
\ No newline at end of file
+    call_command("disable_inactive_users")
+
+@shared_task
+def drain_sms_outbox_task():
+    from utils.notifications import drain_outbox
+    drain_outbox()
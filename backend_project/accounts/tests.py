@@ -1,3 +1,86 @@
-from django.test import TestCase
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from files.models import File
+from utils.notifications import (
+    cancel_rejection_sms, drain_outbox, get_sms_provider, queue_rejection_sms, retry_delay,
+)
+from .models import SMSLog, SMSOutbox, User
 
-# Create your tests here.
+@override_settings(SMS_PROVIDER="fake", SMS_MAX_ATTEMPTS=3)
+class SMSOutboxTests(TestCase):
+    def setUp(self):
+        get_sms_provider.cache_clear()
+        self.addCleanup(get_sms_provider.cache_clear)
+        self.provider = get_sms_provider()
+        owner = User.objects.create_user("client", password="x", role="client", phone_number="+639171234567")
+        self.file = File.objects.create(owner=owner, file="user_1/hours.csv", name="hours.csv")
+
+    def queue(self):
+        queue_rejection_sms([self.file])
+        return SMSOutbox.objects.get()
+
+    def test_sends_and_logs(self):
+        self.queue()
+        self.assertEqual(drain_outbox(), (1, 0))
+        msg = SMSOutbox.objects.get()
+        self.assertEqual((msg.status, msg.attempts), (SMSOutbox.Status.SENT, 1))
+        self.assertEqual(self.provider.sent, [("+639171234567", msg.message)])
+        self.assertTrue(SMSLog.objects.get().mock)
+
+    def test_transient_failure_is_retried_later(self):
+        self.queue()
+        self.provider.fail_next = 1
+        before = timezone.now()
+        self.assertEqual(drain_outbox(), (0, 0))
+
+        msg = SMSOutbox.objects.get()
+        self.assertEqual((msg.status, msg.attempts), (SMSOutbox.Status.PENDING, 1))
+        self.assertGreaterEqual(msg.next_attempt_at, before + retry_delay(1))
+        self.assertTrue(msg.last_error)
+        # Not due yet: the next drain leaves it alone
+        self.assertEqual(drain_outbox(), (0, 0))
+        self.assertEqual(self.provider.sent, [])
+
+    def test_permanent_failure_is_not_retried(self):
+        self.queue()
+        self.provider.fail_next, self.provider.permanent = 1, True
+        with self.assertLogs("utils.notifications", "ERROR"):
+            self.assertEqual(drain_outbox(), (0, 1))
+        msg = SMSOutbox.objects.get()
+        self.assertEqual((msg.status, msg.attempts), (SMSOutbox.Status.FAILED, 1))
+
+    def test_gives_up_after_max_attempts(self):
+        self.queue()
+        self.provider.fail_next = 3
+        for _ in range(2):
+            self.assertEqual(drain_outbox(), (0, 0))
+            SMSOutbox.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs("utils.notifications", "ERROR"):
+            self.assertEqual(drain_outbox(), (0, 1))
+        msg = SMSOutbox.objects.get()
+        self.assertEqual((msg.status, msg.attempts), (SMSOutbox.Status.FAILED, 3))
+
+    def test_abandoned_send_is_taken_over_after_its_lease(self):
+        self.queue()
+        SMSOutbox.objects.update(status=SMSOutbox.Status.SENDING, next_attempt_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(drain_outbox(), (0, 0))
+
+        SMSOutbox.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(drain_outbox(), (1, 0))
+
+    def test_rejecting_twice_queues_one_message(self):
+        queue_rejection_sms([self.file])
+        queue_rejection_sms([self.file])
+        self.assertEqual(SMSOutbox.objects.count(), 1)
+
+    def test_unrejecting_drops_the_pending_message(self):
+        self.queue()
+        cancel_rejection_sms([self.file.id])
+        self.assertFalse(SMSOutbox.objects.exists())
+
+    def test_unrejecting_keeps_messages_already_sent(self):
+        self.queue()
+        drain_outbox()
+        cancel_rejection_sms([self.file.id])
+        self.assertEqual(SMSOutbox.objects.get().status, SMSOutbox.Status.SENT)
@@ -0,0 +1,59 @@
+# accounts/user_cache.py
+import copy
+import threading
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from .models import User
+
+USER_CACHE_TTL = getattr(settings, "USER_CACHE_TTL", 60)
+USER_CACHE_MAXSIZE = getattr(settings, "USER_CACHE_MAXSIZE", 1024)
+USER_CACHE_SHARED = getattr(settings, "USER_CACHE_SHARED", False)
+
+_local_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL)
+_lock = threading.Lock()
+
+def _shared_key(user_id):
+    return f"auth_user:{user_id}"
+
+def get_cached_user(user_id):
+    """
+    Return the User for `user_id` or None, served from a short-TTL LRU cache.
+    Each caller gets its own copy so request code can mutate and save it freely.
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    with _lock:
+        user = _local_cache.get(user_id)
+
+    if user is None and USER_CACHE_SHARED:
+        user = shared_cache.get(_shared_key(user_id))
+        if user is not None:
+            with _lock:
+                _local_cache[user_id] = user
+
+    if user is None:
+        user = User.objects.filter(id=user_id).first()
+        if user is None:
+            return None
+        with _lock:
+            _local_cache[user_id] = user
+        if USER_CACHE_SHARED:
+            shared_cache.set(_shared_key(user_id), user, USER_CACHE_TTL)
+
+    return copy.copy(user)
+
+def invalidate_users(*user_ids):
+    """Drop users from the cache, e.g. after a save, delete or bulk disable."""
+    with _lock:
+        for user_id in user_ids:
+            _local_cache.pop(int(user_id), None)
+    if USER_CACHE_SHARED and user_ids:
+        shared_cache.delete_many([_shared_key(user_id) for user_id in user_ids])
+
+def clear_user_cache():
+    with _lock:
+        _local_cache.clear()
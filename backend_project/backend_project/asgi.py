@@ -13,10 +13,11 @@ django.setup()
 
 from chat.middleware import JWTAuthMiddleware
 from chat.routing import websocket_urlpatterns
+from files.routing import websocket_urlpatterns as files_websocket_urlpatterns
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": JWTAuthMiddleware(
-        URLRouter(websocket_urlpatterns)
+        URLRouter(websocket_urlpatterns + files_websocket_urlpatterns)
     ),
 })
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from decouple import config
+from celery.schedules import crontab
 import dj_database_url
 from dotenv import load_dotenv
 import os
@@ -99,6 +100,16 @@ if config("REDIS_URL", default=None):
             },
         }
     }
+elif config("CHANNEL_LAYER", default="memory") == "postgres":
+    # multi-worker without Redis: LISTEN/NOTIFY on the main database
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "chat.layers.PostgresChannelLayer",
+            "CONFIG": {
+                "database": "default",
+            },
+        }
+    }
 else:
     # fallback (single worker only)
     CHANNEL_LAYERS = {
@@ -123,15 +134,25 @@ DATABASES = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "files.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     'PAGE_SIZE': 10,
 }
 
+# Short-lived cache for JWT user lookups (REST auth and WebSocket middleware).
+# Set USER_CACHE_SHARED to also keep users in Django's cache across workers.
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=60, cast=int)
+USER_CACHE_MAXSIZE = config("USER_CACHE_MAXSIZE", default=1024, cast=int)
+USER_CACHE_SHARED = config("USER_CACHE_SHARED", default=False, cast=bool)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -177,8 +198,48 @@ AUTH_USER_MODEL = 'accounts.User'
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-# Path to Poppler binaries (for pdf2image OCR)
-POPPLER_PATH = r"C:\poppler-25.07.0\Library\bin"
+# Resumable uploads: part files live here (outside MEDIA_URL) until finalize moves them into MEDIA_ROOT
+CHUNKED_UPLOAD_DIR = BASE_DIR / "upload_parts"
+CHUNKED_UPLOAD_MAX_CHUNK = config("CHUNKED_UPLOAD_MAX_CHUNK", default=8 * 1024 * 1024, cast=int)
+# An upload that receives no chunk for this long is expired and its part file removed
+CHUNKED_UPLOAD_TTL_HOURS = config("CHUNKED_UPLOAD_TTL_HOURS", default=24, cast=int)
+
+# Downloads: "x-accel-redirect" (nginx; FILE_DOWNLOAD_ACCEL_PREFIX is an `internal;` location aliasing
+# MEDIA_ROOT, so clients cannot request it themselves) or "x-sendfile" (Apache/lighttpd) hands the bytes
+# to the front proxy after the permission checks. Left empty, Django streams them itself (os.sendfile
+# under gunicorn's wsgi.file_wrapper). MEDIA_URL is only routed when DEBUG is on.
+FILE_DOWNLOAD_OFFLOAD = config("FILE_DOWNLOAD_OFFLOAD", default="")
+FILE_DOWNLOAD_ACCEL_PREFIX = config("FILE_DOWNLOAD_ACCEL_PREFIX", default="/protected-media/")
+FILE_DOWNLOAD_BLOCK_SIZE = config("FILE_DOWNLOAD_BLOCK_SIZE", default=256 * 1024, cast=int)
+
+# PDF text for get_content: "pdfium" (fast; pages without the summary table header fall
+# back to pdfplumber) or "pdfplumber" for every page.
+PDF_TEXT_BACKEND = config("PDF_TEXT_BACKEND", default="pdfium")
+
+# PDF pages without a text layer are rendered with pdfium (no Poppler needed) and read by Tesseract.
+# TESSERACT_CMD is the binary if not on PATH, e.g. C:\Program Files\Tesseract-OCR\tesseract.exe on Windows.
+# Pages render at their scan's resolution within OCR_MIN_DPI..OCR_MAX_DPI (OCR_DPI if unknown).
+TESSERACT_CMD = config("TESSERACT_CMD", default="tesseract")
+# psm 6: one uniform block, which keeps each table row on one line
+OCR_TESSERACT_CONFIG = config("OCR_TESSERACT_CONFIG", default="--psm 6")
+OCR_MIN_TEXT_CHARS = config("OCR_MIN_TEXT_CHARS", default=20, cast=int)
+OCR_DPI = config("OCR_DPI", default=300, cast=int)
+OCR_MIN_DPI = config("OCR_MIN_DPI", default=200, cast=int)
+OCR_MAX_DPI = config("OCR_MAX_DPI", default=400, cast=int)
+OCR_MAX_PIXELS = config("OCR_MAX_PIXELS", default=40_000_000, cast=int)
+OCR_WORKERS = config("OCR_WORKERS", default=min(4, os.cpu_count() or 1), cast=int)
+OCR_IMAGE_CACHE_DIR = config("OCR_IMAGE_CACHE_DIR", default=str(BASE_DIR / "ocr_cache"))
+OCR_IMAGE_CACHE_MAX_BYTES = config("OCR_IMAGE_CACHE_MAX_BYTES", default=512 * 1024 * 1024, cast=int)
+
+# Image uploads are OCR'd with easyocr after files.imageocr.prepare(): shrunk until their text is
+# about IMAGE_OCR_TEXT_HEIGHT px (down to IMAGE_OCR_MIN_SCALE), straightened (up to IMAGE_OCR_MAX_SKEW
+# degrees) and binarized. Taller results are read in overlapping strips, IMAGE_OCR_WORKERS at a time.
+IMAGE_OCR_TEXT_HEIGHT = config("IMAGE_OCR_TEXT_HEIGHT", default=20, cast=int)
+IMAGE_OCR_MIN_SCALE = config("IMAGE_OCR_MIN_SCALE", default=0.2, cast=float)
+IMAGE_OCR_MAX_SKEW = config("IMAGE_OCR_MAX_SKEW", default=10, cast=float)
+IMAGE_OCR_TILE_HEIGHT = config("IMAGE_OCR_TILE_HEIGHT", default=1024, cast=int)
+IMAGE_OCR_TILE_OVERLAP = config("IMAGE_OCR_TILE_OVERLAP", default=96, cast=int)
+IMAGE_OCR_WORKERS = config("IMAGE_OCR_WORKERS", default=2, cast=int)
 
 REDIS_URL = config("REDIS_URL", default=None)
 if REDIS_URL:
@@ -188,3 +249,42 @@ if REDIS_URL:
 else:
     CELERY_BROKER_URL = None
     CELERY_RESULT_BACKEND = None
+    # No broker: background jobs (e.g. PDF/image re-render after a cell edit) run inline
+    CELERY_TASK_ALWAYS_EAGER = True
+
+# Parse uploaded PDFs (OCR included) in a Celery task, so get_content finds them ready.
+# Without a worker, get_content parses and OCRs on first read instead.
+PARSE_IN_BACKGROUND = config("PARSE_IN_BACKGROUND", default=bool(REDIS_URL), cast=bool)
+
+# The nightly sweep deletes files older than SystemSettings.retention_days (or archives them with
+# auto_archive on). retention_days defaults to 30, so the scheduled run stays off until enabled here;
+# `manage.py sweep_expired_files` can still be run by hand.
+FILE_RETENTION_SWEEP = config("FILE_RETENTION_SWEEP", default=False, cast=bool)
+
+CELERY_BEAT_SCHEDULE = {
+    "sweep-expired-files": {
+        "task": "files.tasks.sweep_expired_files_task",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "expire-upload-sessions": {
+        "task": "files.tasks.expire_upload_sessions_task",
+        "schedule": crontab(minute=45),
+    },
+    "pack-archived-files": {
+        "task": "files.tasks.pack_archived_files_task",
+        "schedule": crontab(hour=3, minute=15),
+    },
+    # Picks up retries whose backoff has elapsed; new messages trigger a drain themselves
+    "drain-sms-outbox": {
+        "task": "accounts.tasks.drain_sms_outbox_task",
+        "schedule": 60.0,
+    },
+}
+
+# Rejection SMS go through an outbox (accounts.SMSOutbox) drained by a Celery worker.
+# SMS_PROVIDER: "twilio" (TWILIO_SID / TWILIO_AUTH_TOKEN / TWILIO_FROM), "console" (log only)
+# or "fake" (kept in memory, for tests).
+SMS_PROVIDER = config("SMS_PROVIDER", default="console")
+SMS_BATCH_SIZE = config("SMS_BATCH_SIZE", default=100, cast=int)
+SMS_MAX_ATTEMPTS = config("SMS_MAX_ATTEMPTS", default=5, cast=int)
+SMS_TIMEOUT = config("SMS_TIMEOUT", default=10, cast=float)
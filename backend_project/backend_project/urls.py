@@ -36,4 +36,11 @@ urlpatterns = [
     path("api/file-stats/", file_stats, name="file-stats"),
     path("api/user-stats/", user_stats, name="user-stats"),
     path("api/chat/", include("chat.urls")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+]
+
+# Uploads are only reachable through the download endpoints, which check permissions
+# and verification and log the download first. The dev server may still serve them
+# directly; in production the proxy location for FILE_DOWNLOAD_ACCEL_PREFIX must be
+# `internal` and MEDIA_ROOT must not be exposed.
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -1,5 +1,6 @@
 # chat/consumers.py
 import json
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer, AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from .models import ChatMessage, Room
@@ -21,6 +22,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
         await self.accept()
         print(f"{user.username} connected to {self.room_name}")
 
+        # Opt-in: ?history=N sends the last N messages right after connect.
+        params = parse_qs(self.scope.get("query_string", b"").decode())
+        history_limit = params.get("history", [None])[0]
+        if history_limit and history_limit.isdigit() and int(history_limit) > 0:
+            messages, has_more = await self.get_history(self.room_name, int(history_limit))
+            await self.send(text_data=json.dumps({
+                "type": "history",
+                "messages": messages,
+                "has_more": has_more,
+            }))
+
     async def disconnect(self, close_code):
         if hasattr(self, "room_group_name"):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
@@ -61,6 +73,19 @@ class ChatConsumer(AsyncWebsocketConsumer):
             "timestamp": event["timestamp"],
         }))
 
+    @database_sync_to_async
+    def get_history(self, room_name, limit):
+        messages, has_more = ChatMessage.history(room_name, limit=limit)
+        return [
+            {
+                "id": m.id,
+                "sender": m.sender.username,
+                "message": m.message,
+                "timestamp": m.timestamp.isoformat(),
+            }
+            for m in messages
+        ], has_more
+
     @database_sync_to_async
     def save_message(self, room_name, sender, message):
         # Get or create the Room object
@@ -0,0 +1,407 @@
+# chat/layers.py
+import asyncio
+import logging
+import random
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import msgpack
+import psycopg2
+from psycopg2 import pool as pg_pool
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+logger = logging.getLogger(__name__)
+
+# Connection params Django adds for its own cursor handling that psycopg2.connect() does not take
+DJANGO_ONLY_PARAMS = ("cursor_factory", "context", "prepare_threshold", "pool", "server_side_binding", "assume_role")
+
+class PostgresChannelLayer(BaseChannelLayer):
+    """
+    Channel layer backed by the project's Postgres database, for running several
+    ASGI workers without Redis.
+
+    Messages are queued as rows in LayerMessage keyed by their destination (the
+    process-specific part of a channel name, up to and including the "!", or the
+    full name for general channels). Every send/group_send is a single INSERT ...
+    RETURNING + pg_notify() round trip; each worker LISTENs on one notification
+    channel and, when one of its own destinations is notified, claims the queued
+    rows with DELETE ... RETURNING and hands them to the local receivers.
+    send() raises ChannelFull once `capacity` live messages are queued for a channel.
+    Group membership lives in LayerGroupMembership with an expiry, like channels_redis.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        database="default",
+        dsn=None,
+        prefix="asgi",
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        pool_size=4,
+        poll_interval=1.0,
+        **kwargs,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.database = database
+        self.dsn = dsn
+        self.notify_channel = f"{prefix}_channel_layer"
+        self.group_expiry = group_expiry
+        self.pool_size = pool_size
+        self.poll_interval = poll_interval
+        self.client_prefix = "".join(random.choice(string.ascii_letters) for _ in range(12))
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._executor = None
+        self._next_cleanup = 0
+        self._reset_local_state(None)
+
+    # Connections
+
+    def _connect_kwargs(self):
+        if self.dsn:
+            return {"dsn": self.dsn}
+        from django.db import connections
+        params = connections[self.database].get_connection_params()
+        for key in DJANGO_ONLY_PARAMS:
+            params.pop(key, None)
+        return params
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = pg_pool.ThreadedConnectionPool(1, self.pool_size, **self._connect_kwargs())
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="pg-layer")
+            return self._pool
+
+    def _execute(self, sql, params=(), fetch=False):
+        """Run one autocommit statement on a pooled connection (called from the executor)."""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        broken = False
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall() if fetch else None
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            pool.putconn(conn, close=broken)
+
+    async def _run(self, sql, params=(), fetch=False):
+        self._get_pool()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._execute, sql, params, fetch)
+
+    @property
+    def _tables(self):
+        from .models import LayerMessage, LayerGroupMembership
+        return LayerMessage._meta.db_table, LayerGroupMembership._meta.db_table
+
+    # Local (per event loop) state
+
+    def _reset_local_state(self, loop):
+        self._loop = loop
+        self._queues = {}
+        self._receiving = set()
+        self._destinations = set()
+        self._waiters = {}
+        self._draining = set()
+        self._drain_again = set()
+        self._listen_conn = None
+        self._listener_task = None
+
+    async def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._drop_listener()
+            self._reset_local_state(loop)
+        if self._listener_task is None:
+            self._listener_task = loop.create_task(self._start_listener())
+        try:
+            await asyncio.shield(self._listener_task)
+        except Exception:
+            self._listener_task = None
+            raise
+
+    async def _start_listener(self):
+        loop = asyncio.get_running_loop()
+
+        def connect():
+            conn = psycopg2.connect(**self._connect_kwargs())
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.notify_channel}"')
+            return conn
+
+        self._get_pool()
+        self._listen_conn = await loop.run_in_executor(self._executor, connect)
+        loop.add_reader(self._listen_conn.fileno(), self._on_notify)
+
+        # Catch up on anything queued while we were not listening
+        for destination in list(self._destinations):
+            self._schedule_drain(destination)
+        for event in self._waiters.values():
+            event.set()
+
+    def _drop_listener(self):
+        conn = self._listen_conn
+        self._listen_conn = None
+        self._listener_task = None
+        if conn is None:
+            return
+        try:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.remove_reader(conn.fileno())
+        except (ValueError, psycopg2.InterfaceError):
+            pass
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _on_notify(self):
+        try:
+            self._listen_conn.poll()
+        except psycopg2.Error as e:
+            logger.warning("Channel layer lost its LISTEN connection: %s", e)
+            self._drop_listener()
+            self._loop.create_task(self._reconnect())
+            return
+
+        notifies = self._listen_conn.notifies
+        while notifies:
+            destination = notifies.pop(0).payload
+            if destination in self._destinations:
+                self._schedule_drain(destination)
+            elif destination in self._waiters:
+                self._waiters[destination].set()
+
+    async def _reconnect(self):
+        delay = 0.5
+        while self._listen_conn is None and (self._destinations or self._waiters):
+            await asyncio.sleep(delay)
+            try:
+                await self._ensure_listener()
+            except psycopg2.Error as e:
+                logger.warning("Channel layer reconnect failed: %s", e)
+                delay = min(delay * 2, 10)
+
+    # Draining process-specific destinations
+
+    def _schedule_drain(self, destination):
+        if destination in self._draining:
+            self._drain_again.add(destination)
+            return
+        self._draining.add(destination)
+        self._loop.create_task(self._drain(destination))
+
+    async def _drain(self, destination):
+        messages, _ = self._tables
+        try:
+            while True:
+                self._drain_again.discard(destination)
+                rows = await self._run(
+                    f"DELETE FROM {messages} WHERE destination = %s "
+                    f"RETURNING id, channel, body, expires_at > now()",
+                    (destination,),
+                    fetch=True,
+                )
+                for _, channel, body, alive in sorted(rows):
+                    if alive:
+                        self._deliver(channel, msgpack.unpackb(bytes(body), raw=False))
+                if destination not in self._drain_again:
+                    break
+        except psycopg2.Error as e:
+            logger.warning("Channel layer drain of %s failed: %s", destination, e)
+        finally:
+            self._draining.discard(destination)
+
+    def _get_queue(self, channel):
+        if channel not in self._queues:
+            self._queues[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+        return self._queues[channel]
+
+    def _deliver(self, channel, message):
+        try:
+            self._get_queue(channel).put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning("Channel %s is full, dropping message", channel)
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        messages, _ = self._tables
+        destination = self.non_local_name(channel)
+        capacity = self.get_capacity(channel)
+        # Queued only while the channel holds fewer than `capacity` live messages (the count stops there)
+        queued = await self._run(
+            f"WITH queued AS ("
+            f" INSERT INTO {messages} (destination, channel, body, expires_at)"
+            f" SELECT %s, %s, %s, now() + %s * interval '1 second'"
+            f" WHERE (SELECT count(*) FROM (SELECT 1 FROM {messages}"
+            f"  WHERE destination = %s AND channel = %s AND expires_at > now() LIMIT %s) backlog) < %s"
+            f" RETURNING destination"
+            f") SELECT pg_notify(%s, destination) FROM queued",
+            (
+                destination,
+                channel,
+                psycopg2.Binary(msgpack.packb(message, use_bin_type=True)),
+                self.expiry,
+                destination,
+                channel,
+                capacity,
+                capacity,
+                self.notify_channel,
+            ),
+            fetch=True,
+        )
+        await self._maybe_cleanup()
+        if not queued:
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        await self._ensure_listener()
+
+        if "!" in channel:
+            destination = self.non_local_name(channel)
+            queue = self._get_queue(channel)
+            if destination not in self._destinations:
+                self._destinations.add(destination)
+                self._schedule_drain(destination)
+            self._receiving.add(channel)
+            try:
+                message = await queue.get()
+            except asyncio.CancelledError:
+                # The consumer went away: nobody will read what is still buffered for it
+                self._queues.pop(channel, None)
+                raise
+            finally:
+                self._receiving.discard(channel)
+            if queue.empty():
+                self._queues.pop(channel, None)
+            return message
+
+        return await self._receive_general(channel)
+
+    async def _receive_general(self, channel):
+        """General channels can have receivers in several workers, so claim one row at a time."""
+        messages, _ = self._tables
+        event = self._waiters.setdefault(channel, asyncio.Event())
+        try:
+            while True:
+                event.clear()
+                rows = await self._run(
+                    f"DELETE FROM {messages} WHERE id = ("
+                    f" SELECT id FROM {messages} WHERE destination = %s AND expires_at > now()"
+                    f" ORDER BY id LIMIT 1 FOR UPDATE SKIP LOCKED"
+                    f") RETURNING body",
+                    (channel,),
+                    fetch=True,
+                )
+                if rows:
+                    return msgpack.unpackb(bytes(rows[0][0]), raw=False)
+                try:
+                    await asyncio.wait_for(event.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.pop(channel, None)
+
+    async def new_channel(self, prefix="specific"):
+        return "%s.%s!%s" % (
+            prefix,
+            self.client_prefix,
+            "".join(random.choice(string.ascii_letters) for _ in range(12)),
+        )
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        _, groups = self._tables
+        await self._run(
+            f"INSERT INTO {groups} (group_name, channel, expires_at)"
+            f" VALUES (%s, %s, now() + %s * interval '1 second')"
+            f" ON CONFLICT (group_name, channel) DO UPDATE SET expires_at = EXCLUDED.expires_at",
+            (group, channel, self.group_expiry),
+        )
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        _, groups = self._tables
+        await self._run(
+            f"DELETE FROM {groups} WHERE group_name = %s AND channel = %s",
+            (group, channel),
+        )
+        # Consumers leave their groups on disconnect; a live receive() still owns its queue
+        if channel not in self._receiving:
+            self._queues.pop(channel, None)
+
+    async def group_send(self, group, message):
+        """Queue one row per member and notify each destination once, in a single statement."""
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        messages, groups = self._tables
+        await self._run(
+            f"WITH queued AS ("
+            f" INSERT INTO {messages} (destination, channel, body, expires_at)"
+            f" SELECT CASE WHEN strpos(channel, '!') > 0"
+            f"  THEN substr(channel, 1, strpos(channel, '!')) ELSE channel END,"
+            f"  channel, %s, now() + %s * interval '1 second'"
+            f" FROM {groups} WHERE group_name = %s AND expires_at > now()"
+            f" RETURNING destination"
+            f") SELECT pg_notify(%s, destination) FROM (SELECT DISTINCT destination FROM queued) d",
+            (
+                psycopg2.Binary(msgpack.packb(message, use_bin_type=True)),
+                self.expiry,
+                group,
+                self.notify_channel,
+            ),
+            fetch=True,
+        )
+        await self._maybe_cleanup()
+
+    # Expiry
+
+    async def _maybe_cleanup(self):
+        now = time.monotonic()
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self.expiry
+        messages, groups = self._tables
+        await self._run(f"DELETE FROM {messages} WHERE expires_at < now()")
+        await self._run(f"DELETE FROM {groups} WHERE expires_at < now()")
+
+    # Flush extension
+
+    async def flush(self):
+        messages, groups = self._tables
+        await self._run(f"DELETE FROM {messages}")
+        await self._run(f"DELETE FROM {groups}")
+        self._queues = {}
+
+    async def close(self):
+        self._drop_listener()
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
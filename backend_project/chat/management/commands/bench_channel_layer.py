@@ -0,0 +1,86 @@
+import asyncio
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from channels.layers import InMemoryChannelLayer
+from chat.layers import PostgresChannelLayer
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+class Command(BaseCommand):
+    help = "Benchmark group_send fan-out throughput and latency of the in-memory and Postgres channel layers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--layer", choices=["memory", "postgres", "both"], default="both")
+        parser.add_argument("--receivers", type=int, default=50, help="channels in the group")
+        parser.add_argument("--messages", type=int, default=200, help="group_send calls")
+        parser.add_argument("--rate", type=float, default=0, help="group_sends per second (0 = as fast as possible)")
+        parser.add_argument("--dsn", default=None, help="Postgres DSN (defaults to the default database)")
+
+    def handle(self, *args, **options):
+        layers = []
+        if options["layer"] in ("memory", "both"):
+            layers.append(("memory", InMemoryChannelLayer(capacity=options["messages"] + 1)))
+        if options["layer"] in ("postgres", "both"):
+            if not options["dsn"] and connection.vendor != "postgresql":
+                if options["layer"] == "postgres":
+                    raise CommandError("The Postgres layer needs a PostgreSQL database or --dsn.")
+                self.stdout.write("Skipping postgres layer: default database is not PostgreSQL.")
+            else:
+                layers.append(("postgres", PostgresChannelLayer(dsn=options["dsn"], capacity=options["messages"] + 1)))
+
+        self.stdout.write(f"{'layer':<10}{'sends/s':>10}{'deliv/s':>12}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for name, layer in layers:
+            result = asyncio.run(self.run_layer(layer, options))
+            self.stdout.write(
+                f"{name:<10}{result['sends_per_sec']:>10.0f}{result['deliveries_per_sec']:>12.0f}"
+                f"{result['p50']:>9.2f}{result['p95']:>9.2f}{result['p99']:>9.2f}{result['max']:>9.2f}"
+            )
+
+    async def run_layer(self, layer, options):
+        receivers, messages, rate = options["receivers"], options["messages"], options["rate"]
+        group = "bench_group"
+        await layer.flush()
+
+        channels = [await layer.new_channel() for _ in range(receivers)]
+        for channel in channels:
+            await layer.group_add(group, channel)
+
+        latencies = []
+
+        async def receiver(channel):
+            for _ in range(messages):
+                message = await layer.receive(channel)
+                latencies.append((time.perf_counter() - message["sent"]) * 1000)
+
+        # Warm up the listener / queues before timing
+        await layer.send(channels[0], {"type": "warmup", "sent": time.perf_counter()})
+        await layer.receive(channels[0])
+
+        tasks = [asyncio.create_task(receiver(channel)) for channel in channels]
+        start = time.perf_counter()
+        for i in range(messages):
+            await layer.group_send(group, {"type": "chat.message", "sent": time.perf_counter(), "seq": i})
+            if rate:
+                await asyncio.sleep(max(0, start + (i + 1) / rate - time.perf_counter()))
+        send_elapsed = time.perf_counter() - start
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        await layer.flush()
+        if hasattr(layer, "close"):
+            await layer.close()
+
+        return {
+            "sends_per_sec": messages / send_elapsed,
+            "deliveries_per_sec": len(latencies) / elapsed,
+            "p50": statistics.median(latencies),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        }
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+from channels import DEFAULT_CHANNEL_LAYER
+from channels.layers import InMemoryChannelLayer, channel_layers
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+class QueryCounter:
+    """Counts ORM queries on every connection, including the ones opened by database_sync_to_async."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def attach(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the chat WebSocket path: N concurrent ChatConsumer connections across M rooms, "
+        "reporting connect latency, broadcast latency percentiles, throughput and DB queries per message. "
+        "Runs against a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=100)
+        parser.add_argument("--rooms", type=int, default=10)
+        parser.add_argument("--rate", type=float, default=50, help="messages per second across all senders (0 = unthrottled)")
+        parser.add_argument("--messages", type=int, default=500, help="total messages to send")
+        parser.add_argument("--history", type=int, default=0, help="ask for the last N messages on connect")
+        parser.add_argument("--layer", choices=["memory", "postgres", "configured"], default="memory")
+        parser.add_argument("--timeout", type=float, default=10, help="seconds to wait for deliveries to drain")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.setup_layer(options["layer"])
+            tokens, rooms = self.create_fixtures(options["connections"], options["rooms"])
+            result = asyncio.run(self.run_load(tokens, rooms, options))
+            self.report(result, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def setup_layer(self, layer):
+        if layer == "memory":
+            channel_layers.set(DEFAULT_CHANNEL_LAYER, InMemoryChannelLayer(capacity=1000))
+        elif layer == "postgres":
+            from chat.layers import PostgresChannelLayer
+            channel_layers.set(DEFAULT_CHANNEL_LAYER, PostgresChannelLayer(capacity=1000))
+
+    def create_fixtures(self, n_connections, n_rooms):
+        from accounts.models import User
+        from chat.models import Room
+
+        users = User.objects.bulk_create(
+            [User(username=f"loadtest_{i}", role=User.Roles.CLIENT) for i in range(n_connections)]
+        )
+        rooms = [
+            Room.objects.create(name=f"loadtest-room-{i}", created_by=users[0])
+            for i in range(n_rooms)
+        ]
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+        return tokens, [room.name for room in rooms]
+
+    async def run_load(self, tokens, rooms, options):
+        from backend_project.asgi import application
+
+        counter = QueryCounter()
+        connection_created.connect(counter.attach)
+
+        sent_at = {}
+        latencies = []
+        received = 0
+        expected = 0
+        stop = asyncio.Event()
+
+        # --- connect ---
+        clients = []
+        connect_latencies = []
+        for i, token in enumerate(tokens):
+            room = rooms[i % len(rooms)]
+            path = f"/ws/chat/{room}/?token={token}"
+            if options["history"]:
+                path += f"&history={options['history']}"
+            communicator = WebsocketCommunicator(application, path)
+            start = time.perf_counter()
+            connected, code = await communicator.connect(timeout=10)
+            if not connected:
+                raise RuntimeError(f"Connection {i} rejected with code {code}")
+            if options["history"]:
+                await communicator.receive_from(timeout=10)
+            connect_latencies.append((time.perf_counter() - start) * 1000)
+            clients.append((room, communicator))
+
+        members = {room: sum(1 for r, _ in clients if r == room) for room in rooms}
+
+        async def listen(communicator):
+            nonlocal received
+            while not stop.is_set():
+                # Read the output queue directly: a receive_from() timeout would kill the consumer
+                try:
+                    output = await asyncio.wait_for(communicator.output_queue.get(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                now = time.perf_counter()
+                if output.get("type") != "websocket.send":
+                    continue
+                data = json.loads(output["text"])
+                sent = sent_at.get(data.get("message"))
+                if sent is not None:
+                    latencies.append((now - sent) * 1000)
+                    received += 1
+
+        listeners = [asyncio.create_task(listen(c)) for _, c in clients]
+
+        # --- drive messages ---
+        queries_before = counter.count
+        start = time.perf_counter()
+        for seq in range(options["messages"]):
+            room, communicator = random.choice(clients)
+            text = f"loadtest {seq}"
+            sent_at[text] = time.perf_counter()
+            expected += members[room]
+            await communicator.send_to(text_data=json.dumps({"message": text}))
+            if options["rate"]:
+                await asyncio.sleep(max(0, start + (seq + 1) / options["rate"] - time.perf_counter()))
+            else:
+                await asyncio.sleep(0)
+        send_elapsed = time.perf_counter() - start
+
+        deadline = time.perf_counter() + options["timeout"]
+        while received < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        queries = counter.count - queries_before
+
+        stop.set()
+        await asyncio.gather(*listeners)
+        for _, communicator in clients:
+            await communicator.disconnect()
+        connection_created.disconnect(counter.attach)
+        await channel_layers[DEFAULT_CHANNEL_LAYER].close()
+
+        return {
+            "connections": len(clients),
+            "connect_latencies": connect_latencies,
+            "latencies": latencies,
+            "sent": options["messages"],
+            "expected": expected,
+            "received": received,
+            "send_elapsed": send_elapsed,
+            "elapsed": elapsed,
+            "queries": queries,
+        }
+
+    def report(self, r, options):
+        w = self.stdout.write
+        w(f"layer={options['layer']} db={connection.vendor} connections={r['connections']} rooms={options['rooms']}")
+        c = r["connect_latencies"]
+        w(f"connect    p50={statistics.median(c):.2f}ms p95={percentile(c, 95):.2f}ms p99={percentile(c, 99):.2f}ms")
+        lat = r["latencies"]
+        if lat:
+            w(
+                f"broadcast  p50={statistics.median(lat):.2f}ms p95={percentile(lat, 95):.2f}ms "
+                f"p99={percentile(lat, 99):.2f}ms max={max(lat):.2f}ms"
+            )
+        w(f"messages   sent={r['sent']} ({r['sent'] / r['send_elapsed']:.1f}/s)")
+        w(f"deliveries {r['received']}/{r['expected']} ({r['received'] / r['elapsed']:.1f}/s)")
+        w(f"db queries {r['queries']} ({r['queries'] / max(r['sent'], 1):.2f} per message)")
+        if r["received"] < r["expected"]:
+            w(self.style.WARNING(f"{r['expected'] - r['received']} deliveries missing after {options['timeout']}s"))
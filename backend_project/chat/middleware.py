@@ -4,19 +4,19 @@ from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import AccessToken
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
+from accounts.user_cache import get_cached_user
 
 @database_sync_to_async
 def get_user_from_token(token):
-    """Return a User instance from JWT token or None."""
+    """Return an active User instance from JWT token or None."""
     try:
         access_token = AccessToken(token)
-        user_id = access_token["user_id"]
-        return User.objects.get(id=user_id)
-    except (TokenError, User.DoesNotExist, Exception):
+        user = get_cached_user(access_token["user_id"])
+    except (TokenError, Exception):
+        return None
+    if user is None or not user.is_active:
         return None
+    return user
 
 class JWTAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
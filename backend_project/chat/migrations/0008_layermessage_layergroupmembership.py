@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0007_chatmessage_chat_msg_room_ts_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayerMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destination', models.CharField(db_index=True, max_length=100)),
+                ('channel', models.CharField(max_length=100)),
+                ('body', models.BinaryField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LayerGroupMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_name', models.CharField(max_length=100)),
+                ('channel', models.CharField(max_length=100)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('group_name', 'channel'), name='chat_layer_group_channel_uniq')],
+            },
+        ),
+    ]
@@ -2,10 +2,14 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db.models import Q
 import secrets, string, random
 
 User = get_user_model()
 
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 200
+
 class ChatMessage(models.Model):
     room = models.CharField(max_length=255)
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -14,10 +18,50 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            models.Index(fields=["room", "timestamp", "id"], name="chat_msg_room_ts_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.message[:20]}"
 
+    @classmethod
+    def history(cls, room_name, before=None, after=None, limit=HISTORY_DEFAULT_LIMIT):
+        """
+        Keyset page of a room's messages, oldest first.
+        `before`/`after` are message ids; with neither, the latest `limit` messages are returned.
+        Returns (messages, has_more).
+        """
+        limit = max(1, min(int(limit), HISTORY_MAX_LIMIT))
+        qs = cls.objects.filter(room=room_name).select_related("sender")
+
+        anchor_id = after if after is not None else before
+        if anchor_id is not None:
+            anchor = cls.objects.filter(room=room_name, id=anchor_id).values("timestamp", "id").first()
+            if anchor is None:
+                return [], False
+            if after is not None:
+                qs = qs.filter(
+                    Q(timestamp__gt=anchor["timestamp"])
+                    | Q(timestamp=anchor["timestamp"], id__gt=anchor["id"])
+                )
+            else:
+                qs = qs.filter(
+                    Q(timestamp__lt=anchor["timestamp"])
+                    | Q(timestamp=anchor["timestamp"], id__lt=anchor["id"])
+                )
+
+        if after is not None:
+            page = list(qs.order_by("timestamp", "id")[:limit + 1])
+            has_more = len(page) > limit
+            return page[:limit], has_more
+
+        page = list(qs.order_by("-timestamp", "-id")[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        page.reverse()
+        return page, has_more
+
 def generate_passkey(length=6):
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
 
@@ -38,4 +82,23 @@ class Room(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class LayerMessage(models.Model):
+    """Message queued by chat.layers.PostgresChannelLayer until its receiver claims it."""
+    destination = models.CharField(max_length=100, db_index=True)
+    channel = models.CharField(max_length=100)
+    body = models.BinaryField()
+    expires_at = models.DateTimeField(db_index=True)
+
+class LayerGroupMembership(models.Model):
+    """Channel layer group membership, refreshed on every group_add."""
+    group_name = models.CharField(max_length=100)
+    channel = models.CharField(max_length=100)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["group_name", "channel"], name="chat_layer_group_channel_uniq"),
+        ]
@@ -11,6 +11,7 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
 class RoomSerializer(serializers.ModelSerializer):
     participants = serializers.StringRelatedField(many=True, read_only=True)
+    participant_count = serializers.SerializerMethodField()
     is_joined = serializers.SerializerMethodField()
     created_by_username = serializers.CharField(source="created_by.username", read_only=True)
     passkey = serializers.SerializerMethodField()
@@ -19,17 +20,30 @@ class RoomSerializer(serializers.ModelSerializer):
         model = Room
         fields = [
             "id", "name", "created_by", "created_at",
-            "participants", "is_joined", "created_by_username", "passkey"
+            "participants", "participant_count", "is_joined", "created_by_username", "passkey"
         ]
         read_only_fields = ["id", "created_by", "created_at", "participants", "passkey"]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The full member list is only sent when asked for with ?expand=participants
+        if not self.context.get("expand_participants"):
+            self.fields.pop("participants", None)
+
     def get_is_joined(self, obj):
+        if hasattr(obj, "is_joined"):
+            return obj.is_joined
         user = self.context["request"].user
         return obj.participants.filter(id=user.id).exists()
 
+    def get_participant_count(self, obj):
+        if hasattr(obj, "participant_count"):
+            return obj.participant_count
+        return obj.participants.count()
+
     def get_passkey(self, obj):
         user = self.context["request"].user
-        return obj.passkey if obj.created_by == user else None
+        return obj.passkey if obj.created_by_id == user.id else None
 
     def create(self, validated_data):
         user = self.context["request"].user
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import timedelta
+from unittest import skipUnless
+from channels.exceptions import ChannelFull
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from .layers import PostgresChannelLayer
+from .models import LayerGroupMembership, LayerMessage
+
+async def query(fn):
+    """Run an ORM call off the event loop, closing the worker thread's connection after it."""
+    def run():
+        try:
+            return fn()
+        finally:
+            connection.close()
+    return await asyncio.to_thread(run)
+
+@skipUnless(connection.vendor == "postgresql", "PostgresChannelLayer needs a Postgres database")
+class PostgresChannelLayerTests(TransactionTestCase):
+    def run_layers(self, test, count=1, **options):
+        """Run `test(*layers)` on fresh layers in a new event loop, closing them after."""
+        async def main():
+            layers = [PostgresChannelLayer(poll_interval=0.1, **options) for _ in range(count)]
+            try:
+                await layers[0].flush()
+                await asyncio.wait_for(test(*layers), 10)
+            finally:
+                for layer in layers:
+                    await layer.close()
+        asyncio.run(main())
+
+    def test_send_raises_channel_full_at_capacity(self):
+        async def test(layer):
+            for i in range(2):
+                await layer.send("general", {"type": "m", "i": i})
+            with self.assertRaises(ChannelFull):
+                await layer.send("general", {"type": "m", "i": 2})
+
+            channel = await layer.new_channel()
+            for i in range(2):
+                await layer.send(channel, {"type": "m", "i": i})
+            with self.assertRaises(ChannelFull):
+                await layer.send(channel, {"type": "m", "i": 2})
+        self.run_layers(test, capacity=2)
+
+    def test_group_send_reaches_only_live_members(self):
+        async def test(layer):
+            live, expired, left = [await layer.new_channel() for _ in range(3)]
+            for channel in (live, expired, left):
+                await layer.group_add("room", channel)
+            await layer.group_discard("room", left)
+            await query(
+                lambda: LayerGroupMembership.objects.filter(channel=expired).update(expires_at=timezone.now() - timedelta(seconds=1))
+            )
+
+            await layer.group_send("room", {"type": "chat.message", "text": "hi"})
+
+            queued = await query(lambda: list(LayerMessage.objects.values_list("channel", flat=True)))
+            self.assertEqual(queued, [live])
+            self.assertEqual(await layer.receive(live), {"type": "chat.message", "text": "hi"})
+        self.run_layers(test)
+
+    def test_group_discard_drops_the_queue_of_a_departed_consumer(self):
+        async def test(layer):
+            channel = await layer.new_channel()
+            await layer.group_add("room", channel)
+            await layer.group_send("room", {"type": "m", "i": 0})
+            await layer.group_send("room", {"type": "m", "i": 1})
+            self.assertEqual(await layer.receive(channel), {"type": "m", "i": 0})
+            # Wait for the second message to reach the local queue
+            while not layer._queues.get(channel) or layer._queues[channel].empty():
+                await asyncio.sleep(0.01)
+
+            await layer.group_discard("room", channel)
+            self.assertNotIn(channel, layer._queues)
+        self.run_layers(test)
+
+    def test_receive_general_claims_each_message_once_across_layers(self):
+        async def test(first, second):
+            for i in range(10):
+                await first.send("general", {"type": "m", "i": i})
+            received = await asyncio.gather(
+                *[first.receive("general") for _ in range(5)],
+                *[second.receive("general") for _ in range(5)],
+            )
+            self.assertEqual(sorted(message["i"] for message in received), list(range(10)))
+            self.assertFalse(await query(LayerMessage.objects.exists))
+        self.run_layers(test, count=2)
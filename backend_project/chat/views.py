@@ -2,32 +2,65 @@
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import ChatMessage, Room
+from .models import ChatMessage, Room, HISTORY_DEFAULT_LIMIT
 from .serializers import ChatMessageSerializer, RoomSerializer
 from rest_framework import generics, viewsets, permissions, status
+from rest_framework.pagination import PageNumberPagination
+from django.db.models import Count, Exists, OuterRef, Prefetch
 from django.shortcuts import get_object_or_404
 from accounts.serializers import UserSerializer
 from accounts.models import User
 
+HISTORY_PARAMS = ("before", "after", "limit")
+
+def history_response(request, room_name):
+    """Keyset page of a room's history driven by ?before=/?after=<message id> and ?limit=."""
+    try:
+        before = request.query_params.get("before")
+        after = request.query_params.get("after")
+        before = int(before) if before else None
+        after = int(after) if after else None
+        limit = int(request.query_params.get("limit") or HISTORY_DEFAULT_LIMIT)
+    except ValueError:
+        return Response({"error": "before, after and limit must be integers."}, status=400)
+
+    if before is not None and after is not None:
+        return Response({"error": "Use either before or after, not both."}, status=400)
+
+    messages, has_more = ChatMessage.history(room_name, before=before, after=after, limit=limit)
+    return Response({
+        "results": ChatMessageSerializer(messages, many=True).data,
+        "has_more": has_more,
+        "before": messages[0].id if messages else before,
+        "after": messages[-1].id if messages else after,
+    })
+
 class ChatMessageListView(generics.ListAPIView):
+    """
+    Room history. Plain requests keep the page-number pagination; passing any of
+    before/after/limit switches to keyset pagination over (room, timestamp, id).
+    """
     serializer_class = ChatMessageSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         room_name = self.kwargs["room_name"]
-        return ChatMessage.objects.filter(room=room_name).order_by("timestamp")
+        return (
+            ChatMessage.objects.filter(room=room_name)
+            .select_related("sender")
+            .order_by("timestamp", "id")
+        )
+
+    def list(self, request, *args, **kwargs):
+        if any(param in request.query_params for param in HISTORY_PARAMS):
+            return history_response(request, self.kwargs["room_name"])
+        return super().list(request, *args, **kwargs)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_messages(request, room_name):
-    """Fallback API if you want manual responses (optional)."""
-    messages = (
-        ChatMessage.objects.filter(room=room_name)
-        .select_related("sender")
-        .order_by("-timestamp")
-    )
-    serializer = ChatMessageSerializer(messages, many=True)
-    return Response(serializer.data)
+    """Keyset-paginated history (latest messages first page, oldest first within a page)."""
+    return history_response(request, room_name)
 
 class IsCreatorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -36,10 +69,41 @@ class IsCreatorOrReadOnly(permissions.BasePermission):
             return True
         return obj.created_by == request.user
     
+class RoomPagination(PageNumberPagination):
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
 class RoomViewSet(viewsets.ModelViewSet):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
     permission_classes = [permissions.IsAuthenticated, IsCreatorOrReadOnly]
+    pagination_class = RoomPagination
+
+    def expand_participants(self):
+        return "participants" in self.request.query_params.get("expand", "").split(",")
+
+    def get_queryset(self):
+        """Membership and member counts are computed in SQL so listing rooms is a single query."""
+        user = self.request.user
+        memberships = Room.participants.through.objects.filter(room=OuterRef("pk"), user=user.pk)
+        queryset = (
+            Room.objects.select_related("created_by")
+            .annotate(
+                is_joined=Exists(memberships),
+                participant_count=Count("participants"),
+            )
+            .order_by("id")
+        )
+        if self.expand_participants():
+            queryset = queryset.prefetch_related(
+                Prefetch("participants", queryset=User.objects.only("id", "username"))
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["expand_participants"] = self.expand_participants()
+        return context
 
     @action(detail=True, methods=["post"])
     def join(self, request, pk=None):
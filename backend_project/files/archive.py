@@ -0,0 +1,160 @@
+#files/archive.py
+import hashlib
+import io
+import json
+import logging
+import lzma
+import shutil
+import struct
+import tempfile
+from django.core.files import File as DjangoFile
+from .writers import SPOOL_MAX_SIZE
+
+# Pack layout: MAGIC, then independent .xz streams ("blocks") each holding several
+# blobs back to back, then a JSON index, its offset (8 bytes, little endian) and MAGIC.
+# The database keeps the same index on Blob, so restoring one file decompresses one
+# block only; the trailer lets a pack be read without the database.
+PACK_MAGIC = b"PTCPACK1"
+
+# Blobs are compressed together ("solid") up to this much input per block, so
+# near-identical timesheets compress against each other. LZMA preset 6 keeps an
+# 8 MiB window, which covers a whole block.
+PACK_BLOCK_SIZE = 8 * 1024 * 1024
+PACK_PRESET = 6
+
+READ_SIZE = 256 * 1024
+
+logger = logging.getLogger(__name__)
+
+class PackError(Exception):
+    pass
+
+def write_pack(out, blobs, block_size=PACK_BLOCK_SIZE):
+    """
+    Write the hot bytes of `blobs` into `out` as a pack. Returns {blob.id: (block_offset,
+    block_size, offset)} for the blobs written and their total uncompressed size. Blobs
+    whose bytes are missing or no longer match their sha256 are logged and skipped.
+    """
+    out.write(PACK_MAGIC)
+    index = {}
+    trailer = {}
+    total = 0
+    block = {"start": out.tell(), "compressor": None, "used": 0, "members": []}
+
+    def flush():
+        if block["compressor"] is None:
+            return
+        out.write(block["compressor"].flush())
+        length = out.tell() - block["start"]
+        for blob, offset in block["members"]:
+            index[blob.id] = (block["start"], length, offset)
+            trailer[blob.sha256] = [block["start"], length, offset, blob.size]
+        block.update(start=out.tell(), compressor=None, used=0, members=[])
+
+    for blob in blobs:
+        if block["used"] and block["used"] + blob.size > block_size:
+            flush()
+        if block["compressor"] is None:
+            block["compressor"] = lzma.LZMACompressor(format=lzma.FORMAT_XZ, preset=PACK_PRESET)
+
+        hasher = hashlib.sha256()
+        fed = 0
+        try:
+            with blob.file.open("rb") as src:
+                for chunk in src.chunks(READ_SIZE):
+                    hasher.update(chunk)
+                    out.write(block["compressor"].compress(chunk))
+                    fed += len(chunk)
+        except FileNotFoundError:
+            logger.warning("Blob %s has no bytes in storage; not packed", blob.sha256)
+        else:
+            if fed == blob.size and hasher.hexdigest() == blob.sha256:
+                block["members"].append((blob, block["used"]))
+                total += fed
+            else:
+                # The bytes stay in the block as dead space; the blob keeps its hot copy
+                logger.warning("Blob %s does not match its hash; not packed", blob.sha256)
+        block["used"] += fed
+    flush()
+
+    index_offset = out.tell()
+    out.write(json.dumps(trailer, separators=(",", ":")).encode())
+    out.write(struct.pack("<Q", index_offset) + PACK_MAGIC)
+    return index, total
+
+def read_pack_index(fh):
+    """The sha256 -> [block_offset, block_size, offset, size] trailer of an open pack."""
+    fh.seek(-16, io.SEEK_END)
+    index_offset, magic = struct.unpack("<Q8s", fh.read(16))
+    if magic != PACK_MAGIC:
+        raise PackError("Not an archive pack")
+    end = fh.seek(-16, io.SEEK_END)
+    fh.seek(index_offset)
+    return json.loads(fh.read(end - index_offset))
+
+class PackedBlobReader(io.RawIOBase):
+    """
+    Bytes [start, start + length) of a packed blob, decompressed lazily from its
+    block; restoring one file never touches the rest of the pack.
+    """
+
+    def __init__(self, blob, start=0, length=None):
+        super().__init__()
+        pack_file = blob.pack.file
+        self.fh = pack_file.storage.open(pack_file.name, "rb")
+        self.fh.seek(blob.pack_block_offset)
+        self.compressed_left = blob.pack_block_size
+        self.decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+        self.skip = blob.pack_offset + start
+        self.remaining = blob.size - start if length is None else length
+
+    def readable(self):
+        return True
+
+    def _inflate(self, size):
+        while True:
+            if self.decompressor.needs_input:
+                chunk = self.fh.read(min(READ_SIZE, self.compressed_left))
+                self.compressed_left -= len(chunk)
+            else:
+                chunk = b""
+            data = self.decompressor.decompress(chunk, max_length=size)
+            if data:
+                return data
+            if self.decompressor.eof or (self.decompressor.needs_input and not self.compressed_left):
+                raise PackError("Archive block ended early")
+
+    def read(self, size=-1):
+        while self.skip:
+            self.skip -= len(self._inflate(min(self.skip, READ_SIZE)))
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if size <= 0:
+            return b""
+        data = self._inflate(size)
+        self.remaining -= len(data)
+        return data
+
+    def readall(self):
+        parts = []
+        while self.remaining:
+            parts.append(self.read(READ_SIZE))
+        return b"".join(parts)
+
+    def close(self):
+        self.fh.close()
+        super().close()
+
+def open_content(file_obj):
+    """
+    A readable, seekable handle on a File's bytes (use it as a context manager).
+    Packed blobs are restored into a spool, since parsers such as pdfplumber seek.
+    """
+    blob = file_obj.blob
+    if blob is None or blob.pack_id is None:
+        return file_obj.file.open("rb")
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    with PackedBlobReader(blob) as src:
+        shutil.copyfileobj(src, spool, READ_SIZE)
+    spool.seek(0)
+    return DjangoFile(spool, name=file_obj.display_name)
@@ -0,0 +1,137 @@
+#files/blobs.py
+import hashlib
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, When
+from .models import Blob
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+_batch = threading.local()
+
+def hash_content(content):
+    """Return (sha256 hex, size) of a Django File/UploadedFile, streaming it in chunks."""
+    hasher = hashlib.sha256()
+    size = 0
+    content.seek(0)
+    for chunk in content.chunks(HASH_BLOCK_SIZE):
+        if isinstance(chunk, str):
+            # ContentFile built from text, as update_content does for CSV
+            chunk = chunk.encode()
+        hasher.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+    return hasher.hexdigest(), size
+
+def store_blob(content, filename, sha256=None):
+    """
+    Return the Blob holding `content`, writing it to storage only if no blob with
+    the same sha256 exists yet. The returned blob's ref_count already includes
+    the caller's new reference.
+    """
+    if sha256 is None:
+        sha256, size = hash_content(content)
+    else:
+        size = content.size
+
+    with transaction.atomic():
+        if Blob.objects.filter(sha256=sha256).update(ref_count=F("ref_count") + 1):
+            return Blob.objects.get(sha256=sha256)
+
+        blob = Blob(sha256=sha256, size=size, ref_count=1)
+        blob.file.save(filename, content, save=False)
+        try:
+            with transaction.atomic():
+                blob.save()
+            return blob
+        except IntegrityError:
+            # Lost a race with an identical concurrent upload: keep theirs
+            blob.file.delete(save=False)
+            Blob.objects.filter(sha256=sha256).update(ref_count=F("ref_count") + 1)
+            return Blob.objects.get(sha256=sha256)
+
+def release_blob(blob_id):
+    """Drop one reference; the blob row and its bytes go when the last File lets go."""
+    pending = getattr(_batch, "pending", None)
+    if pending is not None:
+        pending[blob_id] += 1
+        return
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            Blob.objects.filter(pk=blob_id).update(ref_count=F("ref_count") - 1)
+            return
+        storage, name = blob.file.storage, blob.file.name
+        blob.delete()
+        transaction.on_commit(lambda: storage.delete(name))
+
+def release_blobs(counts):
+    """
+    Drop several references at once ({blob_id: n}) in one UPDATE and one DELETE.
+    Returns (freed blob count, freed bytes); storage deletes run after commit.
+    """
+    if not counts:
+        return 0, 0
+    with transaction.atomic():
+        blobs = list(Blob.objects.select_for_update().filter(pk__in=counts).only("id", "ref_count", "size", "file"))
+        keep = [b for b in blobs if b.ref_count > counts[b.pk]]
+        freed = [b for b in blobs if b.ref_count <= counts[b.pk]]
+        if keep:
+            Blob.objects.filter(pk__in=[b.pk for b in keep]).update(
+                ref_count=Case(*[When(pk=b.pk, then=F("ref_count") - counts[b.pk]) for b in keep])
+            )
+        if freed:
+            Blob.objects.filter(pk__in=[b.pk for b in freed]).delete()
+            storage, names = freed[0].file.storage, [b.file.name for b in freed]
+            transaction.on_commit(lambda: delete_from_storage(storage, names))
+    return len(freed), sum(b.size for b in freed)
+
+@contextmanager
+def batched_release():
+    """
+    Collect the release_blob() calls made inside the block (e.g. by the File
+    post_delete signal during a bulk delete) and apply them with release_blobs()
+    when it exits cleanly. Yields a dict that receives the freed count/bytes.
+    """
+    _batch.pending = Counter()
+    result = {"blobs": 0, "bytes": 0}
+    try:
+        yield result
+        result["blobs"], result["bytes"] = release_blobs(_batch.pending)
+    finally:
+        _batch.pending = None
+
+def delete_from_storage(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete %s from storage", name)
+
+def attach_blob(file_obj, blob):
+    """Point a File row at a blob (does not save)."""
+    file_obj.blob = blob
+    file_obj.file.name = blob.file.name
+
+def replace_file_content(file_obj, content):
+    """
+    Swap a File's bytes for `content` (copy-on-write for blob-backed files, since
+    other File rows may share the old blob) and save it.
+    """
+    if file_obj.blob_id is None:
+        file_obj.file.save(file_obj.file.name, content, save=True)
+        return
+
+    old_blob_id = file_obj.blob_id
+    blob = store_blob(content, file_obj.display_name)
+    attach_blob(file_obj, blob)
+    file_obj.save()
+    # Drop the file's reference to its previous blob (the same blob if the bytes did not change)
+    release_blob(old_blob_id)
@@ -0,0 +1,42 @@
+#files/conditional.py
+import hashlib
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+def make_etag(request, *parts):
+    """
+    Strong ETag over the values that fully determine a response body, in the
+    representation negotiated for `request` (JSON, columnar, msgpack, ...).
+    """
+    parts = (getattr(request, "accepted_media_type", ""),) + parts
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return quote_etag(digest)
+
+def validator_headers(etag, last_modified=None):
+    # no-cache: browsers keep the body but revalidate every poll with If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return headers
+
+def not_modified(request, etag, last_modified=None):
+    """
+    The 304 (or 412 for If-Match) answering `request` when the client already holds
+    the current version, else None. Call it before building the body.
+    """
+    probe = HttpResponse(headers=validator_headers(etag, last_modified))
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+        response=probe,
+    )
+    return None if response is probe else response
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag / Last-Modified to a successful response."""
+    if response.status_code == 200:
+        for header, value in validator_headers(etag, last_modified).items():
+            response[header] = value
+    return response
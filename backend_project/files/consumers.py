@@ -0,0 +1,31 @@
+# files/consumers.py
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .events import notification_groups
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live file events for dashboards. Staff join their role's group and see every
+    file; clients join their own user group. Connect with ?token=<JWT access token>.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or user.is_anonymous:
+            await self.close(code=4001)
+            return
+
+        self.notify_groups = notification_groups(user)
+        for group in self.notify_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        for group in getattr(self, "notify_groups", []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def file_event(self, event):
+        await self.send_json({
+            "type": f"file_{event['event']}",
+            "files": event["files"],
+            "counters": event["counters"],
+        })
@@ -0,0 +1,200 @@
+#files/downloads.py
+import asyncio
+import io
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_etags, quote_etag
+from .archive import PackedBlobReader
+
+DOWNLOAD_BLOCK_SIZE = 256 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class RangeFile(io.RawIOBase):
+    """
+    Read-only window [start, start + length) over an open file. It keeps the real
+    fileno(), so a WSGI server's wsgi.file_wrapper (gunicorn) can os.sendfile()
+    the window straight from the page cache once Content-Length caps it.
+    """
+
+    def __init__(self, fh, start, length):
+        super().__init__()
+        self.fh = fh
+        self.start = start
+        self.length = length
+        self.name = getattr(fh, "name", "")
+        fh.seek(start)
+
+    def fileno(self):
+        return self.fh.fileno()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.fh.tell() - self.start
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence == io.SEEK_END:
+            offset += self.length
+        offset = max(0, min(offset, self.length))
+        self.fh.seek(self.start + offset)
+        return offset
+
+    def read(self, size=-1):
+        remaining = self.length - self.tell()
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.fh.read(size) if size > 0 else b""
+
+    def close(self):
+        self.fh.close()
+        super().close()
+
+def file_etag(file_obj, size):
+    """Strong ETag from the content hash for blob-backed files, weak one for legacy uploads."""
+    if file_obj.blob_id:
+        return quote_etag(file_obj.blob.sha256)
+    return f'W/"{size:x}-{int(file_obj.updated_at.timestamp()):x}"'
+
+def parse_range(header, size):
+    """
+    Return (start, end) for a single "bytes=" range, None to serve the whole file
+    (no/unsupported/multi-range header), or False if the range is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+def etag_matches(header, etag, weak=True):
+    if not header:
+        return False
+    tags = parse_etags(header)
+    if "*" in tags:
+        return True
+    if weak:
+        strip = lambda tag: tag[2:] if tag.startswith("W/") else tag
+        return strip(etag) in {strip(tag) for tag in tags}
+    return not etag.startswith("W/") and etag in tags
+
+def local_path(field_file):
+    try:
+        return field_file.path
+    except NotImplementedError:
+        return None
+
+async def stream_range(fh, length, block_size):
+    """Async file iterator for ASGI; Django would otherwise buffer a sync iterator whole."""
+    try:
+        while length > 0:
+            block = await asyncio.to_thread(fh.read, min(block_size, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        fh.close()
+
+def offload_response(field_file, path):
+    """Let the front proxy send the bytes (and handle Range itself)."""
+    mode = getattr(settings, "FILE_DOWNLOAD_OFFLOAD", "")
+    response = HttpResponse()
+    if mode == "x-accel-redirect":
+        prefix = getattr(settings, "FILE_DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(field_file.name)
+    elif mode == "x-sendfile":
+        response["X-Sendfile"] = path
+    else:
+        return None
+    return response
+
+def file_download_response(request, file_obj, filename):
+    """
+    Serve a File's bytes with ETag/If-None-Match, Last-Modified and single-range
+    support. Callers run their permission/verification/logging checks first.
+    Packed (cold) blobs are decompressed from their archive block as they stream.
+    """
+    field_file = file_obj.file
+    packed = file_obj.blob if file_obj.blob_id and file_obj.blob.pack_id else None
+    if packed:
+        path, size = None, packed.size
+    else:
+        path = local_path(field_file)
+        size = os.path.getsize(path) if path else field_file.size
+    etag = file_etag(file_obj, size)
+    last_modified = http_date(file_obj.updated_at.timestamp())
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    def finish(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified
+        response["Accept-Ranges"] = "bytes"
+        if response.status_code == 304:
+            del response["Content-Type"]
+        else:
+            response["Content-Type"] = content_type
+        return response
+
+    if etag_matches(request.META.get("HTTP_IF_NONE_MATCH"), etag):
+        return finish(HttpResponse(status=304))
+
+    if path:
+        response = offload_response(field_file, path)
+        if response is not None:
+            response["Content-Disposition"] = content_disposition_header(True, filename)
+            return finish(response)
+
+    byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if byte_range is not None and if_range and not etag_matches(if_range, etag, weak=False):
+        # The client's partial copy is stale: send the whole new file
+        byte_range = None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return finish(response)
+
+    start, end = byte_range or (0, size - 1)
+    length = max(0, end - start + 1)
+    if packed:
+        window = PackedBlobReader(packed, start, length)
+    else:
+        fh = open(path, "rb") if path else field_file.storage.open(field_file.name, "rb")
+        window = RangeFile(fh, start, length)
+    block_size = getattr(settings, "FILE_DOWNLOAD_BLOCK_SIZE", DOWNLOAD_BLOCK_SIZE)
+
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        response = StreamingHttpResponse(stream_range(window, length, block_size))
+        response["Content-Length"] = str(length)
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+    else:
+        response = FileResponse(window, as_attachment=True, filename=filename)
+        response.block_size = block_size
+        response["Content-Length"] = str(length)
+
+    if byte_range:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return finish(response)
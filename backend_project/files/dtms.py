@@ -0,0 +1,85 @@
+#files/dtms.py
+import re
+
+# The DTMS "Daily Time Record Summary" table, the same on every page of the report
+MAIN_HEADERS = (
+    "Emp. No",
+    "Name",
+    "Duty (By Days)",
+    "Late",
+    "UT",
+    "Work (By Hrs)",
+    "Day-Off (By Hours)",
+    "SH (By Hrs)",
+    "LH (By Hrs)",
+    "Day-Off - SH (By Hrs)",
+    "Day-Off - LH (By Hrs)",
+)
+SUB_HEADERS = (
+    ("",), ("",),
+    ("WRK", "ABS", "LV", "HOL", "RES"),
+    ("",), ("",),
+    ("REG", "OT", "ND", "OTND"),
+    ("REG", "OT", "ND", "OTND"),
+    ("REG", "OT", "ND", "OTND"),
+    ("REG", "OT", "ND", "OTND"),
+    ("REG", "OT", "ND", "OTND"),
+    ("REG", "OT", "ND", "OTND"),
+)
+# Value cells kept after the employee no and name; short rows are padded with zeros
+COLUMNS = sum(len(group) for group in SUB_HEADERS)
+ZEROS = ["0.00"] * COLUMNS
+
+# A value is any plain decimal ("8", "7.50", "+.25"), sent as 0.00; anything else is a word
+NUMBER_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)")
+
+class Cells(dict):
+    """
+    token -> its cell ("8" -> "8.00"), or "" for a word. A report prints the same
+    few values over and over, so nearly every token is a plain dict hit.
+    """
+    limit = 50_000
+
+    def __missing__(self, token):
+        cell = f"{float(token):.2f}" if NUMBER_RE.fullmatch(token) else ""
+        if len(self) < self.limit:
+            self[token] = cell
+        return cell
+
+CELLS = Cells()
+
+def is_table_header(line):
+    return "Emp." in line and "DUTY" in line
+
+def parse_row(line):
+    """[emp no, name, *COLUMNS values] for a data line, None for anything else."""
+    parts = line.split()
+    if not parts or not parts[0].isdigit():
+        return None
+    cells = list(map(CELLS.__getitem__, parts))
+
+    # The name is every word before the first value; words after it are dropped
+    start = 1
+    while start < len(cells) and not cells[start]:
+        start += 1
+    values = cells[start:]
+    if not all(values):
+        values = list(filter(None, values))
+
+    row = [parts[0], " ".join(parts[1:start])]
+    row += values[:COLUMNS]
+    row += ZEROS[len(values):]
+    return row
+
+def parse_table(lines):
+    """The page's summary table from its text lines, or None when it has no table rows."""
+    for idx, line in enumerate(lines):
+        if is_table_header(line):
+            break
+    else:
+        return None
+    rows = [row for row in map(parse_row, lines[idx + 1:]) if row is not None]
+    if not rows:
+        return None
+    # Lists, as get_content has always sent them; the renderers read groups as lists
+    return {"main_headers": list(MAIN_HEADERS), "sub_headers": [list(group) for group in SUB_HEADERS], "rows": rows}
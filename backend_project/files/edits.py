@@ -0,0 +1,61 @@
+#files/edits.py
+import copy
+from .models import BlobContent, FileContent
+
+class CellEditError(ValueError):
+    pass
+
+def stored_pages(file_obj):
+    """
+    The pages a cell edit applies to: the file's own edited content, else the parse
+    cached on its blob. update_content may have stored bare rows, which are one page.
+    """
+    pages = FileContent.load(file_obj.pk)
+    if pages is None and file_obj.blob_id:
+        pages = BlobContent.load(file_obj.blob_id)
+    if pages and not isinstance(pages[0], dict):
+        pages = [{"page_number": 1, "content": pages}]
+    return pages
+
+def edit_target(page, edit):
+    """The row list an edit addresses: page content (CSV/XLSX/images) or a PDF table's rows."""
+    if page.get("content") is not None:
+        return page["content"], "content"
+    tables = page.get("tables") or []
+    table = edit.get("table", 0)
+    if not isinstance(table, int) or not 0 <= table < len(tables):
+        raise CellEditError(f"Page {page.get('page_number')} has no table {table}")
+    return tables[table]["rows"], "table"
+
+def apply_cell_edits(pages, edits):
+    """
+    Apply [{page, row, col, value}, ...] to a copy of `pages`.
+    Returns (new_pages, changed) where changed maps (page_index, kind) -> {row index: new row}.
+    """
+    if not isinstance(edits, list) or not edits:
+        raise CellEditError("edits must be a non-empty list")
+
+    pages = copy.deepcopy(pages)
+    by_number = {page.get("page_number", i + 1): i for i, page in enumerate(pages)}
+    changed = {}
+
+    for edit in edits:
+        if not isinstance(edit, dict) or not all(key in edit for key in ("page", "row", "col", "value")):
+            raise CellEditError("Each edit needs page, row, col and value")
+        page_index = by_number.get(edit["page"])
+        if page_index is None:
+            raise CellEditError(f"No page {edit['page']}")
+
+        rows, kind = edit_target(pages[page_index], edit)
+        row, col = edit["row"], edit["col"]
+        if not isinstance(row, int) or not isinstance(col, int) or row < 0 or col < 0 or row >= len(rows):
+            raise CellEditError(f"Cell ({row}, {col}) is outside page {edit['page']}")
+
+        cells = rows[row]
+        if col >= len(cells):
+            cells.extend([""] * (col + 1 - len(cells)))
+        value = edit["value"]
+        cells[col] = "" if value is None else value
+        changed.setdefault((page_index, kind), {})[row] = cells
+
+    return pages, changed
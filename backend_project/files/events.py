@@ -0,0 +1,81 @@
+#files/events.py
+import logging
+from collections import defaultdict
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Staff see every file; clients only hear about their own
+STAFF_ROLES = ("admin", "viewer")
+
+# dashboard_stats keys each status counts towards
+STATUS_COUNTERS = {"pending": "filesPending", "verified": "filesApproved", "rejected": "filesRejected"}
+
+def role_group(role):
+    return f"notify_role_{role}"
+
+def user_group(user_id):
+    return f"notify_user_{user_id}"
+
+def notification_groups(user):
+    """The groups a NotificationConsumer joins for `user`."""
+    if user.role in STAFF_ROLES:
+        return [role_group(user.role)]
+    return [user_group(user.id)]
+
+def file_payload(file_obj, previous_status=None):
+    """Event view of a File; the owner must be loaded (or cheap to load)."""
+    return {
+        "id": file_obj.id,
+        "name": file_obj.display_name,
+        "owner": file_obj.owner.username,
+        "owner_id": file_obj.owner_id,
+        "status": file_obj.status,
+        "previous_status": previous_status,
+        "uploaded_at": file_obj.uploaded_at.isoformat() if file_obj.uploaded_at else None,
+    }
+
+def counter_deltas(event, items):
+    """How the dashboard counters move: {"filesPending": -2, "filesRejected": 2}."""
+    deltas = defaultdict(int)
+    for item in items:
+        if event in ("status_changed", "deleted") and item["previous_status"] in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[item["previous_status"]]] -= 1
+        if event in ("created", "status_changed") and item["status"] in STATUS_COUNTERS:
+            deltas[STATUS_COUNTERS[item["status"]]] += 1
+    return {key: value for key, value in deltas.items() if value}
+
+def publish_file_event(event, files, previous=None):
+    """
+    Push one "created" / "updated" / "status_changed" / "deleted" event covering `files` once
+    the transaction commits: the whole batch to the staff role groups, and each
+    owner's share to that owner. `previous` maps file id -> status before the change.
+    """
+    previous = previous or {}
+    items = [file_payload(file_obj, previous.get(file_obj.id)) for file_obj in files]
+    if items:
+        transaction.on_commit(lambda: send_file_event(event, items))
+
+def send_file_event(event, items):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    send = async_to_sync(layer.group_send)
+
+    def message(batch):
+        return {"type": "file.event", "event": event, "files": batch, "counters": counter_deltas(event, batch)}
+
+    by_owner = defaultdict(list)
+    for item in items:
+        by_owner[item["owner_id"]].append(item)
+    try:
+        staff_message = message(items)
+        for role in STAFF_ROLES:
+            send(role_group(role), staff_message)
+        for owner_id, owned in by_owner.items():
+            send(user_group(owner_id), message(owned))
+    except Exception:
+        # Live updates are best effort; the data itself is already committed
+        logger.exception("Could not publish file %s event", event)
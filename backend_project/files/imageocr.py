@@ -0,0 +1,175 @@
+#files/imageocr.py
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from django.conf import settings
+
+# Text height and skew are measured on a copy no larger than this on its long side
+ESTIMATE_SIDE = 1600
+# Ink pixels the skew search looks at; more only sharpens an already clear peak
+SKEW_SAMPLE = 60_000
+
+# `image` is what OCR reads; `inverse` maps its pixels back onto the decoded upload
+Prepared = namedtuple("Prepared", "image inverse text_height angle")
+# `box`: four [x, y] corners on the upload. `left`/`top`: where the word sits on the
+# straightened page, text about IMAGE_OCR_TEXT_HEIGHT px tall; group rows by those.
+OCRWord = namedtuple("OCRWord", "box text confidence left top")
+
+@lru_cache(maxsize=1)
+def easyocr_reader():
+    """Loading the detection and recognition models takes seconds; do it once per process."""
+    import easyocr
+    return easyocr.Reader(["en"], verbose=False)
+
+def ink_mask(gray):
+    """Dark-on-light text as 255 on a copy shrunk to ESTIMATE_SIDE; returns (mask, shrink factor)."""
+    import cv2
+
+    factor = min(1.0, ESTIMATE_SIDE / max(gray.shape))
+    small = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA) if factor < 1 else gray
+    # Local rather than global (Otsu) threshold: a photo's shadowed side is not all ink
+    block = max(15, max(small.shape) // 50) | 1
+    ink = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, block, 15)
+    return ink, factor
+
+def text_height(ink):
+    """Median height of the character-sized blobs in an ink mask, or None if it has too few."""
+    import cv2
+    import numpy as np
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights, widths = stats[1:, cv2.CC_STAT_HEIGHT], stats[1:, cv2.CC_STAT_WIDTH]
+    # Taller than a speck or a decimal point, and neither a table rule nor the whole grid
+    glyphs = (heights >= 4) & (heights <= ink.shape[0] / 10) & (widths <= heights * 3)
+    if glyphs.sum() < 10:
+        return None
+    return float(np.median(heights[glyphs]))
+
+def skew_angle(ink, max_angle):
+    """
+    Tilt of the text lines in degrees (positive: falling to the right), the angle at
+    which the ink's row profile is sharpest. Table rules line up the same way.
+    """
+    import numpy as np
+
+    ys, xs = np.nonzero(ink)
+    if len(xs) < 100:
+        return 0.0
+    if len(xs) > SKEW_SAMPLE:
+        stride = len(xs) // SKEW_SAMPLE + 1
+        ys, xs = ys[::stride], xs[::stride]
+    ys, xs = ys.astype(np.float64), xs.astype(np.float64)
+
+    def sharpness(angle):
+        theta = np.deg2rad(angle)
+        rows = np.round(ys * np.cos(theta) - xs * np.sin(theta)).astype(np.int64)
+        counts = np.bincount(rows - rows.min())
+        return float(np.dot(counts, counts))
+
+    coarse = max(np.arange(-max_angle, max_angle + 0.25, 0.5), key=sharpness)
+    return float(max(np.arange(coarse - 0.5, coarse + 0.55, 0.1), key=sharpness))
+
+def prepare(gray, target_height=None, deskew=True, binarize=True):
+    """
+    A decoded grayscale upload made ready for OCR: scaled so its text is about
+    `target_height` px tall (never enlarged), straightened, and thresholded per
+    neighbourhood so uneven lighting in phone photos drops out.
+    """
+    import cv2
+    import numpy as np
+
+    target_height = target_height or settings.IMAGE_OCR_TEXT_HEIGHT
+    ink, factor = ink_mask(gray)
+    measured = text_height(ink)
+    angle = skew_angle(ink, settings.IMAGE_OCR_MAX_SKEW) if deskew else 0.0
+
+    height, width = gray.shape
+    scale = 1.0
+    if measured:
+        scale = min(1.0, max(settings.IMAGE_OCR_MIN_SCALE, target_height / (measured / factor)))
+    image = gray
+    if scale < 0.9:
+        image = cv2.resize(gray, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+    # Exact per-axis factors, after rounding to whole pixels
+    sx, sy = image.shape[1] / width, image.shape[0] / height
+    forward = np.array([[sx, 0, 0], [0, sy, 0]], dtype=np.float64)
+
+    if abs(angle) >= 0.2:
+        h, w = image.shape
+        rotation = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        # Grow the canvas so no corner is cut off
+        cos, sin = abs(rotation[0, 0]), abs(rotation[0, 1])
+        new_w, new_h = int(h * sin + w * cos + 0.5), int(h * cos + w * sin + 0.5)
+        rotation[0, 2] += new_w / 2 - w / 2
+        rotation[1, 2] += new_h / 2 - h / 2
+        image = cv2.warpAffine(image, rotation, (new_w, new_h), flags=cv2.INTER_LINEAR, borderValue=255)
+        forward = rotation @ np.vstack([forward, [0, 0, 1]])
+
+    text = measured / factor * scale if measured else None
+    # Thresholding text much smaller than the target eats its strokes; such images
+    # (screenshots) are clean renders that gain nothing from it anyway
+    if binarize and (text is None or text >= target_height * 0.75):
+        block = 2 * int(target_height * 1.5) + 1
+        image = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 15)
+
+    return Prepared(image, cv2.invertAffineTransform(forward), text, angle if abs(angle) >= 0.2 else 0.0)
+
+def tile_bands(height, tile_height, overlap):
+    """
+    Horizontal strips (top, bottom, keep_top, keep_bottom) covering `height` rows, each
+    overlapping the next by `overlap`. A detection belongs to the strip whose keep range
+    holds its centre, so a line read twice in an overlap is kept once.
+    """
+    if height <= tile_height:
+        return [(0, height, 0, height)]
+    step = tile_height - overlap
+    tops = list(range(0, height - tile_height, step)) + [height - tile_height]
+    bands = []
+    for i, top in enumerate(tops):
+        bottom = top + tile_height
+        keep_top = 0 if i == 0 else (top + tops[i - 1] + tile_height) // 2
+        keep_bottom = height if i == len(tops) - 1 else (bottom + tops[i + 1]) // 2
+        bands.append((top, bottom, keep_top, keep_bottom))
+    return bands
+
+def read_image(gray, reader=None, tile_height=None, overlap=None, workers=None, **prepare_options):
+    """
+    easyocr's readtext() over a decoded grayscale image, as OCRWords in reading order.
+    Tall pages are read in overlapping strips, several at a time.
+    """
+    import numpy as np
+
+    reader = reader or easyocr_reader()
+    prepared = prepare(gray, **prepare_options)
+    image = prepared.image
+    bands = tile_bands(
+        image.shape[0],
+        tile_height or settings.IMAGE_OCR_TILE_HEIGHT,
+        overlap or settings.IMAGE_OCR_TILE_OVERLAP,
+    )
+
+    def read_band(band):
+        top, bottom, keep_top, keep_bottom = band
+        found = []
+        for box, text, confidence in reader.readtext(image[top:bottom]):
+            points = np.asarray(box, dtype=np.float64) + (0, top)
+            if keep_top <= points[:, 1].mean() < keep_bottom:
+                found.append((points, text, confidence))
+        return found
+
+    workers = min(workers or settings.IMAGE_OCR_WORKERS, len(bands))
+    if workers > 1:
+        # The models are shared; torch releases the GIL while it computes
+        with ThreadPoolExecutor(workers) as pool:
+            results = [item for found in pool.map(read_band, bands) for item in found]
+    else:
+        results = [item for band in bands for item in read_band(band)]
+
+    inverse = prepared.inverse
+    words = []
+    for points, text, confidence in results:
+        original = points @ inverse[:, :2].T + inverse[:, 2]
+        box = [[int(round(x)), int(round(y))] for x, y in original]
+        words.append(OCRWord(box, text, confidence, float(points[0][0]), float(points[0][1])))
+    words.sort(key=lambda word: (word.top, word.left))
+    return words
@@ -0,0 +1,34 @@
+import os
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from files.blobs import store_blob, attach_blob
+from files.models import File
+
+class Command(BaseCommand):
+    help = "Move files uploaded before content-addressed storage into shared blobs, deduplicating identical ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        moved = missing = 0
+        for file_obj in File.objects.filter(blob__isnull=True).iterator():
+            old_name = file_obj.file.name
+            if not file_obj.file.storage.exists(old_name):
+                missing += 1
+                continue
+            if options["dry_run"]:
+                moved += 1
+                continue
+
+            with transaction.atomic():
+                with file_obj.file.open("rb") as content:
+                    blob = store_blob(content, os.path.basename(old_name))
+                file_obj.name = file_obj.name or os.path.basename(old_name)
+                attach_blob(file_obj, blob)
+                file_obj.save(update_fields=["name", "blob", "file"])
+            file_obj.file.storage.delete(old_name)
+            moved += 1
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(f"{verb} {moved} file(s) into blobs; {missing} missing from storage")
@@ -0,0 +1,79 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from files.dtms import COLUMNS, parse_row
+
+def is_number(val):
+    try:
+        float(val)
+        return True
+    except ValueError:
+        return False
+
+def legacy_row(line):
+    """The per-line loop get_content ran before files.dtms."""
+    parts = line.split()
+    if not parts or not parts[0].isdigit():
+        return None
+    emp_no = parts[0]
+    name_parts, numbers = [], []
+    found_number = False
+    for p in parts[1:]:
+        if is_number(p):
+            found_number = True
+            numbers.append(f"{float(p):.2f}")
+        elif not found_number:
+            name_parts.append(p)
+    clean_name = " ".join(name_parts).strip()
+    padded_numbers = numbers + ["0.00"] * (COLUMNS - len(numbers))
+    return [emp_no, clean_name] + padded_numbers[:COLUMNS]
+
+def report_lines(count, seed=0):
+    """Lines as pdftext reads a DTMS report: mostly clean rows, plus the odd ones a real export has."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        emp_no = str(10000 + i)
+        name = rng.choice(["DELA CRUZ, JUAN P.", "SANTOS, MARIA", "REYES JR., JOSE", "O'NEIL, ANNE-MARIE"])
+        values = [f"{rng.choice([0, 0, 0, 8, 0.5, 1.25, 13, 104.75]):.2f}" for _ in range(COLUMNS)]
+        kind = i % 50
+        if kind == 0:
+            lines.append("Daily Time Record Summary (for the period of 01/09/2025 - 30/09/2025)")
+        elif kind == 1:
+            lines.append(f"Page {i // 50 + 1}")
+        elif kind == 2:
+            # Trailing columns left blank
+            lines.append(" ".join([emp_no, name] + values[:COLUMNS - 6]))
+        elif kind == 3:
+            # Whole numbers as the export sometimes prints them
+            lines.append(" ".join([emp_no, name] + [value.removesuffix(".00") for value in values]))
+        elif kind == 4:
+            lines.append(" ".join([emp_no, "GARCIA, PEDRO 3RD"] + values))
+        else:
+            lines.append(" ".join([emp_no, name] + values))
+    return lines
+
+class Command(BaseCommand):
+    help = "Lines per second of the DTMS row parser against the old split/float loop, on synthetic report lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=1_000_000)
+        parser.add_argument("--distinct", type=int, default=10_000, help="distinct lines, repeated up to --lines")
+
+    def handle(self, *args, **options):
+        distinct = report_lines(min(options["distinct"], options["lines"]))
+        lines = (distinct * (options["lines"] // len(distinct) + 1))[:options["lines"]]
+
+        mismatches = sum(parse_row(line) != legacy_row(line) for line in distinct)
+        self.stdout.write(f"{len(lines)} lines; {mismatches} of {len(distinct)} distinct lines parse differently")
+
+        baseline = None
+        for label, parse in (("split/float", legacy_row), ("dtms", parse_row)):
+            start = time.perf_counter()
+            rows = sum(row is not None for row in map(parse, lines))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{label:<12} {elapsed:7.2f}s  {len(lines) / elapsed / 1000:8.0f}k lines/s  "
+                f"{elapsed / len(lines) * 1e6:6.2f} us/line  {rows} rows  {baseline / elapsed:.1f}x"
+            )
@@ -0,0 +1,97 @@
+import tempfile
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from files.imageocr import easyocr_reader, prepare, read_image
+from .bench_pdf_text import write_report
+
+def phone_photo(pdf_path, dpi, angle, seed=0):
+    """
+    A page of the PDF as a phone would shoot it: high resolution, tilted by `angle`
+    degrees (falling to the right), darker towards one side, grainy and a little soft.
+    """
+    import cv2
+    import numpy as np
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        page = pdf[0].render(scale=dpi / 72, grayscale=True).to_numpy()
+    finally:
+        pdf.close()
+    page = page[:, :, 0] if page.ndim == 3 else page
+    h, w = page.shape
+    tilted = cv2.warpAffine(page, cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1.0), (w, h), borderValue=255)
+    light = np.linspace(1.0, 0.6, w, dtype=np.float32)[None, :]
+    noise = np.random.default_rng(seed).normal(0, 8, tilted.shape).astype(np.float32)
+    shot = cv2.GaussianBlur(tilted.astype(np.float32) * light + noise, (3, 3), 0)
+    return np.clip(shot, 0, 255).astype(np.uint8)
+
+def page_words(pdf_path):
+    from files.pdftext import pdfium_texts
+    with open(pdf_path, "rb") as source:
+        return Counter(pdfium_texts(source)[0].split())
+
+def words_of(texts):
+    return Counter(word for text in texts for word in text.split())
+
+def recall(found, reference):
+    return sum((found & reference).values()) / max(sum(reference.values()), 1)
+
+class Command(BaseCommand):
+    help = "Word recall and latency of easyocr on full-resolution images against the prepared (scaled, deskewed, binarized, tiled) path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="sample images; recall is measured against the full-resolution read")
+        parser.add_argument("--synthetic-dpi", type=int, default=330, help="330 dpi renders a ~13 MP photo; 0 to skip it")
+        parser.add_argument("--angle", type=float, default=3.0)
+        parser.add_argument("--workers", type=int, default=2)
+
+    def measure(self, label, gray, reference=None):
+        import cv2
+
+        reader = easyocr_reader()
+        variants = [
+            ("full-res", None),
+            ("prepared", {"tile_height": 10**9, "workers": 1}),
+            ("no binarize", {"binarize": False, "workers": self.workers}),
+            ("prepared+tiles", {"workers": self.workers}),
+        ]
+        baseline = None
+        for name, options in variants:
+            start = time.perf_counter()
+            if options is None:
+                # What get_content did before: the decoded upload as is
+                texts = [text for _, text, _ in reader.readtext(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))]
+                elapsed = time.perf_counter() - start
+                pixels = gray.size
+            else:
+                texts = [word.text for word in read_image(gray, reader=reader, **options)]
+                elapsed = time.perf_counter() - start
+                pixels = prepare(gray, binarize=options.get("binarize", True)).image.size
+            found = words_of(texts)
+            if reference is None:
+                reference = found
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{label:>22} {name:<15} {pixels / 1e6:6.1f} MP  {elapsed:7.2f}s ({baseline / elapsed:4.1f}x)  "
+                f"recall {recall(found, reference):6.1%}  {sum(found.values())} words"
+            )
+
+    def handle(self, *args, **options):
+        import cv2
+
+        self.workers = options["workers"]
+        # Load the models before timing anything
+        easyocr_reader()
+        for path in options["paths"]:
+            gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                self.stderr.write(f"{path}: not an image")
+                continue
+            self.measure(path.rsplit("/", 1)[-1], gray)
+        if options["synthetic_dpi"]:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+                write_report(tmp.name, 1, 35)
+                photo = phone_photo(tmp.name, options["synthetic_dpi"], options["angle"])
+                self.measure(f"photo {options['angle']:+.1f} deg", photo, page_words(tmp.name))
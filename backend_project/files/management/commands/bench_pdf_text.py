@@ -0,0 +1,73 @@
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from files.pdftext import pdfium_texts, pdfplumber_texts
+
+HEADER = "Emp. Name DUTY ( BY DAYS) LATE UT WORK (BY HRS) DAY-OFF (BY HOURS) SH (BY HOURS) LH (BY HRS)"
+
+def write_report(out, pages, rows_per_page):
+    """A Daily Time Record Summary like LRT.pdf; each row's numbers are drawn before its name, as there."""
+    from reportlab.lib.pagesizes import landscape, legal
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(out, pagesize=landscape(legal))
+    emp_no = 1000
+    for _ in range(pages):
+        pdf.setFont("Helvetica", 7)
+        pdf.drawString(10, 590, "Daily Time Record Summary (for the period of 01/09/2025 - 30/09/2025)")
+        pdf.drawString(10, 560, HEADER)
+        for r in range(rows_per_page):
+            y = 540 - r * 14
+            emp_no += 1
+            for c in range(31):
+                pdf.drawString(180 + c * 26, y, f"{(emp_no * (c + 1)) % 97 / 4:.2f}")
+            pdf.drawString(10, y, str(emp_no))
+            pdf.drawString(40, y, f"EMPLOYEE, NUMBER {emp_no}")
+        pdf.showPage()
+    pdf.save()
+
+def table_rows(text):
+    """The lines get_content would parse as rows: after the header, starting with an employee number."""
+    lines = text.splitlines()
+    for idx, line in enumerate(lines):
+        if "Emp." in line and "DUTY" in line:
+            return [line.split() for line in lines[idx + 1:] if line.split() and line.split()[0].isdigit()]
+    return []
+
+class Command(BaseCommand):
+    help = "Per-page text extraction time of the pdfium and pdfplumber backends, on given PDFs and a synthetic report."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="PDF files to time, e.g. LRT.pdf")
+        parser.add_argument("--synthetic-pages", type=int, default=100, help="0 to skip the synthetic report")
+        parser.add_argument("--rows-per-page", type=int, default=35)
+
+    def measure(self, label, path):
+        results = {}
+        for name, extract in (("pdfium", pdfium_texts), ("pdfplumber", pdfplumber_texts)):
+            with open(path, "rb") as source:
+                start = time.perf_counter()
+                texts = extract(source)
+                results[name] = (time.perf_counter() - start, texts)
+
+        pages = len(results["pdfium"][1])
+        for name, (elapsed, texts) in results.items():
+            rows = sum(len(table_rows(text)) for text in texts)
+            self.stdout.write(
+                f"{label:>16} {name:<10} {pages:4d} pages  {elapsed:7.2f}s  "
+                f"{elapsed / pages * 1000:7.1f} ms/page  {rows} table rows"
+            )
+        same = sum(
+            [row[:2] for row in table_rows(a)] == [row[:2] for row in table_rows(b)]
+            for a, b in zip(results["pdfium"][1], results["pdfplumber"][1])
+        )
+        speedup = results["pdfplumber"][0] / results["pdfium"][0]
+        self.stdout.write(f"{label:>16} {speedup:.1f}x faster; same employee numbers on {same}/{pages} pages")
+
+    def handle(self, *args, **options):
+        for path in options["paths"]:
+            self.measure(path.rsplit("/", 1)[-1], path)
+        if options["synthetic_pages"]:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+                write_report(tmp.name, options["synthetic_pages"], options["rows_per_page"])
+                self.measure(f"synthetic x{options['synthetic_pages']}", tmp.name)
@@ -0,0 +1,65 @@
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from files.render import render_image
+
+def legacy_render_image(rows):
+    """The fixed 200x50-cell, three-channel renderer update_content used before."""
+    import cv2
+    import numpy as np
+
+    cell_width, cell_height = 200, 50
+    font, font_scale, thickness = cv2.FONT_HERSHEY_SIMPLEX, 0.7, 1
+    n_rows = len(rows)
+    n_cols = max(len(r) for r in rows)
+    img = np.ones((n_rows * cell_height + 2, n_cols * cell_width + 2, 3), dtype=np.uint8) * 255
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            x1, y1 = j * cell_width, i * cell_height
+            cv2.rectangle(img, (x1, y1), (x1 + cell_width, y1 + cell_height), (0, 0, 0), 1)
+            text = str(cell)
+            (tw, th), _ = cv2.getTextSize(text, font, font_scale, thickness)
+            cv2.putText(img, text, (x1 + (cell_width - tw) // 2, y1 + (cell_height + th) // 2), font, font_scale, (0, 0, 0), thickness)
+    _, buffer = cv2.imencode(".png", img)
+    return buffer.tobytes()
+
+def parse_grid(value):
+    rows, cols = value.lower().split("x")
+    return int(rows), int(cols)
+
+class Command(BaseCommand):
+    help = "Render time and peak memory of the update_content image renderer against grid size (rows x cols)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grids", default="100x10,1000x20,5000x35,20000x35")
+        parser.add_argument(
+            "--legacy-max-pixels", type=int, default=400_000_000,
+            help="skip the old renderer on grids whose full RGB canvas would exceed this many pixels",
+        )
+
+    def measure(self, render, rows):
+        start = time.perf_counter()
+        size = len(render(rows))
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        render(rows)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak, size
+
+    def handle(self, *args, **options):
+        for grid in options["grids"].split(","):
+            n_rows, n_cols = parse_grid(grid)
+            rows = [[str(1000 + i), f"EMPLOYEE {i}"] + [f"{(i * c) % 97 / 4:.2f}" for c in range(n_cols - 2)] for i in range(n_rows)]
+
+            renderers = [("new", render_image)]
+            if n_rows * 50 * n_cols * 200 <= options["legacy_max_pixels"]:
+                renderers.insert(0, ("legacy", legacy_render_image))
+            else:
+                self.stdout.write(f"{grid:>9} legacy  skipped ({n_rows * 50 * n_cols * 200 * 3 / 2**30:.1f} GiB canvas)")
+
+            for label, render in renderers:
+                elapsed, peak, size = self.measure(render, rows)
+                self.stdout.write(
+                    f"{grid:>9} {label:<7} {elapsed:7.2f}s  peak {peak / 2**20:8.1f} MiB  png {size / 2**20:6.2f} MiB"
+                )
@@ -0,0 +1,69 @@
+import gzip
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from files.models import DTREntry
+from files.renderers import ColumnarJSONRenderer, MessagePackRenderer, ORJSONRenderer
+from files.serializers import DTREntrySerializer
+from .bench_render_image import parse_grid
+
+RENDERERS = [
+    ("drf json", JSONRenderer(), "application/json"),
+    ("orjson", ORJSONRenderer(), "application/json"),
+    ("columnar", ColumnarJSONRenderer(), "application/vnd.ptc.columnar+json"),
+    ("msgpack", MessagePackRenderer(), "application/msgpack"),
+    ("msgpack col", MessagePackRenderer(), "application/msgpack; layout=columnar"),
+]
+
+def sheet_payload(n_rows, n_cols):
+    """What get_content returns for a parsed timesheet CSV/XLSX."""
+    header = ["Emp. No", "Name"] + [f"Col {c}" for c in range(n_cols - 2)]
+    rows = [[f"{i:05d}", f"EMPLOYEE {i}"] + [f"{(i * c) % 97 / 4:.2f}" for c in range(n_cols - 2)] for i in range(n_rows)]
+    return {"pages": [{"page_number": 1, "content": [header] + rows}], "version": 3}
+
+def dtr_payload(n_rows, days=16):
+    """What DTRFileViewSet.content returns, serialized the way the view does it."""
+    start = date(2025, 9, 1)
+    entries = [
+        DTREntry(
+            id=i + 1, dtr_file_id=1, full_name=f"EMPLOYEE {i}", employee_no=f"{i:05d}", area="LRT-1",
+            daily_data={str(start + timedelta(days=d)): (8 if (i + d) % 7 else None) for d in range(days)},
+            total_days=Decimal("13.00"), total_hours=Decimal("104.00"), undertime_minutes=i % 30,
+            regular_ot=Decimal("2.50"), legal_holiday=Decimal("0.00"), unworked_reg_holiday=Decimal("0.00"),
+            special_holiday=Decimal("8.00"), night_diff=Decimal("1.25"),
+        )
+        for i in range(n_rows)
+    ]
+    return {"start_date": start, "end_date": start + timedelta(days=days - 1), "rows": DTREntrySerializer(entries, many=True).data}
+
+class Command(BaseCommand):
+    help = "Payload bytes (raw and gzipped) and render time of each tabular response format."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grids", default="1000x20,20000x35", help="get_content sheets, rows x cols")
+        parser.add_argument("--dtr-rows", default="500,5000", help="DTR content sizes, entries")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def measure(self, label, data):
+        baseline = None
+        for name, renderer, media_type in RENDERERS:
+            best = float("inf")
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                body = renderer.render(data, media_type, {})
+                best = min(best, time.perf_counter() - start)
+            zipped = len(gzip.compress(body, 6))
+            baseline = baseline or len(body)
+            self.stdout.write(
+                f"{label:>14} {name:<12} {len(body) / 2**20:8.2f} MiB ({len(body) / baseline:4.0%})  "
+                f"gzip {zipped / 2**20:6.2f} MiB  {best * 1000:8.1f} ms"
+            )
+
+    def handle(self, *args, **options):
+        self.repeat = options["repeat"]
+        for grid in options["grids"].split(","):
+            self.measure(f"sheet {grid}", sheet_payload(*parse_grid(grid)))
+        for n_rows in options["dtr_rows"].split(","):
+            self.measure(f"dtr {n_rows}", dtr_payload(int(n_rows)))
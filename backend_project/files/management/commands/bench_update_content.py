@@ -0,0 +1,76 @@
+import csv
+import io
+import time
+import tracemalloc
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from files.writers import write_csv, write_xlsx
+
+def to_float(cell):
+    try:
+        return float(cell)
+    except (ValueError, TypeError):
+        return str(cell or "0.00")
+
+def legacy_csv(rows):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for row in rows:
+        writer.writerow([str(cell) for cell in row])
+    return ContentFile(output.getvalue())
+
+def legacy_xlsx(rows):
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append([to_float(cell) for cell in row])
+    stream = io.BytesIO()
+    wb.save(stream)
+    return ContentFile(stream.getvalue())
+
+def drain(content):
+    """Read the result the way storage.save() does."""
+    size = 0
+    for chunk in content.chunks():
+        size += len(chunk)
+    return size
+
+class Command(BaseCommand):
+    help = "Compare peak memory and time of the in-memory and streaming update_content writers on a large edit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--cols", type=int, default=30, help="DTMS summaries have 29 value columns + name")
+        parser.add_argument("--formats", default="csv,xlsx")
+        parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass (it slows openpyxl ~100x)")
+
+    def handle(self, *args, **options):
+        # Same shape as a parsed DTMS table: employee no, name, then numeric strings
+        rows = [
+            [str(1000 + i), f"EMPLOYEE {i}"] + [f"{(i * c) % 97 / 4:.2f}" for c in range(options["cols"] - 2)]
+            for i in range(options["rows"])
+        ]
+        self.stdout.write(f"{options['rows']} rows x {options['cols']} cols")
+
+        writers = {
+            "csv": (legacy_csv, lambda r: write_csv(r)),
+            "xlsx": (legacy_xlsx, lambda r: write_xlsx(r, to_float)),
+        }
+        for fmt in options["formats"].split(","):
+            legacy, streaming = writers[fmt]
+            for label, writer in (("in-memory", legacy), ("streaming", streaming)):
+                start = time.perf_counter()
+                content = writer(rows)
+                size = drain(content)
+                elapsed = time.perf_counter() - start
+                content.close()
+
+                peak = ""
+                if not options["no_memory"]:
+                    tracemalloc.start()
+                    writer(rows).close()
+                    peak = f"  peak {tracemalloc.get_traced_memory()[1] / 2**20:8.1f} MiB"
+                    tracemalloc.stop()
+
+                self.stdout.write(f"{fmt:<5} {label:<10} {elapsed:7.2f}s  output {size / 2**20:6.1f} MiB{peak}")
@@ -0,0 +1,44 @@
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from files.models import UploadSession
+from files.uploads import discard_part, upload_dir
+
+class Command(BaseCommand):
+    help = (
+        "Expire chunked uploads that stopped receiving chunks and delete their part files, "
+        "plus any part file no active upload owns."
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = 0
+        for pk in UploadSession.objects.filter(status="active", expires_at__lt=now).values_list("id", flat=True):
+            # Locked like upload_chunk, so a chunk arriving now is written either before or not at all
+            with transaction.atomic():
+                session = UploadSession.objects.select_for_update().filter(pk=pk, status="active", expires_at__lt=now).first()
+                if session is None:
+                    continue
+                discard_part(session)
+                session.status = "expired"
+                session.save(update_fields=["status", "updated_at"])
+                expired += 1
+
+        # Parts left behind by sessions that were deleted (e.g. with their owner) or crashed mid-write
+        active = {str(pk) for pk in UploadSession.objects.filter(status="active").values_list("id", flat=True)}
+        stale_before = (now - timedelta(hours=settings.CHUNKED_UPLOAD_TTL_HOURS)).timestamp()
+        orphans = 0
+        directory = upload_dir()
+        for entry in os.scandir(directory):
+            upload_id, ext = os.path.splitext(entry.name)
+            if ext == ".part" and upload_id not in active and entry.stat().st_mtime < stale_before:
+                try:
+                    os.remove(entry.path)
+                    orphans += 1
+                except FileNotFoundError:
+                    pass
+
+        self.stdout.write(f"Expired {expired} uploads and removed {orphans} orphaned part files.")
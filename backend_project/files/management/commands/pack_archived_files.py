@@ -0,0 +1,84 @@
+import os
+import tempfile
+from collections import defaultdict
+from datetime import timedelta
+from django.core.files import File as DjangoFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from files.archive import write_pack
+from files.blobs import delete_from_storage
+from files.models import ArchivePack, Blob, File
+
+class Command(BaseCommand):
+    help = (
+        "Move blobs whose files are all archived into compressed monthly packs, then drop "
+        "their hot copies. Downloads and content views keep working from the pack."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="print what would be packed")
+        parser.add_argument("--min-age", type=int, default=0, help="only pack blobs first uploaded at least this many days ago")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["min_age"])
+        live = File.objects.exclude(status="archived").filter(blob__isnull=False).values("blob_id")
+        candidates = (
+            Blob.objects.filter(pack__isnull=True, ref_count__gt=0)
+            .exclude(id__in=live)
+            .annotate(first_upload=Min("files__uploaded_at"))
+            .filter(first_upload__lt=cutoff)
+            .only("id", "sha256", "file", "size")
+        )
+
+        months = defaultdict(list)
+        for blob in candidates:
+            months[f"{blob.first_upload:%Y-%m}"].append(blob)
+
+        for month, blobs in sorted(months.items()):
+            if options["dry_run"]:
+                self.stdout.write(f"{month}: would pack {len(blobs)} blobs ({sum(b.size for b in blobs) / 2**20:.1f} MiB)")
+                continue
+            # Same-type files next to each other compress best inside a solid block
+            blobs.sort(key=lambda b: (os.path.splitext(b.file.name)[1], b.first_upload))
+            self.pack_month(month, blobs)
+
+        if not options["dry_run"]:
+            self.drop_empty_packs()
+
+    def pack_month(self, month, blobs):
+        with tempfile.TemporaryFile() as tmp:
+            index, original_size = write_pack(tmp, blobs)
+            if not index:
+                return
+            pack = ArchivePack(month=month, size=tmp.tell(), original_size=original_size)
+            tmp.seek(0)
+            pack.file.save(f"{month}/{timezone.now():%Y%m%d%H%M%S}.pack", DjangoFile(tmp), save=False)
+
+        with transaction.atomic():
+            pack.save()
+            # Blobs freed while the pack was being written are simply left out
+            packed = list(Blob.objects.select_for_update().filter(id__in=index, pack__isnull=True).only("id", "file"))
+            for blob in packed:
+                blob.pack = pack
+                blob.pack_block_offset, blob.pack_block_size, blob.pack_offset = index[blob.id]
+            Blob.objects.bulk_update(packed, ["pack", "pack_block_offset", "pack_block_size", "pack_offset"])
+            names = [blob.file.name for blob in packed]
+            transaction.on_commit(lambda: delete_from_storage(default_storage, names))
+
+        ratio = original_size / pack.size if pack.size else 0
+        self.stdout.write(
+            f"{month}: packed {len(packed)} blobs, {original_size / 2**20:.1f} MiB -> "
+            f"{pack.size / 2**20:.1f} MiB ({ratio:.1f}x) in {pack.file.name}"
+        )
+
+    def drop_empty_packs(self):
+        """Packs whose blobs have all been released since."""
+        empty = list(ArchivePack.objects.filter(blobs__isnull=True))
+        if not empty:
+            return
+        ArchivePack.objects.filter(id__in=[pack.id for pack in empty]).delete()
+        delete_from_storage(default_storage, [pack.file.name for pack in empty])
+        self.stdout.write(f"Removed {len(empty)} empty pack(s).")
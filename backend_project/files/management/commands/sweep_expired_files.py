@@ -0,0 +1,110 @@
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from files.blobs import batched_release, delete_from_storage
+from files.events import publish_file_event
+from files.models import AuditLog, Blob, File, SystemSettings
+
+class Command(BaseCommand):
+    help = (
+        "Enforce SystemSettings.retention_days: archive (auto_archive on) or delete files uploaded "
+        "before the cutoff, in bounded chunks, and report what was reclaimed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="print the plan without changing anything")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        settings = SystemSettings.objects.first()
+        if not settings or settings.retention_days <= 0:
+            self.stdout.write("File retention is not configured.")
+            return
+
+        cutoff = timezone.now() - timedelta(days=settings.retention_days)
+        archive = settings.auto_archive
+        expired = File.objects.filter(uploaded_at__lt=cutoff)
+        if archive:
+            expired = expired.exclude(status="archived")
+        verb = "archive" if archive else "delete"
+
+        if options["dry_run"]:
+            self.plan(expired, verb, cutoff, options["batch_size"], options["verbosity"])
+            return
+
+        totals = {"files": 0, "blobs": 0, "bytes": 0}
+        last = None
+        while True:
+            # Keyset walk over the uploaded_at index; each chunk is its own short transaction
+            chunk = expired
+            if last:
+                chunk = chunk.filter(Q(uploaded_at__gt=last[0]) | Q(uploaded_at=last[0], id__gt=last[1]))
+            rows = list(chunk.order_by("uploaded_at", "id").values_list("uploaded_at", "id", "blob_id", "file")[:options["batch_size"]])
+            if not rows:
+                break
+            last = rows[-1][:2]
+            ids = [row[1] for row in rows]
+
+            # Loaded up front so open dashboards hear about the chunk
+            swept = list(
+                File.objects.filter(id__in=ids).select_related("owner")
+                .only("id", "name", "file", "status", "uploaded_at", "owner__username")
+            )
+            previous = {f.id: f.status for f in swept}
+
+            if archive:
+                swept = [f for f in swept if f.status != "archived"]
+                with transaction.atomic():
+                    totals["files"] += File.objects.filter(id__in=[f.id for f in swept]).update(status="archived")
+                    for file_obj in swept:
+                        file_obj.status = "archived"
+                    publish_file_event("status_changed", swept, previous)
+                continue
+
+            legacy = [row[3] for row in rows if row[2] is None and row[3]]
+            with transaction.atomic():
+                publish_file_event("deleted", swept, previous)
+                with batched_release() as freed:
+                    deleted, _ = File.objects.filter(id__in=ids).delete()
+                totals["files"] += deleted
+                totals["blobs"] += freed["blobs"]
+                totals["bytes"] += freed["bytes"]
+            # Files stored before blobs have no shared references: their bytes go with the row
+            totals["bytes"] += sum(default_storage.size(name) for name in legacy if default_storage.exists(name))
+            delete_from_storage(default_storage, legacy)
+
+        if archive:
+            summary = f"Archived {totals['files']} files uploaded before {cutoff:%Y-%m-%d}"
+        else:
+            summary = (
+                f"Deleted {totals['files']} files uploaded before {cutoff:%Y-%m-%d}, "
+                f"freeing {totals['blobs']} blobs and {totals['bytes'] / 2**20:.1f} MiB"
+            )
+        if totals["files"]:
+            AuditLog.objects.create(user=None, action=f"retention sweep: {summary}")
+        self.stdout.write(summary + ".")
+
+    def plan(self, expired, verb, cutoff, batch_size, verbosity):
+        count = expired.count()
+        chunks = -(-count // batch_size)
+        self.stdout.write(f"Would {verb} {count} files uploaded before {cutoff:%Y-%m-%d} in {chunks} chunk(s) of {batch_size}.")
+        if verb == "delete":
+            # A blob is freed only when every File referencing it is expiring
+            expiring = dict(expired.filter(blob__isnull=False).values_list("blob_id").annotate(n=Count("id")))
+            freeable = [
+                blob for blob in Blob.objects.filter(id__in=expiring).only("id", "ref_count", "size")
+                if blob.ref_count <= expiring[blob.id]
+            ]
+            self.stdout.write(
+                f"Would free {len(freeable)} of {len(expiring)} referenced blobs "
+                f"({sum(b.size for b in freeable) / 2**20:.1f} MiB), plus pre-blob files."
+            )
+        if verbosity > 1:
+            for file_obj in expired.select_related("owner").order_by("uploaded_at", "id").iterator():
+                self.stdout.write(
+                    f"  {verb} #{file_obj.id} {file_obj.display_name} "
+                    f"({file_obj.owner.username}, {file_obj.uploaded_at:%Y-%m-%d}, {file_obj.status})"
+                )
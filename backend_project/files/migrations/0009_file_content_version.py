@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0008_blob_file_name_file_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
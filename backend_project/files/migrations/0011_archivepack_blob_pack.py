@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0010_alter_file_uploaded_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivePack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(max_length=7)),
+                ('file', models.FileField(max_length=255, upload_to='archive/')),
+                ('size', models.BigIntegerField()),
+                ('original_size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='pack',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='blobs', to='files.archivepack'),
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='pack_block_offset',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='pack_block_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='pack_offset',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:20
+
+import django.db.models.deletion
+import gzip
+import json
+from django.db import migrations, models
+
+BATCH_SIZE = 200
+
+
+def compress(pages):
+    raw = json.dumps(pages, separators=(",", ":")).encode()
+    return gzip.compress(raw, compresslevel=6, mtime=0), len(raw)
+
+
+def copy_out(apps, schema_editor):
+    """Move the JSON columns into the compressed side tables, a batch at a time."""
+    for owner, side, key in (("File", "FileContent", "file_id"), ("Blob", "BlobContent", "blob_id")):
+        Owner = apps.get_model("files", owner)
+        Side = apps.get_model("files", side)
+        rows = []
+        for pk, pages in Owner.objects.filter(parsed_content__isnull=False).values_list("pk", "parsed_content").iterator(BATCH_SIZE):
+            data, size = compress(pages)
+            rows.append(Side(**{key: pk, "data": data, "size": size}))
+            if len(rows) == BATCH_SIZE:
+                Side.objects.bulk_create(rows)
+                rows = []
+        Side.objects.bulk_create(rows)
+
+
+def copy_back(apps, schema_editor):
+    for owner, side, key in (("File", "FileContent", "file_id"), ("Blob", "BlobContent", "blob_id")):
+        Owner = apps.get_model("files", owner)
+        Side = apps.get_model("files", side)
+        for pk, data in Side.objects.values_list(key, "data").iterator(BATCH_SIZE):
+            Owner.objects.filter(pk=pk).update(parsed_content=json.loads(gzip.decompress(bytes(data))))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0011_archivepack_blob_pack'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobContent',
+            fields=[
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('blob', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='parsed', serialize=False, to='files.blob')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='FileContent',
+            fields=[
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='parsed', serialize=False, to='files.file')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(copy_out, copy_back),
+        migrations.RemoveField(
+            model_name='blob',
+            name='parsed_content',
+        ),
+        migrations.RemoveField(
+            model_name='file',
+            name='parsed_content',
+        ),
+    ]
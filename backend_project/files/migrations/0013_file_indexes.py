@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0012_move_parsed_content'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['owner', 'uploaded_at', 'id'], name='files_file_owner_upl_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['status', 'uploaded_at', 'id'], name='files_file_status_upl_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:44
+
+import files.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0014_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=files.models.upload_expiry),
+        ),
+    ]
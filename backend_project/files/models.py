@@ -1,22 +1,131 @@
 #files/models.py
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.postgres.fields import JSONField
+from datetime import timedelta
+import gzip
+import json
+import os
+import uuid
 
 def user_directory_path(instance, filename):
     return f"user_{instance.owner.id}/{filename}"
 
+def blob_path(instance, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return f"blobs/{instance.sha256[:2]}/{instance.sha256}{ext}"
+
+class ArchivePack(models.Model):
+    """An xz-compressed pack of cold blobs, one or more per month; see files/archive.py."""
+    month = models.CharField(max_length=7)
+    file = models.FileField(upload_to="archive/", max_length=255)
+    size = models.BigIntegerField()
+    original_size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.month} pack {self.id} ({self.original_size} -> {self.size} bytes)"
+
+class Blob(models.Model):
+    """Content-addressed file bytes, shared by every File row with the same sha256."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_path, max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Set once the bytes live only in a pack: the compressed block holding them and
+    # where they start once that block is decompressed
+    pack = models.ForeignKey(ArchivePack, on_delete=models.PROTECT, null=True, blank=True, related_name="blobs")
+    pack_block_offset = models.BigIntegerField(null=True, blank=True)
+    pack_block_size = models.BigIntegerField(null=True, blank=True)
+    pack_offset = models.BigIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
 class File(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    file = models.FileField(upload_to=user_directory_path)
-    uploaded_at = models.DateTimeField(auto_now_add=True)
+    file = models.FileField(upload_to=user_directory_path, max_length=255)
+    name = models.CharField(max_length=255, blank=True)
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name="files")
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=20, default="pending")  
 
-    parsed_content = models.JSONField(null=True, blank=True)
+    # Bumped on every content edit; cell patches must name the version they were made against
+    content_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # The file browser's keyset pages: a client's own files, or one status tab
+            models.Index(fields=["owner", "uploaded_at", "id"], name="files_file_owner_upl_id_idx"),
+            models.Index(fields=["status", "uploaded_at", "id"], name="files_file_status_upl_id_idx"),
+        ]
+
+    @property
+    def display_name(self):
+        """Original upload name; blob-backed files are stored under their hash."""
+        return self.name or os.path.basename(self.file.name)
+
+    def __str__(self):
+        return f"{self.display_name} ({self.owner.username})"
+
+class ParsedContent(models.Model):
+    """
+    Parsed pages as gzip-compressed JSON, kept in side tables so File/Blob queries
+    (listings, stats, reports) never read them. Only get_content and the edit
+    endpoints load or store them.
+    """
+    data = models.BinaryField()
+    # Uncompressed JSON size, for monitoring
+    size = models.PositiveIntegerField()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def load(cls, owner_id):
+        data = cls.objects.filter(pk=owner_id).values_list("data", flat=True).first()
+        return None if data is None else json.loads(gzip.decompress(bytes(data)))
+
+    @classmethod
+    def store(cls, owner_id, pages):
+        """Replace the pages stored for a File/Blob id; None removes them."""
+        if pages is None:
+            cls.objects.filter(pk=owner_id).delete()
+            return
+        raw = json.dumps(pages, separators=(",", ":")).encode()
+        cls.objects.update_or_create(pk=owner_id, defaults={"data": gzip.compress(raw, compresslevel=6, mtime=0), "size": len(raw)})
+
+class FileContent(ParsedContent):
+    """A File's edited content, which takes precedence over its blob's parse."""
+    file = models.OneToOneField(File, on_delete=models.CASCADE, primary_key=True, related_name="parsed")
+
+class BlobContent(ParsedContent):
+    """Parse results depend only on the bytes, so they are cached per blob for all sharing files."""
+    blob = models.OneToOneField(Blob, on_delete=models.CASCADE, primary_key=True, related_name="parsed")
+
+def upload_expiry():
+    return timezone.now() + timedelta(hours=settings.CHUNKED_UPLOAD_TTL_HOURS)
+
+class UploadSession(models.Model):
+    """A chunked upload in progress; bytes live in a part file until finalize."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, default="active")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Pushed forward by every chunk; expire_upload_sessions drops active sessions past it
+    expires_at = models.DateTimeField(default=upload_expiry, db_index=True)
 
     def __str__(self):
-        return f"{self.file.name} ({self.owner.username})"
+        return f"{self.filename} ({self.offset}/{self.size})"
 
 class AuditLog(models.Model):
     user = models.ForeignKey("accounts.User", on_delete=models.CASCADE, null=True, blank=True)
@@ -131,3 +240,35 @@ class DTREntry(models.Model):
 
     def __str__(self):
         return f"{self.employee_no} - {self.full_name}"
+
+class DataVersion(models.Model):
+    """
+    Change counter for data sets served with ETags that have no timestamp of their
+    own ("employees", "dtr-file:<id>"). Bumped by the signals in files/signals.py on
+    every save/delete of the rows behind them.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    @classmethod
+    def bump(cls, key):
+        now = timezone.now()
+        rows = cls.objects.filter(key=key)
+        if rows.update(version=models.F("version") + 1, updated_at=now):
+            return
+        _, created = cls.objects.get_or_create(key=key, defaults={"version": 1, "updated_at": now})
+        if not created:
+            # Another writer created it first; still count this change
+            rows.update(version=models.F("version") + 1, updated_at=now)
+
+    @classmethod
+    def current(cls, key):
+        """(version, updated_at); (0, None) for a key never bumped."""
+        return cls.objects.filter(key=key).values_list("version", "updated_at").first() or (0, None)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+def dtr_version_key(dtr_file_id):
+    return f"dtr-file:{dtr_file_id}"
@@ -0,0 +1,160 @@
+#files/pdfparse.py
+import logging
+import math
+import os
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from django.conf import settings
+from .dtms import is_table_header, parse_table
+from .pdftext import PDFIUM_LOCK, extract_page_texts
+
+logger = logging.getLogger(__name__)
+
+def needs_ocr(text):
+    """No text layer to speak of: a scanned page, or one drawn as a single image."""
+    return len("".join(text.split())) < settings.OCR_MIN_TEXT_CHARS
+
+def lacks_table_header(text):
+    return not needs_ocr(text) and not any(map(is_table_header, text.splitlines()))
+
+def page_data(number, text):
+    page = {"page_number": number}
+    if text:
+        page["text"] = text
+    table = parse_table(text.splitlines()) if text else None
+    if table:
+        page["tables"] = [table]
+    return page
+
+def parse_pdf(source, ocr=True, cache_key=None):
+    """
+    get_content's pages for the PDF in `source` (a seekable file), and the numbers of
+    the pages still waiting for OCR. Pages without a text layer are OCR'd here when
+    `ocr` is true (and Tesseract is installed), else left empty and reported as pending.
+    `cache_key` (the blob's sha256) lets their rendered images be reused by a later parse.
+    """
+    import pytesseract
+
+    # Pages without the summary table header are read again with pdfplumber
+    texts = extract_page_texts(source, fallback=lacks_table_header)
+    pending = [number for number, text in enumerate(texts, start=1) if needs_ocr(text)]
+    if pending and ocr:
+        source.seek(0)
+        try:
+            for number, text in zip(pending, ocr_pages(source, pending, cache_key)):
+                texts[number - 1] = text
+            pending = []
+        except pytesseract.TesseractNotFoundError:
+            logger.warning("Tesseract not found (TESSERACT_CMD=%s); %d scanned page(s) left unread", settings.TESSERACT_CMD, len(pending))
+    return [page_data(number, text) for number, text in enumerate(texts, start=1)], pending
+
+def ocr_options(cache_key):
+    # Workers are spawned, so they start without Django settings and get plain values
+    return {
+        "tesseract_cmd": settings.TESSERACT_CMD,
+        "tesseract_config": settings.OCR_TESSERACT_CONFIG,
+        "dpi": settings.OCR_DPI,
+        "min_dpi": settings.OCR_MIN_DPI,
+        "max_dpi": settings.OCR_MAX_DPI,
+        "max_pixels": settings.OCR_MAX_PIXELS,
+        "cache_dir": str(settings.OCR_IMAGE_CACHE_DIR) if cache_key else None,
+        "cache_key": cache_key,
+    }
+
+def ocr_pages(source, numbers, cache_key=None):
+    """Tesseract text of the given pages (1-based), in a process pool when there are several."""
+    options = ocr_options(cache_key)
+    # Workers open the PDF by path; delete=False so it can be reopened on Windows too
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(source, tmp)
+    try:
+        workers = min(settings.OCR_WORKERS, len(numbers))
+        # A daemonic process (a Celery prefork child) may not start children of its own
+        if workers > 1 and not multiprocessing.current_process().daemon:
+            # Spawned, not forked: a fork could copy PDFIUM_LOCK held by another request thread
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                return list(pool.map(ocr_page, repeat(tmp.name), numbers, repeat(options)))
+        return [ocr_page(tmp.name, number, options) for number in numbers]
+    finally:
+        os.unlink(tmp.name)
+        if options["cache_dir"]:
+            prune_image_cache(options["cache_dir"], settings.OCR_IMAGE_CACHE_MAX_BYTES)
+
+def ocr_page(path, number, options):
+    import pytesseract
+
+    image = page_image(path, number, options)
+    pytesseract.pytesseract.tesseract_cmd = options["tesseract_cmd"]
+    return pytesseract.image_to_string(image, config=options["tesseract_config"])
+
+def page_dpi(page, options):
+    """
+    The resolution of the scan behind the page, within [min_dpi, max_dpi]: rendering
+    finer only gives OCR more pixels to go through, coarser loses detail. Pages without
+    an image use `dpi`. Very large pages are held to `max_pixels`.
+    """
+    import pypdfium2.raw as pdfium_c
+
+    native = 0
+    for image in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]):
+        left, bottom, right, top = image.get_pos()
+        width, height = image.get_size()
+        if right - left > 1 and top - bottom > 1:
+            native = max(native, min(width / (right - left), height / (top - bottom)) * 72)
+    dpi = min(max(native or options["dpi"], options["min_dpi"]), options["max_dpi"])
+
+    page_width, page_height = page.get_size()
+    fits = 72 * math.sqrt(options["max_pixels"] / max(page_width * page_height, 1))
+    return int(min(dpi, fits))
+
+def page_image(path, number, options):
+    """Page `number` of the PDF at `path`, rendered in grayscale at its page_dpi()."""
+    import pypdfium2 as pdfium
+    from PIL import Image
+
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(path)
+        try:
+            page = pdf[number - 1]
+            dpi = page_dpi(page, options)
+            cached = None
+            if options["cache_dir"]:
+                cached = os.path.join(options["cache_dir"], f"{options['cache_key']}-{number}-{dpi}.png")
+                if os.path.exists(cached):
+                    # Touched on use, so pruning drops the least recently used first
+                    os.utime(cached)
+                    image = Image.open(cached)
+                    image.load()
+                    return image
+            image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+
+    if cached:
+        os.makedirs(options["cache_dir"], exist_ok=True)
+        # Written under a temporary name so a concurrent reader never sees half a file
+        partial = f"{cached}.{os.getpid()}.part"
+        image.save(partial, format="PNG")
+        os.replace(partial, cached)
+    return image
+
+def prune_image_cache(cache_dir, max_bytes):
+    """Delete the least recently used page images until the cache fits in max_bytes."""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".png")]
+    except FileNotFoundError:
+        return
+    stats = sorted(((entry.stat(), entry.path) for entry in entries), key=lambda item: item[0].st_mtime)
+    total = sum(stat.st_size for stat, _ in stats)
+    for stat, path in stats:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= stat.st_size
@@ -0,0 +1,96 @@
+#files/pdftext.py
+import threading
+from django.conf import settings
+
+# pdfium is not thread-safe: one document at a time per process
+PDFIUM_LOCK = threading.Lock()
+
+def pdfium_page_text(page):
+    """
+    A page's text in reading order, lines top to bottom and words left to right,
+    like pdfplumber's extract_text(). pdfium hands characters back in content-stream
+    order, which for generated reports often puts a row's name after its numbers,
+    so words are rebuilt from the character boxes and laid out again.
+    """
+    import pypdfium2.raw as pdfium_c
+
+    textpage = page.get_textpage()
+    handle = textpage.raw
+    box = pdfium_c.FS_RECTF()
+    words = []
+    word = None
+    try:
+        count = pdfium_c.FPDFText_CountChars(handle)
+        text = textpage.get_text_range(0, count, force_this=True)
+        if len(text) != count:
+            # Characters outside the BMP take two UTF-16 units; index them one by one instead
+            text = [chr(pdfium_c.FPDFText_GetUnicode(handle, i)) for i in range(count)]
+        for i, char in enumerate(text):
+            # Loose boxes span the font's ascent/descent, so "." and "," sit on the same line as digits
+            if char.isspace() or not pdfium_c.FPDFText_GetLooseCharBox(handle, i, box):
+                word = None
+                continue
+            height = max(box.top - box.bottom, 1.0)
+            middle = (box.top + box.bottom) / 2
+            if word and abs(middle - word["middle"]) < height / 2 and -0.2 * height <= box.left - word["right"] <= 0.25 * height:
+                word["chars"].append(char)
+                word["right"] = box.right
+            else:
+                word = {"left": box.left, "right": box.right, "middle": middle, "height": height, "chars": [char]}
+                words.append(word)
+    finally:
+        textpage.close()
+
+    lines = []
+    for word in sorted(words, key=lambda w: -w["middle"]):
+        if lines and abs(lines[-1][0] - word["middle"]) < word["height"] / 2:
+            lines[-1][1].append(word)
+        else:
+            lines.append((word["middle"], [word]))
+    return "\n".join(
+        " ".join("".join(w["chars"]) for w in sorted(line, key=lambda w: w["left"]))
+        for _, line in lines
+    )
+
+def pdfium_texts(source):
+    import pypdfium2 as pdfium
+
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            texts = []
+            for page in pdf:
+                texts.append(pdfium_page_text(page))
+                page.close()
+            return texts
+        finally:
+            pdf.close()
+
+def pdfplumber_texts(source, page_numbers=None):
+    import pdfplumber
+
+    with pdfplumber.open(source, pages=page_numbers) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+PDF_TEXT_BACKENDS = {
+    "pdfium": pdfium_texts,
+    "pdfplumber": pdfplumber_texts,
+}
+
+def extract_page_texts(source, fallback=None):
+    """
+    The text of every page of the PDF in `source` (a seekable file), one string per
+    page, read with settings.PDF_TEXT_BACKEND. Pages for which `fallback(text)` is
+    true are read again with pdfplumber, whose layout analysis is slower but is what
+    the table parsers were written against.
+    """
+    texts = PDF_TEXT_BACKENDS[settings.PDF_TEXT_BACKEND](source)
+    if fallback is None or settings.PDF_TEXT_BACKEND == "pdfplumber":
+        return texts
+
+    retry = [i for i, text in enumerate(texts, start=1) if fallback(text)]
+    if retry:
+        source.seek(0)
+        for page_number, text in zip(retry, pdfplumber_texts(source, retry)):
+            texts[page_number - 1] = text
+    return texts
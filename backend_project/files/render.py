@@ -0,0 +1,334 @@
+#files/render.py
+import struct
+import zlib
+from functools import lru_cache
+from io import BytesIO
+from reportlab.pdfbase.pdfdoc import PDFStream, PDFZCompress
+from reportlab.pdfgen import canvas
+
+class NothingToRender(ValueError):
+    pass
+
+def format_numeric(val):
+    if val is None or val == "":
+        return "0.00"
+    try:
+        num = float(val)
+        return f"{num:.2f}"
+    except (ValueError, TypeError):
+        return str(val)
+
+def rows_from_pages(pages):
+    """Flatten edited pages into plain rows: table rows padded to the sub-header width, or page content."""
+    content = []
+    for page in pages:
+        if page.get("tables"):
+            for table in page["tables"]:
+                rows = table.get("rows", [])
+                sub_headers = table.get("sub_headers") or []
+                expected_cols = sum(len(group) if isinstance(group, list) else 1 for group in sub_headers)
+
+                for row in rows:
+                    normalized = []
+                    for c in range(expected_cols):
+                        if c < len(row):
+                            val = row[c]
+                            try:
+                                normalized.append(float(val))
+                            except (ValueError, TypeError):
+                                normalized.append(str(val or "0.00"))
+                        else:
+                            normalized.append("0.00")
+                    content.append(normalized)
+        elif page.get("content"):
+            content.extend(page["content"])
+    return content
+
+PAGE_TOP, PAGE_BOTTOM, PAGE_MARGIN = 750, 50, 50
+ROW_HEIGHT = 20
+CELL_PADDING = 20
+TABLE_FONT, TABLE_BOLD_FONT, TABLE_FONT_SIZE = "Helvetica", "Helvetica-Bold", 8
+# Leading single-column groups (Emp. No, Name) repeated on every page of a table too wide for one
+MAX_FROZEN_GROUPS = 2
+
+@lru_cache(maxsize=16384)
+def text_width(text, font, size):
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(text, font, size)
+
+@lru_cache(maxsize=16384)
+def pdf_string(text):
+    """Escape text for a Tj operator in the standard fonts' WinAnsi encoding."""
+    from reportlab.lib.rl_accel import escapePDF
+    return escapePDF(text.encode("cp1252", "replace").decode("latin-1"))
+
+class TableLayout:
+    """Cell text, column widths, header spans and column bands of one table, worked out once before drawing."""
+
+    def __init__(self, table, max_width):
+        main_headers = table.get("main_headers") or []
+        groups = [list(g) if isinstance(g, list) else [g] for g in (table.get("sub_headers") or [])]
+        rows = table.get("rows") or []
+
+        num_cols = max([sum(len(g) for g in groups)] + [len(row) for row in rows])
+        # Columns past the sub headers (or every column, without sub headers) get a group of their own
+        while sum(len(g) for g in groups) < num_cols:
+            groups.append([""])
+        self.sub_labels = [label for g in groups for label in g]
+        self.cells = [[format_numeric(row[j]) if j < len(row) else "0.00" for j in range(num_cols)] for row in rows]
+
+        self.col_widths = []
+        for j in range(num_cols):
+            widest = max((text_width(text, TABLE_FONT, TABLE_FONT_SIZE) for text in {row[j] for row in self.cells}), default=0)
+            label = text_width(str(self.sub_labels[j]), TABLE_BOLD_FONT, TABLE_FONT_SIZE)
+            self.col_widths.append(max(widest, label) + CELL_PADDING)
+
+        # (title, first column, column count) per main header; widen a group whose title does not fit
+        self.groups = []
+        col = 0
+        for k, group in enumerate(groups):
+            title = str(main_headers[k]) if k < len(main_headers) else ""
+            span = range(col, col + len(group))
+            extra = text_width(title, TABLE_BOLD_FONT, TABLE_FONT_SIZE) + CELL_PADDING - sum(self.col_widths[c] for c in span)
+            if extra > 0:
+                for c in span:
+                    self.col_widths[c] += extra / len(group)
+            self.groups.append((title, col, len(group)))
+            col += len(group)
+
+        self.bands = self.split_bands(max_width)
+
+    def group_width(self, group):
+        _, first, count = group
+        return sum(self.col_widths[first:first + count])
+
+    def split_bands(self, max_width):
+        """Pack whole header groups into page-wide bands, each repeating the frozen leading groups."""
+        if sum(self.col_widths) <= max_width:
+            return [self.groups]
+
+        frozen = []
+        for group in self.groups[:MAX_FROZEN_GROUPS]:
+            if group[2] != 1:
+                break
+            frozen.append(group)
+        frozen_width = sum(self.group_width(g) for g in frozen)
+
+        bands, band, width = [], list(frozen), frozen_width
+        for group in self.groups[len(frozen):]:
+            if band[len(frozen):] and width + self.group_width(group) > max_width:
+                bands.append(band)
+                band, width = list(frozen), frozen_width
+            band.append(group)
+            width += self.group_width(group)
+        bands.append(band)
+        return bands
+
+def grid_path(xs, ys):
+    """Stroke the lines of a grid as one path (canvas.grid formats every coordinate through fp_str)."""
+    lines = [f"{x:.2f} {ys[0]:.2f} m {x:.2f} {ys[-1]:.2f} l" for x in xs]
+    lines += [f"{xs[0]:.2f} {y:.2f} m {xs[-1]:.2f} {y:.2f} l" for y in ys]
+    return "\n".join(lines) + " S"
+
+def draw_table_section(p, layout, band, row_start, row_end, top):
+    """Draw header rows plus rows [row_start, row_end) of one column band; returns the y below it."""
+    from reportlab.lib.colors import lightgrey, black
+
+    columns = [c for _, first, count in band for c in range(first, first + count)]
+    xs = [PAGE_MARGIN]
+    for c in columns:
+        xs.append(xs[-1] + layout.col_widths[c])
+
+    # Main headers: shaded spans
+    p.setFont(TABLE_BOLD_FONT, TABLE_FONT_SIZE)
+    spans, x = [], PAGE_MARGIN
+    for group in band:
+        width = layout.group_width(group)
+        spans.append((group[0], x, width))
+        x += width
+    p.setFillColor(lightgrey)
+    for _, x, width in spans:
+        p.rect(x, top - ROW_HEIGHT, width, ROW_HEIGHT, fill=1, stroke=1)
+    p.setFillColor(black)
+    for title, x, width in spans:
+        p.drawCentredString(x + width / 2, top - ROW_HEIGHT + 7, title)
+
+    # Sub headers and body share one grid of lines
+    sub_top = top - ROW_HEIGHT
+    body_rows = row_end - row_start
+    ys = [sub_top - i * ROW_HEIGHT for i in range(body_rows + 2)]
+    p.addLiteral(grid_path(xs, ys))
+    for c, x in zip(columns, xs):
+        label = str(layout.sub_labels[c])
+        if label:
+            p.drawCentredString(x + layout.col_widths[c] / 2, sub_top - ROW_HEIGHT + 7, label)
+
+    # Body text as one literal BT block: a text object would re-measure and re-encode every cell
+    p.setFont(TABLE_FONT, TABLE_FONT_SIZE)
+    ops = ["BT"]
+    lefts = [(c, f"1 0 0 1 {x + 2:.2f}") for c, x in zip(columns, xs)]
+    baseline = sub_top - 2 * ROW_HEIGHT + 7
+    for row in layout.cells[row_start:row_end]:
+        y = f" {baseline:.2f} Tm ("
+        ops.extend(f"{left}{y}{pdf_string(row[c])}) Tj" for c, left in lefts)
+        baseline -= ROW_HEIGHT
+    ops.append("ET")
+    p.addLiteral("\n".join(ops))
+
+    return sub_top - (body_rows + 1) * ROW_HEIGHT
+
+def draw_table(p, table, top, page_width):
+    """
+    Draw a table from `top` down, one page per row chunk and column band, with the
+    header rows repeated on each; returns the y below what was drawn last.
+    """
+    layout = TableLayout(table, page_width - 2 * PAGE_MARGIN)
+    row_start, total = 0, len(layout.cells)
+    while True:
+        capacity = max(1, int((top - PAGE_BOTTOM) / ROW_HEIGHT) - 2)
+        row_end = min(total, row_start + capacity)
+        for b, band in enumerate(layout.bands):
+            if b:
+                p.showPage()
+            bottom = draw_table_section(p, layout, band, row_start, row_end, top if b == 0 else PAGE_TOP)
+        row_start = row_end
+        if row_start >= total:
+            return bottom
+        p.showPage()
+        top = PAGE_TOP
+
+class BinaryStreamCanvas(canvas.Canvas):
+    """
+    Canvas whose page streams are only zlib-compressed: ASCII85 only matters for 7-bit
+    transports and costs more than the drawing. rl_config.useA85 would do the same for
+    every canvas in the process, so the streams are set up per page instead.
+    """
+
+    def showPage(self):
+        pages = self._doc.Pages.pages
+        added = len(pages)
+        super().showPage()
+        for page in pages[added:]:
+            if page.compression and not page.Contents:
+                page.Contents = PDFStream(content=page.stream, filters=[PDFZCompress])
+                page.Contents.__Comment__ = "page stream"
+
+def render_pdf(pages):
+    """Draw pages (text lines and DTMS tables) into a new PDF; returns its bytes."""
+    from reportlab.lib.pagesizes import letter
+
+    buffer = BytesIO()
+    p = BinaryStreamCanvas(buffer, pagesize=letter)
+    page_width = letter[0]
+
+    for page in pages:
+        y_offset = PAGE_TOP
+        page_has_content = False
+
+        if "text" in page and page["text"]:
+            p.setFont("Helvetica", 10)
+            for line in page["text"].splitlines():
+                p.drawString(50, y_offset, line)
+                y_offset -= 15
+                page_has_content = True
+                if y_offset < 50:
+                    p.showPage()
+                    y_offset = PAGE_TOP
+            p.showPage()
+            y_offset = PAGE_TOP
+
+        if "tables" in page and page["tables"]:
+            for table in page["tables"]:
+                if y_offset - PAGE_BOTTOM < 3 * ROW_HEIGHT:
+                    p.showPage()
+                    y_offset = PAGE_TOP
+                y_offset = draw_table(p, table, y_offset, page_width)
+                page_has_content = True
+            p.showPage()
+
+        if not page_has_content:
+            p.setFont("Helvetica", 10)
+            p.drawString(50, 750, "No content available")
+            p.showPage()
+
+    p.save()
+    return buffer.getvalue()
+
+IMAGE_FONT_SCALE, IMAGE_FONT_THICKNESS = 0.7, 1
+IMAGE_CELL_PADDING_X, IMAGE_CELL_PADDING_Y = 20, 16
+# Rows are drawn and PNG-compressed in bands of at most this many pixels, so memory stays flat for huge grids
+IMAGE_TILE_PIXELS = 4 * 1024 * 1024
+IMAGE_PNG_COMPRESSION = 3
+
+@lru_cache(maxsize=16384)
+def image_text_size(text):
+    """(width, height above baseline, depth below baseline) of `text` in the grid font."""
+    import cv2
+    (width, height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, IMAGE_FONT_SCALE, IMAGE_FONT_THICKNESS)
+    return width, height, baseline
+
+def png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+def render_image(rows):
+    """
+    Draw rows as a grid into a grayscale PNG; returns its bytes. Columns are sized
+    to their widest text, grid lines are slice assignments, and the image is built
+    and compressed one band of rows at a time instead of as one array.
+    """
+    import cv2
+    import numpy as np
+
+    cells = [[str(cell) for cell in row] for row in rows]
+    n_rows = len(cells)
+    n_cols = max(len(r) for r in cells) if cells else 0
+    if n_rows == 0 or n_cols == 0:
+        raise NothingToRender("No content to update")
+
+    col_widths = [0] * n_cols
+    text_height = depth = 0
+    for row in cells:
+        for j, text in enumerate(row):
+            width, height, below = image_text_size(text)
+            if width > col_widths[j]:
+                col_widths[j] = width
+            text_height, depth = max(text_height, height), max(depth, below)
+    col_widths = [w + IMAGE_CELL_PADDING_X for w in col_widths]
+    cell_height = text_height + depth + IMAGE_CELL_PADDING_Y
+
+    col_edges = np.concatenate(([0], np.cumsum(col_widths)))
+    img_width = int(col_edges[-1]) + 1
+    img_height = n_rows * cell_height + 1
+    tile_rows = max(1, IMAGE_TILE_PIXELS // (img_width * cell_height))
+
+    out = BytesIO()
+    out.write(b"\x89PNG\r\n\x1a\n")
+    out.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", img_width, img_height, 8, 0, 0, 0, 0)))
+    compressor = zlib.compressobj(IMAGE_PNG_COMPRESSION)
+
+    for start in range(0, n_rows, tile_rows):
+        band = cells[start:start + tile_rows]
+        last = start + len(band) == n_rows
+        height = len(band) * cell_height + (1 if last else 0)
+        # Column 0 is the PNG filter byte (0 = none) of each scanline
+        tile = np.full((height, img_width + 1), 255, dtype=np.uint8)
+        tile[:, 0] = 0
+        canvas = tile[:, 1:]
+        canvas[::cell_height, :] = 0
+        canvas[:, col_edges] = 0
+
+        for i, row in enumerate(band):
+            baseline = i * cell_height + (cell_height + text_height - depth) // 2
+            for j, text in enumerate(row):
+                if text:
+                    width = image_text_size(text)[0]
+                    x = int(col_edges[j]) + (col_widths[j] - width) // 2
+                    cv2.putText(canvas, text, (x, baseline), cv2.FONT_HERSHEY_SIMPLEX, IMAGE_FONT_SCALE, 0, IMAGE_FONT_THICKNESS)
+
+        data = compressor.compress(tile.tobytes())
+        if data:
+            out.write(png_chunk(b"IDAT", data))
+
+    out.write(png_chunk(b"IDAT", compressor.flush()))
+    out.write(png_chunk(b"IEND", b""))
+    return out.getvalue()
@@ -0,0 +1,158 @@
+#files/renderers.py
+import re
+from functools import lru_cache
+import msgpack
+import orjson
+from django.utils.http import parse_header_parameters
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Columnar layout (?format=columnar, or "application/msgpack; layout=columnar").
+# Anywhere in the payload, a list of two or more rows is replaced by one object:
+#   list of lists          -> {"$table": {"rows": n, "columns": [...], "types": [...]}}
+#   list of same-key dicts -> {"$records": {"rows": n, "fields": [...], "columns": [...], "types": [...]}}
+# columns[j] holds the j-th cell of every row that has one. A table whose first row
+# reads as a header over numeric columns sends it apart as "header"; ragged tables
+# add "lengths" (row widths). A records column whose values are themselves same-key
+# dicts (DTR daily_data) is laid out as a nested "$records".
+# types[j] is "fixed:<d>" when every non-null cell was a decimal string with d places:
+# those cells are sent as integers scaled by 10**d ("12.50" -> 1250). Otherwise "str"
+# or "any", and values are sent unchanged.
+# Bounded so a scaled cell stays below 2**53 and decodes exactly in JavaScript. A signed
+# zero ("-0.00") would scale to 0 and come back unsigned, so it keeps its column "str".
+NUMBER = r"(?!-0(?:\.0+)?(?:\n|\Z))-?(?:0|[1-9]\d{0,11})"
+DECIMAL_RE = re.compile(rf"{NUMBER}(?:\.(\d{{1,3}}))?")
+
+@lru_cache(maxsize=None)
+def fixed_column_re(places):
+    """All cells of a column, newline-joined, with exactly `places` decimals each."""
+    cell = NUMBER + (rf"\.\d{{{places}}}" if places else "")
+    return re.compile(rf"(?:{cell}\n)*+{cell}")
+
+def typed_column(values):
+    """(type, cells as sent) for one column; see the layout notes above."""
+    present = values
+    try:
+        joined = "\n".join(present)
+    except TypeError:
+        # Nulls are allowed in a typed column; anything else that is not text is not
+        present = [value for value in values if value is not None]
+        try:
+            joined = "\n".join(present)
+        except TypeError:
+            return "any", values
+    if not present:
+        return "any", values
+    match = DECIMAL_RE.fullmatch(present[0])
+    # One C-level match over the whole column instead of one per cell
+    if match is None or joined.count("\n") != len(present) - 1:
+        return "str", values
+    places = len(match.group(1) or "")
+    if fixed_column_re(places).fullmatch(joined) is None:
+        return "str", values
+    scaled = map(int, (joined.replace(".", "") if places else joined).split("\n"))
+    if present is values:
+        return f"fixed:{places}", list(scaled)
+    return f"fixed:{places}", [None if value is None else next(scaled) for value in values]
+
+def has_header(rows):
+    """First row all text, above a column whose cells are numbers."""
+    first, second = rows[0], rows[1]
+    if not all(isinstance(cell, str) for cell in first):
+        return False
+    return any(
+        isinstance(below, str) and DECIMAL_RE.fullmatch(below) and not DECIMAL_RE.fullmatch(above)
+        for above, below in zip(first, second)
+    )
+
+def columnar(data):
+    if isinstance(data, dict):
+        return {key: columnar(value) for key, value in data.items()}
+    if not isinstance(data, (list, tuple)):
+        return data
+    if len(data) > 1 and all(isinstance(row, (list, tuple)) for row in data):
+        return {"$table": table_layout(data)}
+    if len(data) > 1 and all(isinstance(row, dict) for row in data) and len({tuple(row) for row in data}) == 1:
+        return {"$records": records_layout(data)}
+    return [columnar(item) for item in data]
+
+def table_layout(rows):
+    header = None
+    if len(rows) > 2 and has_header(rows):
+        header, rows = list(rows[0]), rows[1:]
+    lengths = [len(row) for row in rows]
+    columns, types = [], []
+    if len(set(lengths)) == 1:
+        cells = [list(column) for column in zip(*rows)]
+    else:
+        cells = [[row[j] for row in rows if len(row) > j] for j in range(max(lengths))]
+    for column_cells in cells:
+        kind, column = typed_column(column_cells)
+        columns.append(column)
+        types.append(kind)
+    layout = {"rows": len(rows), "columns": columns, "types": types}
+    if header is not None:
+        layout["header"] = header
+    if len(set(lengths)) > 1:
+        layout["lengths"] = lengths
+    return layout
+
+def records_layout(rows):
+    fields = list(rows[0])
+    columns, types = [], []
+    for field in fields:
+        values = [row[field] for row in rows]
+        if all(isinstance(value, dict) for value in values) and len({tuple(value) for value in values}) == 1:
+            columns.append({"$records": records_layout(values)})
+            types.append("records")
+            continue
+        kind, column = typed_column([columnar(value) for value in values])
+        columns.append(column)
+        types.append(kind)
+    return {"rows": len(rows), "fields": fields, "columns": columns, "types": types}
+
+def media_params(accepted_media_type):
+    return parse_header_parameters(accepted_media_type)[1] if accepted_media_type else {}
+
+# Whatever DRF's JSONEncoder turns into plain data (Decimal, lazy strings, dates for msgpack, ...)
+default = JSONEncoder().default
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in JSONRenderer on orjson; `indent` in the Accept header pretty-prints.
+    Dates and times still go through DRF's encoder ("Z" for UTC). Unlike JSONRenderer,
+    NaN and infinities are written as null instead of raising.
+    """
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if media_params(accepted_media_type).get("indent") or (renderer_context or {}).get("indent"):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=default, option=options)
+
+class ColumnarJSONRenderer(ORJSONRenderer):
+    """Tables sent column by column: each header and field name once per table."""
+    media_type = "application/vnd.ptc.columnar+json"
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(columnar(data), accepted_media_type, renderer_context)
+
+class MessagePackRenderer(BaseRenderer):
+    """msgpack; "application/msgpack; layout=columnar" sends the columnar layout."""
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if media_params(accepted_media_type).get("layout") == "columnar":
+            data = columnar(data)
+        return msgpack.packb(data, default=default, use_bin_type=True)
@@ -1,19 +1,26 @@
 # files/serializers.py
 from rest_framework import serializers
-from .models import File, AuditLog, SystemSettings, EmployeeDirectory, DTRFile, DTREntry
+from .models import File, AuditLog, SystemSettings, EmployeeDirectory, DTRFile, DTREntry, UploadSession
 
 class FileSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source="owner.username")
+    name = serializers.ReadOnlyField(source="display_name")
 
     class Meta:
         model = File
-        fields = ["id", "owner", "file", "uploaded_at", "updated_at", "status"]
+        fields = ["id", "owner", "file", "name", "uploaded_at", "updated_at", "status"]
 
 class FileStatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = File
         fields = ["status"]
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ["id", "filename", "size", "offset", "sha256", "status", "created_at", "updated_at"]
+        read_only_fields = fields
+
 class AuditLogSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source="user.username", read_only=True)
     role = serializers.ReadOnlyField(source="user.role", read_only=True) 
@@ -0,0 +1,70 @@
+#files/signals.py
+import threading
+from contextlib import contextmanager
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .blobs import release_blob
+from .models import DataVersion, DTREntry, DTRFile, EmployeeDirectory, File, dtr_version_key
+
+_versions = threading.local()
+
+@receiver(post_delete, sender=File)
+def release_file_blob(sender, instance, **kwargs):
+    # Bulk/cascade deletes included: the blob goes once no File points at it
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+def bump_version(key):
+    pending = getattr(_versions, "pending", None)
+    if pending is not None:
+        pending.add(key)
+        return
+    DataVersion.bump(key)
+
+@contextmanager
+def batched_version_bumps():
+    """
+    Collect the DataVersion bumps made inside the block (e.g. one per row of an
+    import) and apply each key once when it exits, failed or not, since rows
+    saved before a failure stay saved. Also usable as a view decorator.
+    """
+    if getattr(_versions, "pending", None) is not None:
+        yield
+        return
+    _versions.pending = set()
+    try:
+        yield
+    finally:
+        pending, _versions.pending = _versions.pending, None
+        for key in pending:
+            DataVersion.bump(key)
+
+# Every write path (views, admin, shell, scripts) moves the ETags of list_employees and DTRFileViewSet.content
+
+@receiver(post_save, sender=EmployeeDirectory)
+@receiver(post_delete, sender=EmployeeDirectory)
+def bump_employees_version(sender, **kwargs):
+    bump_version("employees")
+
+@receiver(pre_save, sender=DTREntry)
+def bump_moved_entry_source(sender, instance, **kwargs):
+    # An entry moved to another DTR file also changes the file it left
+    if instance.pk is None:
+        return
+    previous = DTREntry.objects.filter(pk=instance.pk).values_list("dtr_file_id", flat=True).first()
+    if previous is not None and previous != instance.dtr_file_id:
+        bump_version(dtr_version_key(previous))
+
+@receiver(post_save, sender=DTREntry)
+@receiver(post_delete, sender=DTREntry)
+def bump_dtr_entry_version(sender, instance, **kwargs):
+    bump_version(dtr_version_key(instance.dtr_file_id))
+
+@receiver(post_save, sender=DTRFile)
+def bump_dtr_file_version(sender, instance, **kwargs):
+    bump_version(dtr_version_key(instance.id))
+
+@receiver(post_delete, sender=DTRFile)
+def drop_dtr_file_version(sender, instance, **kwargs):
+    # Cascaded entry deletes bump first; the counter goes with its file
+    DataVersion.objects.filter(key=dtr_version_key(instance.id)).delete()
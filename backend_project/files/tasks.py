@@ -0,0 +1,76 @@
+# files/tasks.py
+from celery import shared_task
+from django.core.management import call_command
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from .archive import open_content
+from .blobs import replace_file_content
+from .events import publish_file_event
+from .models import Blob, BlobContent, File, FileContent
+from .pdfparse import parse_pdf
+from .render import render_pdf, render_image, rows_from_pages
+
+# A blob's parse is queued at most once per this many seconds (upload, then readers polling)
+PARSE_QUEUE_TTL = 600
+
+@shared_task
+def rerender_file_content(file_id, version):
+    """Regenerate a PDF/image from its edited parsed content, unless a newer edit superseded this one."""
+    file_obj = File.objects.filter(pk=file_id).first()
+    if file_obj is None or file_obj.content_version != version:
+        return
+
+    pages = FileContent.load(file_id)
+    if file_obj.display_name.lower().endswith(".pdf"):
+        data = render_pdf(pages)
+    else:
+        data = render_image(rows_from_pages(pages))
+
+    with transaction.atomic():
+        file_obj = File.objects.select_for_update().get(pk=file_id)
+        if file_obj.content_version == version:
+            replace_file_content(file_obj, ContentFile(data))
+
+def queue_pdf_parse(file_obj):
+    """Have a worker parse an uploaded PDF, OCR included, once the upload commits."""
+    if not settings.PARSE_IN_BACKGROUND or not file_obj.blob_id or not file_obj.display_name.lower().endswith(".pdf"):
+        return
+    if cache.add(f"parse-pdf:{file_obj.blob_id}", 1, PARSE_QUEUE_TTL):
+        transaction.on_commit(lambda: parse_pdf_content.delay(file_obj.id))
+
+@shared_task
+def parse_pdf_content(file_id):
+    """Parse a PDF into its blob's cached pages, OCR'ing the pages that have no text layer."""
+    file_obj = File.objects.select_related("blob").filter(pk=file_id).first()
+    if file_obj is None or file_obj.blob is None or BlobContent.objects.filter(pk=file_obj.blob_id).exists():
+        return
+
+    with open_content(file_obj) as source:
+        pages, pending = parse_pdf(source, cache_key=file_obj.blob.sha256)
+    if pending:
+        # No OCR on this worker: leave the blob unparsed rather than cache pages without their text
+        return
+
+    with transaction.atomic():
+        # The file may have been deleted or re-uploaded while OCR ran
+        if not Blob.objects.select_for_update().filter(pk=file_obj.blob_id).exists():
+            return
+        BlobContent.store(file_obj.blob_id, pages)
+        # Viewers still showing the text-only pages reload the content
+        publish_file_event("updated", File.objects.select_related("owner").filter(blob_id=file_obj.blob_id))
+    cache.delete(f"parse-pdf:{file_obj.blob_id}")
+
+@shared_task
+def sweep_expired_files_task():
+    if settings.FILE_RETENTION_SWEEP:
+        call_command("sweep_expired_files")
+
+@shared_task
+def expire_upload_sessions_task():
+    call_command("expire_upload_sessions")
+
+@shared_task
+def pack_archived_files_task():
+    call_command("pack_archived_files")
@@ -1,3 +1,391 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models.signals import post_delete, post_save
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from reportlab import rl_config
+from rest_framework.test import APITestCase
+from accounts.models import SMSOutbox, User
+from .models import AuditLog, Blob, DataVersion, DTREntry, EmployeeDirectory, File, SystemSettings, UploadSession
+from .downloads import parse_range
+from .dtms import COLUMNS, parse_table
+from .render import TableLayout, render_pdf, rows_from_pages
+from .renderers import ORJSONRenderer, typed_column
+from .signals import batched_version_bumps
+from .tasks import sweep_expired_files_task
+from .uploads import part_path
+from .views import BULK_STATUS_MAX_IDS
+from .writers import patch_csv
 
-# Create your tests here.
+class PatchCsvTests(SimpleTestCase):
+    def patch(self, data, edited_rows):
+        return patch_csv(io.BytesIO(data), edited_rows).read()
+
+    def test_edited_row_keeps_lf_line_endings(self):
+        out = self.patch(b"a,b\n1,2\n3,4\n", {1: ["1", "20"]})
+        self.assertEqual(out, b"a,b\n1,20\n3,4\n")
+        self.assertNotIn(b"\r", out)
+
+    def test_edited_row_keeps_crlf_line_endings(self):
+        out = self.patch(b"a,b\r\n1,2\r\n", {1: ["1", "20"]})
+        self.assertEqual(out, b"a,b\r\n1,20\r\n")
+
+    def test_last_row_without_newline_stays_without(self):
+        out = self.patch(b"a,b\n1,2", {1: ["1", "20"]})
+        self.assertEqual(out, b"a,b\n1,20")
+
+class RendererTests(SimpleTestCase):
+    def test_datetimes_render_as_drf_does(self):
+        data = {"day": datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc), "date": datetime(2026, 1, 2).date()}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_decimal_column_is_scaled(self):
+        self.assertEqual(typed_column(["1.25", "-0.50", None]), ("fixed:2", [125, -50, None]))
+
+    def test_negative_zero_keeps_column_as_text(self):
+        self.assertEqual(typed_column(["1.00", "-0.00"]), ("str", ["1.00", "-0.00"]))
+        self.assertEqual(typed_column(["-0", "3"]), ("str", ["-0", "3"]))
+
+class DtmsTableRenderTests(SimpleTestCase):
+    """parse_table output goes to the renderers as is, without a JSON round trip."""
+
+    def setUp(self):
+        lines = ["Emp. No Name DUTY Late UT", "00123 DELA CRUZ JUAN 10 0 0.5 " + " ".join(["8"] * 30)]
+        self.table = parse_table(lines)
+
+    def test_layout_spans_header_groups(self):
+        layout = TableLayout(self.table, max_width=10_000)
+        self.assertEqual(layout.sub_labels[2:7], ["WRK", "ABS", "LV", "HOL", "RES"])
+        self.assertEqual([span for _, _, span in layout.groups[:3]], [1, 1, 5])
+
+    def test_rows_from_pages_keeps_every_column(self):
+        rows = rows_from_pages([{"page_number": 1, "tables": [self.table]}])
+        self.assertEqual(len(rows[0]), COLUMNS)
+
+    def test_render_pdf(self):
+        self.assertTrue(render_pdf([{"page_number": 1, "tables": [self.table]}]).startswith(b"%PDF"))
+
+class RenderPdfTests(SimpleTestCase):
+    def test_page_streams_skip_ascii85_without_changing_reportlab_defaults(self):
+        data = render_pdf([{"page_number": 1, "text": "hello"}])
+        self.assertIn(b"/FlateDecode", data)
+        self.assertNotIn(b"/ASCII85Decode", data)
+        self.assertTrue(rl_config.useA85)
+
+@mock.patch.object(DataVersion, "bump")
+class DataVersionSignalTests(SimpleTestCase):
+    def test_employee_writes_bump_employees(self, bump):
+        post_save.send(EmployeeDirectory, instance=EmployeeDirectory(), created=True)
+        post_delete.send(EmployeeDirectory, instance=EmployeeDirectory())
+        self.assertEqual(bump.call_args_list, [mock.call("employees")] * 2)
+
+    def test_entry_writes_bump_their_dtr_file(self, bump):
+        post_save.send(DTREntry, instance=DTREntry(dtr_file_id=7), created=True)
+        bump.assert_called_once_with("dtr-file:7")
+
+    def test_batched_bumps_apply_each_key_once(self, bump):
+        with batched_version_bumps():
+            for _ in range(3):
+                post_save.send(EmployeeDirectory, instance=EmployeeDirectory(), created=True)
+            bump.assert_not_called()
+        bump.assert_called_once_with("employees")
+
+    def test_batched_bumps_apply_after_a_failure(self, bump):
+        with self.assertRaises(ValueError), batched_version_bumps():
+            post_save.send(EmployeeDirectory, instance=EmployeeDirectory(), created=True)
+            raise ValueError
+        bump.assert_called_once_with("employees")
+
+class UploadTestCase(APITestCase):
+    """Uploads as a client into a throwaway MEDIA_ROOT."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=media, CHUNKED_UPLOAD_DIR=f"{media}/parts")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        SystemSettings.objects.create(allowed_types=["csv"])
+        self.user = User.objects.create_user("client", password="x", role="client")
+        self.client.force_authenticate(self.user)
+
+    def upload(self, data, name="hours.csv"):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/files/", {"file": SimpleUploadedFile(name, data)}, format="multipart")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+class BlobUploadTests(UploadTestCase):
+    def test_reupload_same_name_different_bytes(self):
+        self.upload(b"a,b\n1,2\n")
+        old_blob = File.objects.get().blob
+
+        self.upload(b"a,b\n3,4\n")
+
+        file_obj = File.objects.get()
+        self.assertNotEqual(file_obj.blob_id, old_blob.pk)
+        self.assertFalse(Blob.objects.filter(pk=old_blob.pk).exists())
+        self.assertFalse(old_blob.file.storage.exists(old_blob.file.name))
+        self.assertEqual(file_obj.blob.ref_count, 1)
+        with file_obj.file.open("rb") as f:
+            self.assertEqual(f.read(), b"a,b\n3,4\n")
+
+    def test_reupload_same_name_same_bytes_keeps_blob(self):
+        self.upload(b"a,b\n1,2\n")
+        self.upload(b"a,b\n1,2\n")
+
+        blob = Blob.objects.get()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+    def test_identical_uploads_share_a_blob(self):
+        self.upload(b"a,b\n1,2\n", name="one.csv")
+        self.upload(b"a,b\n1,2\n", name="two.csv")
+
+        self.assertEqual(File.objects.count(), 2)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+    def test_deleting_one_sharer_keeps_the_blob(self):
+        self.upload(b"a,b\n1,2\n", name="one.csv")
+        self.upload(b"a,b\n1,2\n", name="two.csv")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            File.objects.get(name="one.csv").delete()
+        blob = Blob.objects.get()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            File.objects.get(name="two.csv").delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(blob.file.storage.exists(blob.file.name))
+
+class ChunkedUploadTests(UploadTestCase):
+    def chunked_upload(self, data, name="hours.csv"):
+        url = self.start(data, name)
+        chunk = self.client.put(
+            url, data, content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes 0-{len(data) - 1}/{len(data)}",
+        )
+        self.assertEqual(chunk.status_code, 200, chunk.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{url}finalize/", {}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def start(self, data, name="hours.csv"):
+        response = self.client.post("/api/files/uploads/", {"filename": name, "size": len(data)}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return f"/api/files/uploads/{response.data['id']}/"
+
+    def test_chunk_must_match_its_content_range(self):
+        data = b"a,b\n1,2\n"
+        url = self.start(data)
+        response = self.client.put(
+            url, data, content_type="application/octet-stream", HTTP_CONTENT_RANGE=f"bytes 0-3/{len(data)}",
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(
+            url, data, content_type="application/octet-stream", HTTP_CONTENT_RANGE=f"bytes 0-{len(data) - 1}/999",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    def test_abandoned_upload_expires(self):
+        data = b"a,b\n1,2\n"
+        url = self.start(data)
+        self.client.put(url, data[:4], content_type="application/octet-stream", HTTP_CONTENT_RANGE=f"bytes 0-3/{len(data)}")
+        session = UploadSession.objects.get()
+        self.assertTrue(os.path.exists(part_path(session)))
+
+        call_command("expire_upload_sessions", stdout=io.StringIO())
+        self.assertEqual(UploadSession.objects.get().status, "active")
+
+        UploadSession.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        call_command("expire_upload_sessions", stdout=io.StringIO())
+        self.assertEqual(UploadSession.objects.get().status, "expired")
+        self.assertFalse(os.path.exists(part_path(session)))
+        response = self.client.put(url, data[4:], content_type="application/octet-stream", HTTP_CONTENT_RANGE=f"bytes 4-{len(data) - 1}/{len(data)}")
+        self.assertEqual(response.status_code, 409)
+
+    def test_chunked_replace_with_different_bytes(self):
+        self.upload(b"a,b\n1,2\n")
+        old_blob = File.objects.get().blob
+
+        self.chunked_upload(b"a,b\n3,4\n")
+
+        file_obj = File.objects.get()
+        self.assertFalse(Blob.objects.filter(pk=old_blob.pk).exists())
+        self.assertEqual(file_obj.blob.ref_count, 1)
+        with file_obj.file.open("rb") as f:
+            self.assertEqual(f.read(), b"a,b\n3,4\n")
+
+    def test_chunked_replace_with_same_bytes_keeps_blob(self):
+        self.upload(b"a,b\n1,2\n")
+        self.chunked_upload(b"a,b\n1,2\n")
+
+        blob = Blob.objects.get()
+        self.assertEqual(File.objects.get().blob_id, blob.pk)
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        cases = [
+            ("bytes=0-", (0, 99)),
+            ("bytes=10-19", (10, 19)),
+            ("bytes=-10", (90, 99)),
+            ("bytes=-500", (0, 99)),
+            ("bytes=90-500", (90, 99)),
+            ("bytes=100-", False),
+            ("bytes=20-10", False),
+            ("bytes=-0", False),
+            ("bytes=0-9,20-29", None),
+            ("bytes=-", None),
+            ("items=0-9", None),
+            (None, None),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 100), expected)
+
+class DownloadTests(UploadTestCase):
+    data = b"".join(f"{i},{i * i}\n".encode() for i in range(200))
+
+    def setUp(self):
+        super().setUp()
+        self.upload(self.data)
+        self.url = f"/api/files/{File.objects.get().pk}/download/"
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_range_request(self):
+        response, body = self.get(Range="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.data)}")
+        self.assertEqual(body, self.data[100:200])
+
+    def test_matching_if_none_match_is_not_modified(self):
+        etag = self.get()[0]["ETag"]
+        response, body = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b"")
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response, body = self.get(Range="bytes=100-199", If_Range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Range"))
+        self.assertEqual(body, self.data)
+
+    def test_current_if_range_sends_the_range(self):
+        etag = self.get()[0]["ETag"]
+        response, body = self.get(Range="bytes=-24", If_Range=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.data[-24:])
+
+class RetentionSweepTests(UploadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.upload(b"a,b\n1,2\n")
+        File.objects.update(uploaded_at=timezone.now() - timedelta(days=31))
+
+    def test_scheduled_sweep_is_off_by_default(self):
+        sweep_expired_files_task()
+        self.assertTrue(File.objects.exists())
+
+    @override_settings(FILE_RETENTION_SWEEP=True)
+    def test_scheduled_sweep_deletes_expired_files_when_enabled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sweep_expired_files_task()
+        self.assertFalse(File.objects.exists())
+        self.assertFalse(Blob.objects.exists())
+
+class UpdateContentTests(UploadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.upload(b"a,b\n1,2\n")
+        self.url = f"/api/files/{File.objects.get().pk}/update-content/"
+        self.client.force_authenticate(User.objects.create_user("admin", password="x", role="admin"))
+
+    def save(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(self.url, {"content": [["a", "b"], ["3", "4"]], **data}, format="json")
+
+    def test_save_requires_the_current_version(self):
+        self.assertEqual(self.save().status_code, 409)
+        self.assertEqual(self.save(version=1).status_code, 409)
+
+        response = self.save(version=0)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["version"], 1)
+        self.assertEqual(self.save(version=0).status_code, 409)
+
+class BulkStatusTests(APITestCase):
+    url = "/api/files/bulk-status/"
+
+    def setUp(self):
+        owner = User.objects.create_user("client", password="x", role="client", phone_number="+639171234567")
+        self.pending, self.verified, self.rejected = (
+            File.objects.create(owner=owner, file=f"user_{owner.id}/{status}.csv", name=f"{status}.csv", status=status)
+            for status in ("pending", "verified", "rejected")
+        )
+        self.client.force_authenticate(User.objects.create_user("admin", password="x", role="admin"))
+
+    def post(self, ids, status):
+        with self.captureOnCommitCallbacks():
+            return self.client.post(self.url, {"ids": ids, "status": status}, format="json")
+
+    def test_reports_each_id(self):
+        missing = self.rejected.id + 100
+        response = self.post([self.pending.id, self.verified.id, missing, self.pending.id], "verified")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(response.data["results"], [
+            {"id": self.pending.id, "result": "updated", "previous_status": "pending"},
+            {"id": self.verified.id, "result": "unchanged"},
+            {"id": missing, "result": "not_found"},
+        ])
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, "verified")
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    def test_rejecting_queues_sms_for_changed_files_only(self):
+        self.post([self.pending.id, self.rejected.id], "rejected")
+        self.assertEqual(list(SMSOutbox.objects.values_list("dedupe_key", flat=True)), [f"file-rejected:{self.pending.id}"])
+
+    def test_unrejecting_cancels_pending_rejection_sms(self):
+        self.post([self.pending.id], "rejected")
+        self.assertTrue(SMSOutbox.objects.exists())
+
+        response = self.post([self.pending.id], "verified")
+        self.assertEqual(response.data["updated"], 1)
+        self.assertFalse(SMSOutbox.objects.exists())
+
+    def test_clients_are_forbidden(self):
+        self.client.force_authenticate(User.objects.get(username="client"))
+        response = self.post([self.pending.id], "verified")
+        self.assertEqual(response.status_code, 403)
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, "pending")
+
+    def test_id_limit(self):
+        response = self.post(list(range(1, BULK_STATUS_MAX_IDS + 2)), "verified")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post(list(range(1, BULK_STATUS_MAX_IDS + 1)), "verified").status_code, 200)
+
+    def test_ids_must_be_integers(self):
+        self.assertEqual(self.post([], "verified").status_code, 400)
+        self.assertEqual(self.post(["1"], "verified").status_code, 400)
+        self.assertEqual(self.post([True], "verified").status_code, 400)
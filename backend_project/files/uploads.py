@@ -0,0 +1,116 @@
+#files/uploads.py
+import hashlib
+import os
+from cachetools import LRUCache
+from django.conf import settings
+from django.core.files import File as DjangoFile
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Magic numbers checked against the first bytes of an upload
+SIGNATURES = {
+    "pdf": (b"%PDF",),
+    "xlsx": (b"PK\x03\x04",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "jpg": (b"\xff\xd8\xff",),
+    "jpeg": (b"\xff\xd8\xff",),
+}
+
+# Rolling sha256 per upload session, kept while the same worker sees consecutive chunks.
+# Maps session id -> (offset hashed so far, hasher); rebuilt from the part file on a miss.
+_hashers = LRUCache(maxsize=256)
+
+class PartFile(DjangoFile):
+    """Lets FileSystemStorage move the finished part file into place instead of copying it."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+def upload_dir():
+    path = getattr(settings, "CHUNKED_UPLOAD_DIR", os.path.join(settings.BASE_DIR, "upload_parts"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def part_path(session):
+    return os.path.join(upload_dir(), f"{session.id}.part")
+
+def file_extension(filename):
+    return filename.split(".")[-1].lower()
+
+def check_upload_allowed(system_settings, filename, size):
+    """Return an error message if the file breaks max_file_size / allowed_types, else None."""
+    max_size = system_settings.max_file_size * 1024 * 1024
+    if size > max_size:
+        return f"File exceeds max size of {system_settings.max_file_size} MB"
+    ext = file_extension(filename)
+    if ext not in system_settings.allowed_types:
+        return f"File type {ext} not allowed. Allowed: {system_settings.allowed_types}"
+    return None
+
+def check_signature(filename, head):
+    """Return an error message if the first bytes do not look like the declared type, else None."""
+    ext = file_extension(filename)
+    signatures = SIGNATURES.get(ext)
+    if signatures and not head.startswith(signatures):
+        return f"File content does not match type {ext}"
+    if ext == "csv" and b"\x00" in head:
+        return "File content does not look like CSV"
+    return None
+
+def _hasher_at(session):
+    cached = _hashers.get(session.id)
+    if cached and cached[0] == session.offset:
+        return cached[1]
+
+    hasher = hashlib.sha256()
+    path = part_path(session)
+    if session.offset and os.path.exists(path):
+        with open(path, "rb") as part:
+            remaining = session.offset
+            while remaining:
+                block = part.read(min(STREAM_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+    return hasher
+
+def write_chunk(session, stream, length):
+    """
+    Stream `length` bytes from `stream` into the session's part file at session.offset.
+    Returns (bytes_written, error); the hash is advanced as the bytes go by.
+    """
+    hasher = _hasher_at(session)
+    path = part_path(session)
+    mode = "r+b" if os.path.exists(path) else "wb"
+    written = 0
+
+    with open(path, mode) as part:
+        part.seek(session.offset)
+        part.truncate()
+        while written < length:
+            block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            if session.offset == 0 and written == 0:
+                error = check_signature(session.filename, block)
+                if error:
+                    return 0, error
+            part.write(block)
+            hasher.update(block)
+            written += len(block)
+
+    _hashers[session.id] = (session.offset + written, hasher)
+    return written, None
+
+def finish_hash(session):
+    digest = _hasher_at(session).hexdigest()
+    _hashers.pop(session.id, None)
+    return digest
+
+def discard_part(session):
+    _hashers.pop(session.id, None)
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
@@ -1,13 +1,36 @@
 #files/views.py
 from rest_framework import viewsets, permissions, status
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from .models import File, AuditLog, SystemSettings, EmployeeDirectory, DTRFile, DTREntry
-from .serializers import FileSerializer, FileStatusSerializer, AuditLogSerializer, SystemSettingsSerializer, EmployeeDirectorySerializer, DTREntrySerializer, DTRFileSerializer
+from .models import File, FileContent, BlobContent, DataVersion, AuditLog, SystemSettings, EmployeeDirectory, DTRFile, DTREntry, UploadSession, dtr_version_key, upload_expiry, user_directory_path
+from .serializers import FileSerializer, FileStatusSerializer, AuditLogSerializer, SystemSettingsSerializer, EmployeeDirectorySerializer, DTREntrySerializer, DTRFileSerializer, UploadSessionSerializer
+from .uploads import PartFile, check_upload_allowed, write_chunk, finish_hash, discard_part, part_path
+from .blobs import store_blob, release_blob, attach_blob, replace_file_content
+from .downloads import file_download_response
+from .archive import open_content
+from .writers import write_csv, write_xlsx, patch_csv, patch_xlsx
+from .render import NothingToRender, format_numeric, rows_from_pages, render_pdf, render_image
+from .edits import CellEditError, stored_pages, apply_cell_edits
+from .tasks import rerender_file_content, queue_pdf_parse
+from .events import publish_file_event
+from .signals import batched_version_bumps
+from .conditional import make_etag, not_modified, with_validators
+from .renderers import ColumnarJSONRenderer, MessagePackRenderer
+from .pdfparse import parse_pdf
+from .imageocr import read_image
+from django.core.files.base import ContentFile
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+import os
+import re
 from accounts.permissions import ReadOnlyForViewer, IsOwnerOrAdmin, CanEditStatus, IsAdmin
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
-from django.http import FileResponse, Http404, HttpResponse
+from django.http import Http404, HttpResponse
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.pagination import CursorPagination
+from rest_framework.exceptions import ParseError
+from rest_framework.settings import api_settings
 import csv
 from openpyxl import load_workbook
 import io
@@ -17,13 +40,36 @@ from django.db.models import Count, Q
 from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
 from .utils import log_action, get_client_ip
 from django.core.exceptions import ValidationError
-from .utils import send_rejection_sms 
+from utils.notifications import queue_rejection_sms, cancel_rejection_sms
 import pandas as pd
 import math
 from decimal import Decimal, InvalidOperation
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 import traceback
 
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+BULK_STATUS_MAX_IDS = 1000
+
+# Large tables can also be fetched column by column or as msgpack (?format=columnar / ?format=msgpack)
+TABULAR_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer, MessagePackRenderer]
+
+# Columns FileSerializer reads; listings load nothing else
+FILE_LIST_FIELDS = ("id", "owner__username", "file", "name", "uploaded_at", "updated_at", "status")
+
+def format_cell(cell):
+    """CSV cell as update_content writes it: numbers to two decimals."""
+    return format_numeric(cell) if isinstance(cell, (int, float, str)) else str(cell)
+
+def convert_cell(cell):
+    """XLSX cell as update_content writes it: numeric when it parses, else text."""
+    try:
+        return float(cell)
+    except (ValueError, TypeError):
+        return str(cell or "0.00")
+
 def log_action(user, action, status="success", ip_address=None):
     AuditLog.objects.create(
         user=user if user.is_authenticated else None,
@@ -32,10 +78,26 @@ def log_action(user, action, status="success", ip_address=None):
         ip_address=ip_address
     )
 
+class FilePagination(CursorPagination):
+    """Keyset pages over (uploaded_at, id), served from the composite indexes at any depth."""
+    ordering = ("-uploaded_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+def upload_day_bound(value, param):
+    try:
+        day = parse_date(value or "")
+    except ValueError:
+        day = None
+    if day is None:
+        raise ParseError(f"{param} must be a date (YYYY-MM-DD)")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
 class FileViewSet(viewsets.ModelViewSet):
     queryset = File.objects.all()
     serializer_class = FileSerializer
     permission_classes = [permissions.IsAuthenticated, CanEditStatus]
+    pagination_class = FilePagination
 
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
@@ -46,9 +108,41 @@ class FileViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = File.objects.all()
         if user.role == "client":
-            return File.objects.filter(owner=user).order_by("-uploaded_at")
-        return File.objects.all().order_by("-uploaded_at")
+            queryset = queryset.filter(owner=user)
+        if self.action in ("list", "retrieve", "update_status", "destroy"):
+            queryset = queryset.select_related("owner")
+        if self.action == "list":
+            queryset = self.filter_listing(queryset.only(*FILE_LIST_FIELDS))
+        return queryset.order_by("-uploaded_at", "-id")
+
+    def list(self, request, *args, **kwargs):
+        """A page of files; unchanged pages answer If-None-Match with 304 before serializing."""
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        etag = make_etag(
+            request, request.get_full_path(), self.paginator.get_next_link(), self.paginator.get_previous_link(),
+            *((f.id, f.name, f.file.name, f.status, f.owner.username, f.uploaded_at, f.updated_at) for f in page),
+        )
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        serializer = self.get_serializer(page, many=True)
+        return with_validators(self.get_paginated_response(serializer.data), etag)
+
+    def filter_listing(self, queryset):
+        """?status=a,b  ?owner=<username> (staff only)  ?date_from= / ?date_to= (YYYY-MM-DD, inclusive)"""
+        params = self.request.query_params
+        if params.get("status"):
+            queryset = queryset.filter(status__in=params["status"].split(","))
+        if params.get("owner") and self.request.user.role != "client":
+            queryset = queryset.filter(owner__username=params["owner"])
+        # Whole-day bounds on the raw column, so the uploaded_at indexes still apply
+        if "date_from" in params:
+            queryset = queryset.filter(uploaded_at__gte=upload_day_bound(params["date_from"], "date_from"))
+        if "date_to" in params:
+            queryset = queryset.filter(uploaded_at__lt=upload_day_bound(params["date_to"], "date_to") + timedelta(days=1))
+        return queryset
 
     def get_permissions(self):
         if self.action == "destroy":
@@ -75,18 +169,172 @@ class FileViewSet(viewsets.ModelViewSet):
         if ext not in settings.allowed_types:
             raise ValidationError(f"File type {ext} not allowed. Allowed: {settings.allowed_types}")
         
-        # 3. Existing overwrite logic
-        if user.role == 'client':
-            existing_file = File.objects.filter(owner=user, file=file_obj.name).first()
-            if existing_file:
-                existing_file.file.delete(save=False)
-                serializer.instance = existing_file
-                serializer.save()
-                log_action(user, f"updated file {file_obj.name}", ip_address=get_client_ip(self.request))
-                return
-
-        new_file = serializer.save(owner=user)
-        log_action(user, f"uploaded file {new_file.file.name}", ip_address=get_client_ip(self.request))
+        # 3. Store the bytes once per distinct content; a repeat upload only adds a File row
+        filename = os.path.basename(file_obj.name)
+        with transaction.atomic():
+            blob = store_blob(file_obj, filename)
+
+            # 4. Existing overwrite logic
+            if user.role == 'client':
+                existing_file = self.find_client_file(user, filename)
+                if existing_file:
+                    previous = (existing_file.blob_id, existing_file.file.name)
+                    serializer.instance = existing_file
+                    serializer.save(name=filename, blob=blob, file=blob.file.name)
+                    self.detach_content(existing_file, *previous)
+                    publish_file_event("updated", [existing_file])
+                    queue_pdf_parse(existing_file)
+                    log_action(user, f"updated file {filename}", ip_address=get_client_ip(self.request))
+                    return
+
+            new_file = serializer.save(owner=user, name=filename, blob=blob, file=blob.file.name)
+            publish_file_event("created", [new_file])
+            queue_pdf_parse(new_file)
+        log_action(user, f"uploaded file {new_file.display_name}", ip_address=get_client_ip(self.request))
+
+    def find_client_file(self, user, filename):
+        """A client re-uploading a file name overwrites their earlier upload of it."""
+        return (
+            File.objects.filter(owner=user, name=filename).first()
+            or File.objects.filter(owner=user, blob__isnull=True, file=user_directory_path(File(owner=user), filename)).first()
+        )
+
+    def detach_content(self, file_obj, blob_id, file_name):
+        """
+        Let go of the bytes a file pointed at before it was saved on new ones, and of any
+        edits made to them. Runs after that save: a Blob is PROTECTed while a File points at it.
+        """
+        FileContent.store(file_obj.pk, None)
+        if blob_id:
+            release_blob(blob_id)
+        elif file_name:
+            storage = file_obj.file.storage
+            transaction.on_commit(lambda: storage.delete(file_name))
+
+    # --- Chunked uploads: POST uploads/ -> PUT uploads/<id>/ (repeat) -> POST uploads/<id>/finalize/ ---
+
+    @action(detail=False, methods=["post"], url_path="uploads", parser_classes=[JSONParser])
+    def start_upload(self, request):
+        filename = os.path.basename(str(request.data.get("filename") or "")).strip()
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            size = 0
+        if not filename or size <= 0:
+            return Response({"detail": "filename and a positive size are required"}, status=400)
+
+        settings = SystemSettings.objects.first() or SystemSettings()
+        error = check_upload_allowed(settings, filename, size)
+        if error:
+            return Response({"detail": error}, status=400)
+
+        session = UploadSession.objects.create(owner=request.user, filename=filename, size=size)
+        data = UploadSessionSerializer(session).data
+        data["chunk_size"] = django_settings.CHUNKED_UPLOAD_MAX_CHUNK
+        return Response(data, status=201)
+
+    @action(detail=False, methods=["get", "put", "delete"], url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})")
+    def upload_chunk(self, request, upload_id=None):
+        session = get_object_or_404(UploadSession, id=upload_id, owner=request.user)
+
+        if request.method == "GET":
+            return Response(UploadSessionSerializer(session).data)
+
+        if request.method == "DELETE":
+            discard_part(session)
+            session.status = "aborted"
+            session.save(update_fields=["status", "updated_at"])
+            return Response(status=204)
+
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+        if length <= 0:
+            return Response({"detail": "Empty chunk"}, status=400)
+        if length > django_settings.CHUNKED_UPLOAD_MAX_CHUNK:
+            return Response({"detail": f"Chunks are limited to {django_settings.CHUNKED_UPLOAD_MAX_CHUNK} bytes"}, status=413)
+
+        content_range = CONTENT_RANGE_RE.match(request.META.get("HTTP_CONTENT_RANGE", ""))
+        offset = content_range.group(1) if content_range else request.query_params.get("offset")
+        try:
+            offset = int(offset)
+        except (TypeError, ValueError):
+            return Response({"detail": "Send the chunk offset as ?offset= or a Content-Range header"}, status=400)
+        if content_range:
+            end, total = content_range.group(2, 3)
+            if int(end) - offset + 1 != length:
+                return Response({"detail": "Content-Range does not match the chunk length"}, status=400)
+            if total != "*" and int(total) != session.size:
+                return Response({"detail": "Content-Range total does not match the declared file size"}, status=400)
+
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status != "active":
+                return Response({"detail": f"Upload is {session.status}"}, status=409)
+            if offset != session.offset:
+                # Client is out of sync (e.g. after a dropped connection): tell it where to resume
+                return Response({"detail": "Offset mismatch", "offset": session.offset}, status=409)
+            if session.offset + length > session.size:
+                return Response({"detail": "Chunk goes past the declared file size"}, status=400)
+
+            written, error = write_chunk(session, request.stream, length)
+            if error:
+                discard_part(session)
+                session.status = "rejected"
+                session.save(update_fields=["status", "updated_at"])
+                return Response({"detail": error}, status=400)
+
+            session.offset += written
+            session.expires_at = upload_expiry()
+            session.save(update_fields=["offset", "expires_at", "updated_at"])
+
+        return Response(UploadSessionSerializer(session).data)
+
+    @action(detail=False, methods=["post"], url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})/finalize", parser_classes=[JSONParser])
+    def finish_upload(self, request, upload_id=None):
+        user = request.user
+        with transaction.atomic():
+            session = get_object_or_404(UploadSession.objects.select_for_update(), id=upload_id, owner=user)
+            if session.status != "active":
+                return Response({"detail": f"Upload is {session.status}"}, status=409)
+            if session.offset != session.size:
+                return Response({"detail": "Upload is incomplete", "offset": session.offset}, status=409)
+
+            digest = finish_hash(session)
+            expected = request.data.get("sha256")
+            if expected and expected.lower() != digest:
+                discard_part(session)
+                session.status = "rejected"
+                session.save(update_fields=["status", "updated_at"])
+                return Response({"detail": "Checksum mismatch"}, status=400)
+
+            target = None
+            if user.role == "client":
+                target = self.find_client_file(user, session.filename)
+            replacing = target is not None
+            if replacing:
+                previous = (target.blob_id, target.file.name)
+            else:
+                target = File(owner=user)
+
+            # The hash is already known, so a duplicate upload never touches storage
+            with open(part_path(session), "rb") as part:
+                blob = store_blob(PartFile(part, name=session.filename), session.filename, sha256=digest)
+            discard_part(session)
+
+            target.name = session.filename
+            attach_blob(target, blob)
+            target.save()
+            if replacing:
+                self.detach_content(target, *previous)
+            publish_file_event("updated" if replacing else "created", [target])
+            queue_pdf_parse(target)
+
+            session.sha256 = digest
+            session.status = "complete"
+            session.save(update_fields=["sha256", "status", "updated_at"])
+
+        verb = "updated" if replacing else "uploaded"
+        log_action(user, f"{verb} file {target.display_name}", ip_address=get_client_ip(request))
+        return Response(FileSerializer(target).data, status=201)
 
     @action(
             detail=True, 
@@ -102,24 +350,31 @@ class FileViewSet(viewsets.ModelViewSet):
         if settings.require_verification and file.status != "verified":
             return Response({"detail": "File must be verified before download"}, status=403)
         
-        if settings.log_downloads:
-            log_action(request.user, f"downloaded file {file.file.name}", ip_address=get_client_ip(request))
-        
+        # Only log real transfers: revalidations (304) and resumed chunks (206) are not new downloads
         try:
-            return FileResponse(file.file.open(), as_attachment=True, filename=file.file.name)
+            response = file_download_response(request, file, file.display_name)
         except FileNotFoundError:
             raise Http404
 
+        if settings.log_downloads and response.status_code == 200 and not response.has_header("Content-Range"):
+            log_action(request.user, f"downloaded file {file.display_name}", ip_address=get_client_ip(request))
+        return response
+
     def perform_destroy(self, instance):
         settings = SystemSettings.objects.first()
         
+        previous = {instance.id: instance.status}
         if settings.auto_archive:
             instance.status = "archived"
             instance.save(update_fields=["status"])
-            log_action(self.request.user, f"archived file {instance.file.name}", ip_address=get_client_ip(self.request))
+            publish_file_event("status_changed", [instance], previous)
+            log_action(self.request.user, f"archived file {instance.display_name}", ip_address=get_client_ip(self.request))
         else:
-            file_name = instance.file.name
-            super().perform_destroy(instance)
+            file_name = instance.display_name
+            with transaction.atomic():
+                # The payload needs the row's id, which delete() clears
+                publish_file_event("deleted", [instance], previous)
+                super().perform_destroy(instance)
             log_action(self.request.user, f"deleted file {file_name}", ip_address=get_client_ip(self.request))
 
     @action(detail=True, methods=["patch"], url_path="status", parser_classes=[JSONParser])
@@ -134,151 +389,149 @@ class FileViewSet(viewsets.ModelViewSet):
         new_status = serializer.data.get("status")
 
         if new_status == "rejected" and previous_status != "rejected":
-            user = file.owner
-            if user.phone_number:
-                try:
-                    send_rejection_sms(user.phone_number, file.file.name, user=user)
-                except Exception as e:
-                    log_action(request.user, f"failed to send rejection SMS to {user.username}: {str(e)}", status="error")
+            queue_rejection_sms([file])
+        elif previous_status == "rejected" and new_status != "rejected":
+            cancel_rejection_sms([file.id])
+        if new_status != previous_status:
+            publish_file_event("status_changed", [file], {file.id: previous_status})
 
-        log_action(request.user, f"updated status of file {file.file.name} to {new_status}", ip_address=get_client_ip(request))
+        log_action(request.user, f"updated status of file {file.display_name} to {new_status}", ip_address=get_client_ip(request))
         return Response(serializer.data)
     
-    @action(detail=True, methods=["get"], url_path="content")
+    @action(detail=False, methods=["post"], url_path="bulk-status", parser_classes=[JSONParser])
+    def bulk_update_status(self, request):
+        """
+        {"ids": [...], "status": "..."} -> one UPDATE for every file that changes, one
+        audit INSERT for all of them, and one outbox INSERT for the rejection SMS.
+        """
+        if request.user.role not in ["admin", "viewer"]:
+            return Response({"detail": "Forbidden"}, status=403)
+
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return Response({"detail": "ids must be a non-empty list of file ids"}, status=400)
+        if len(ids) > BULK_STATUS_MAX_IDS:
+            return Response({"detail": f"At most {BULK_STATUS_MAX_IDS} files per request"}, status=400)
+        if "status" not in request.data:
+            return Response({"detail": "status is required"}, status=400)
+        serializer = FileStatusSerializer(data={"status": request.data["status"]})
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data["status"]
+        ids = list(dict.fromkeys(ids))
+
+        with transaction.atomic():
+            files = {
+                f.id: f for f in
+                self.get_queryset().select_for_update(of=("self",)).filter(id__in=ids)
+                .select_related("owner").only("id", "name", "file", "status", "uploaded_at", "owner__username", "owner__phone_number")
+            }
+            changed = [f for f in files.values() if f.status != new_status]
+            previous = {f.id: f.status for f in changed}
+            if changed:
+                File.objects.filter(id__in=[f.id for f in changed]).update(status=new_status, updated_at=timezone.now())
+                ip_address = get_client_ip(request)
+                AuditLog.objects.bulk_create([
+                    AuditLog(user=request.user, action=f"updated status of file {f.display_name} to {new_status}", ip_address=ip_address)
+                    for f in changed
+                ])
+            if new_status == "rejected":
+                queue_rejection_sms(changed)
+            else:
+                cancel_rejection_sms([f.id for f in changed if f.status == "rejected"])
+            for f in changed:
+                f.status = new_status
+            publish_file_event("status_changed", changed, previous)
+
+        results = []
+        for file_id in ids:
+            file_obj = files.get(file_id)
+            if file_obj is None:
+                results.append({"id": file_id, "result": "not_found"})
+            elif file_id in previous:
+                results.append({"id": file_id, "result": "updated", "previous_status": previous[file_id]})
+            else:
+                results.append({"id": file_id, "result": "unchanged"})
+        return Response({"status": new_status, "updated": len(changed), "results": results})
+
+    @action(detail=True, methods=["get"], url_path="content", renderer_classes=TABULAR_RENDERERS)
     def get_content(self, request, pk=None):
         file_obj = self.get_object()
-        print(f"User: {request.user}, Role: {request.user.role}, File: {file_obj.file.name}")
 
         if request.user.role not in ["admin", "viewer" , "client"]:
             return Response({"detail": "Forbidden"}, status=403)
 
-        if file_obj.parsed_content:
-            return Response({"pages": file_obj.parsed_content})
-
-        file_name = file_obj.file.name.lower()
+        # The body depends only on the bytes (blob) and the edits (content_version)
+        etag = make_etag(request, "content", file_obj.pk, file_obj.blob_id or file_obj.file.name, file_obj.content_version)
+        cached = not_modified(request, etag, file_obj.updated_at)
+        if cached:
+            return cached
+        response = self.read_content(file_obj)
+        if "ocr_pending" in response.data:
+            # Partial until the OCR lands in the blob's cache; clients must not keep it
+            return response
+        return with_validators(response, etag, file_obj.updated_at)
+
+    def read_content(self, file_obj):
+        pages = FileContent.load(file_obj.pk)
+        if pages:
+            return Response({"pages": pages, "version": file_obj.content_version})
+
+        # Files sharing a blob share its parse results
+        pages = BlobContent.load(file_obj.blob_id) if file_obj.blob_id else None
+        if pages is not None:
+            return Response({"pages": pages, "version": file_obj.content_version})
+
+        file_name = file_obj.display_name.lower()
         try:
             # --- CSV ---
             if file_name.endswith(".csv"):
-                file_obj.file.seek(0) 
-                file_data = file_obj.file.read()
+                with open_content(file_obj) as source:
+                    file_data = source.read()
                 decoded_data = file_data.decode("utf-8").splitlines()
                 reader = csv.reader(decoded_data)
-                return Response({"pages": [{"page_number": 1, "content": list(reader)}]})
+                return self.parsed_response(file_obj, [{"page_number": 1, "content": list(reader)}])
 
             # --- XLSX ---
             elif file_name.endswith(".xlsx"):
-                file_obj.file.seek(0)
-                file_bytes = io.BytesIO(file_obj.file.read())
+                with open_content(file_obj) as source:
+                    file_bytes = io.BytesIO(source.read())
                 wb = load_workbook(file_bytes, read_only=True)
                 ws = wb.active
                 rows = [[str(cell) if cell is not None else "" for cell in row] for row in ws.iter_rows(values_only=True)]
-                return Response({"pages": [{"page_number": 1, "content": rows}]})
+                return self.parsed_response(file_obj, [{"page_number": 1, "content": rows}])
 
             # --- PDF ---
             elif file_name.endswith(".pdf"):
-                import pdfplumber
-                pages_data = []
-
-                def is_number(val):
-                    try:
-                        float(val)
-                        return True
-                    except ValueError:
-                        return False
-
-                file_obj.file.seek(0)
-                with pdfplumber.open(file_obj.file) as pdf:
-                    for i, page in enumerate(pdf.pages, start=1):
-                        page_data = {"page_number": i}
-
-                        text = page.extract_text()
-                        if text:
-                            page_data["text"] = text
-
-                        lines = text.splitlines() if text else []
-                        structured_table = {"main_headers": [], "sub_headers": [], "rows": []}
-
-                        if lines:
-                            header_idx = None
-                            for idx, line in enumerate(lines):
-                                if "Emp." in line and "DUTY" in line:
-                                    header_idx = idx
-                                    break
-
-                            if header_idx is not None:
-                                structured_table["main_headers"] = [
-                                    "Emp. No",
-                                    "Name",
-                                    "Duty (By Days)",
-                                    "Late",
-                                    "UT",
-                                    "Work (By Hrs)",
-                                    "Day-Off (By Hours)",
-                                    "SH (By Hrs)",
-                                    "LH (By Hrs)",
-                                    "Day-Off - SH (By Hrs)",
-                                    "Day-Off - LH (By Hrs)"
-                                ]
-                                structured_table["sub_headers"] = [
-                                    [""], [""],
-                                    ["WRK", "ABS", "LV", "HOL", "RES"],
-                                    [""], [""],
-                                    ["REG", "OT", "ND", "OTND"],
-                                    ["REG", "OT", "ND", "OTND"],
-                                    ["REG", "OT", "ND", "OTND"],
-                                    ["REG", "OT", "ND", "OTND"],
-                                    ["REG", "OT", "ND", "OTND"],
-                                    ["REG", "OT", "ND", "OTND"],
-                                ]
-
-                                data_lines = lines[header_idx + 1:]
-                                expected_cols = sum(len(group) for group in structured_table["sub_headers"])
-
-                                for dl in data_lines:
-                                    parts = dl.split()
-                                    if not parts or not parts[0].isdigit():
-                                        continue
-
-                                    emp_no = parts[0]
-                                    name_parts, numbers = [], []
-                                    found_number = False
-
-                                    for p in parts[1:]:
-                                        if is_number(p):
-                                            found_number = True
-                                            numbers.append(f"{float(p):.2f}")
-                                        elif not found_number:
-                                            name_parts.append(p)
-
-                                    clean_name = " ".join(name_parts).strip()
-                                    padded_numbers = numbers + ["0.00"] * (expected_cols - len(numbers))
-                                    row = [emp_no, clean_name] + padded_numbers[:expected_cols]
-                                    structured_table["rows"].append(row)
-
-                        if structured_table["rows"]:
-                            page_data["tables"] = [structured_table]
-
-                        pages_data.append(page_data)
-
-                return Response({"pages": pages_data})
+                cache_key = file_obj.blob.sha256 if file_obj.blob_id else None
+                with open_content(file_obj) as source:
+                    # With a worker running, scanned pages are left to the upload's parse task. Files
+                    # not yet moved onto a blob (backfill_blobs) have nowhere to keep its result: OCR here
+                    ocr = not django_settings.PARSE_IN_BACKGROUND or not file_obj.blob_id
+                    pages, pending = parse_pdf(source, ocr=ocr, cache_key=cache_key)
+                if pending:
+                    queue_pdf_parse(file_obj)
+                    return Response({"pages": pages, "version": file_obj.content_version, "ocr_pending": pending})
+                return self.parsed_response(file_obj, pages)
 
             # --- Images ---
             elif file_name.endswith((".jpg", ".jpeg", ".png")):
-                import cv2, numpy as np, easyocr
-                file_obj.file.seek(0)
-                file_bytes = np.asarray(bytearray(file_obj.file.read()), dtype=np.uint8)
-                img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
+                import cv2, numpy as np
+                with open_content(file_obj) as source:
+                    file_bytes = np.asarray(bytearray(source.read()), dtype=np.uint8)
+                img = cv2.imdecode(file_bytes, cv2.IMREAD_GRAYSCALE)
                 if img is None:
                     raise ValueError("Failed to decode image")
 
-                reader = easyocr.Reader(["en"])
-                ocr_result = reader.readtext(img)
+                # Scaled, straightened and binarized first; see files/imageocr.py
+                ocr_result = read_image(img)
 
                 rows_dict = {}
-                row_threshold = 10
-                for (bbox, text, conf) in ocr_result:
-                    top = int(bbox[0][1])
-                    left = int(bbox[0][0])
+                # Positions are on the normalized page, where text is IMAGE_OCR_TEXT_HEIGHT px tall
+                row_threshold = django_settings.IMAGE_OCR_TEXT_HEIGHT / 2
+                for word in ocr_result:
+                    text = word.text
+                    top = int(word.top)
+                    left = int(word.left)
                     if not text.strip():
                         continue
                     found = False
@@ -295,7 +548,7 @@ class FileViewSet(viewsets.ModelViewSet):
                     row_words = sorted(rows_dict[top], key=lambda x: x[0])
                     table.append([w[1] for w in row_words])
 
-                return Response({"pages": [{"page_number": 1, "content": table}]})
+                return self.parsed_response(file_obj, [{"page_number": 1, "content": table}])
 
             else:
                 return Response({"detail": "Unsupported file type"}, status=400)
@@ -305,6 +558,11 @@ class FileViewSet(viewsets.ModelViewSet):
             traceback.print_exc()
             return Response({"detail": f"Failed to read file: {str(e)}"}, status=400)
 
+    def parsed_response(self, file_obj, pages):
+        if file_obj.blob_id:
+            BlobContent.store(file_obj.blob_id, pages)
+        return Response({"pages": pages, "version": file_obj.content_version})
+
     @action(detail=True, methods=["patch"], url_path="update-content")
     def update_content(self, request, pk=None):
         file_obj = self.get_object()
@@ -318,217 +576,100 @@ class FileViewSet(viewsets.ModelViewSet):
             return Response({"detail": "No content provided"}, status=400)
 
         if pages and not content:
-            content = []
-            for page in pages:
-                if page.get("tables"):
-                    for table in page["tables"]:
-                        rows = table.get("rows", [])
-                        sub_headers = table.get("sub_headers") or []
-                        expected_cols = sum(len(group) if isinstance(group, list) else 1 for group in sub_headers)
-
-                        for row in rows:
-                            normalized = []
-                            for c in range(expected_cols):
-                                if c < len(row):
-                                    val = row[c]
-                                    try:
-                                        normalized.append(float(val))
-                                    except (ValueError, TypeError):
-                                        normalized.append(str(val or "0.00"))
-                                else:
-                                    normalized.append("0.00") 
-                            content.append(normalized)
-                elif page.get("content"): 
-                    content.extend(page["content"])
-
-        file_name = file_obj.file.name.lower()
-
-        def format_numeric(val):
-            if val is None or val == "":
-                return "0.00"
-            try:
-                num = float(val)
-                return f"{num:.2f}"
-            except (ValueError, TypeError):
-                return str(val)
+            content = rows_from_pages(pages)
+
+        version = request.data.get("version")
+        file_name = file_obj.display_name.lower()
 
         try:
-            # --- CSV ---
-            if file_name.endswith(".csv"):
-                from django.core.files.base import ContentFile
-                import csv, io
-                output = io.StringIO()
-                writer = csv.writer(output)
-                for row in content:
-                    writer.writerow([format_numeric(cell) if isinstance(cell, (int, float, str)) else str(cell) for cell in row])
-                file_obj.file.save(file_obj.file.name, ContentFile(output.getvalue()), save=True)
+            # The row lock makes check-then-write atomic: a concurrent save waits here and then sees the new version.
+            # Like patch_cells, a save must name the version it was made against
+            with transaction.atomic():
+                file_obj = get_object_or_404(self.get_queryset().select_for_update(), pk=file_obj.pk)
+                if version != file_obj.content_version:
+                    return Response({"detail": "File was edited by someone else", "version": file_obj.content_version}, status=409)
+
+                # --- CSV ---
+                if file_name.endswith(".csv"):
+                    with write_csv(content, format_cell) as output:
+                        replace_file_content(file_obj, output)
+
+                # --- XLSX ---
+                elif file_name.endswith(".xlsx"):
+                    with write_xlsx(content, convert_cell) as output:
+                        replace_file_content(file_obj, output)
+
+                # --- PDF ---
+                elif file_name.endswith(".pdf"):
+                    replace_file_content(file_obj, ContentFile(render_pdf(pages)))
+
+                # --- Images ---
+                elif file_name.endswith((".jpg", ".jpeg", ".png")):
+                    try:
+                        data = render_image(content)
+                    except NothingToRender:
+                        return Response({"detail": "No content to update"}, status=400)
+                    replace_file_content(file_obj, ContentFile(data))
 
-            # --- XLSX ---
-            elif file_name.endswith(".xlsx"):
-                from openpyxl import Workbook
-                from django.core.files.base import ContentFile
-                from io import BytesIO
+                else:
+                    return Response({"detail": "Unsupported file type"}, status=400)
 
-                wb = Workbook()
-                ws = wb.active
-                for row in content:
-                    new_row = []
-                    for cell in row:
-                        try:
-                            new_row.append(float(cell))
-                        except (ValueError, TypeError):
-                            new_row.append(str(cell or "0.00"))
-                    ws.append(new_row)
-                stream = BytesIO()
-                wb.save(stream)
-                file_obj.file.save(file_obj.file.name, ContentFile(stream.getvalue()), save=True)
+                FileContent.store(file_obj.pk, pages or content)
+                file_obj.content_version += 1
+                file_obj.save(update_fields=["content_version", "updated_at"])
+            return Response({"detail": "Content updated successfully", "version": file_obj.content_version})
 
-            # --- PDF ---
-            elif file_name.endswith(".pdf"):
-                from reportlab.lib.pagesizes import letter
-                from reportlab.pdfgen import canvas
-                from reportlab.pdfbase.pdfmetrics import stringWidth
-                from reportlab.lib.colors import lightgrey, black
-                from django.core.files.base import ContentFile
-                from io import BytesIO
-
-                buffer = BytesIO()
-                p = canvas.Canvas(buffer, pagesize=letter)
-
-                for page in pages:
-                    y_offset = 750
-                    page_has_content = False
-
-                    if "text" in page and page["text"]:
-                        p.setFont("Helvetica", 10)
-                        for line in page["text"].splitlines():
-                            p.drawString(50, y_offset, line)
-                            y_offset -= 15
-                            page_has_content = True
-                            if y_offset < 50:
-                                p.showPage()
-                                y_offset = 750
-                        p.showPage()
-
-                    if "tables" in page and page["tables"]:
-                        for table in page["tables"]:
-                            main_headers = table.get("main_headers", [])
-                            sub_headers = table.get("sub_headers", [])
-                            rows = table.get("rows", [])
-
-                            flat_sub_headers = []
-                            for group in sub_headers:
-                                flat_sub_headers.extend(group if isinstance(group, list) else [group])
-
-                            all_rows = [main_headers] + [flat_sub_headers] + rows
-                            if not all_rows:
-                                continue
-
-                            num_cols = max(len(r) for r in all_rows)
-                            col_widths = []
-                            row_height = 20
-
-                            for col_idx in range(num_cols):
-                                max_width = max(
-                                    stringWidth(format_numeric(row[col_idx]) if col_idx < len(row) else "0.00", "Helvetica", 8)
-                                    for row in all_rows
-                                )
-                                col_widths.append(max_width + 20)
-
-                            x_offset, y_start = 50, y_offset
-
-                            # Main headers
-                            x = x_offset
-                            for j, h in enumerate(main_headers):
-                                span = len(sub_headers[j]) if j < len(sub_headers) else 1
-                                span_width = sum(col_widths[j:j+span])
-                                p.setFillColor(lightgrey)
-                                p.rect(x, y_start, span_width, -row_height, fill=1, stroke=1)
-                                p.setFillColor(black)
-                                p.setFont("Helvetica-Bold", 8)
-                                p.drawCentredString(x + span_width / 2, y_start - row_height + 15, h)
-                                x += span_width
-                            y_start -= row_height
-
-                            # Sub headers
-                            x = x_offset
-                            for group in sub_headers:
-                                for sh in (group if isinstance(group, list) else [group]):
-                                    width = col_widths[sub_headers.index(group)]
-                                    p.rect(x, y_start, width, -row_height, fill=0, stroke=1)
-                                    p.setFont("Helvetica-Bold", 8)
-                                    p.drawCentredString(x + width / 2, y_start - row_height + 15, sh)
-                                    x += width
-                            y_start -= row_height
-
-                            # Table rows
-                            for row in rows:
-                                if y_start < 50:
-                                    p.showPage()
-                                    y_start = 750
-                                x = x_offset
-                                for j in range(num_cols):
-                                    text = format_numeric(row[j]) if j < len(row) else "0.00"
-                                    p.rect(x, y_start, col_widths[j], -row_height, fill=0, stroke=1)
-                                    p.setFont("Helvetica", 8)
-                                    p.drawString(x + 2, y_start - row_height + 15, text)
-                                    x += col_widths[j]
-                                y_start -= row_height
-
-                            y_offset = y_start
-                        p.showPage()
-
-                    if not page_has_content:
-                        p.setFont("Helvetica", 10)
-                        p.drawString(50, 750, "No content available")
-                        p.showPage()
-
-                p.save()
-                buffer.seek(0)
-                file_obj.file.save(file_obj.file.name, ContentFile(buffer.read()), save=True)
+        except Exception as e:
+            return Response({"detail": f"Failed to save content: {str(e)}"}, status=400)
 
-            # --- Images ---
-            elif file_name.endswith((".jpg", ".jpeg", ".png")):
-                import cv2
-                import numpy as np
-                from django.core.files.base import ContentFile
-
-                rows = content
-                cell_width, cell_height = 200, 50
-                font, font_scale, thickness = cv2.FONT_HERSHEY_SIMPLEX, 0.7, 1
-
-                n_rows = len(rows)
-                n_cols = max(len(r) for r in rows) if rows else 0
-                if n_rows == 0 or n_cols == 0:
-                    return Response({"detail": "No content to update"}, status=400)
-
-                img_height = n_rows * cell_height + 2
-                img_width = n_cols * cell_width + 2
-                img = np.ones((img_height, img_width, 3), dtype=np.uint8) * 255
-
-                for i, row in enumerate(rows):
-                    for j, cell in enumerate(row):
-                        x1, y1 = j * cell_width, i * cell_height
-                        x2, y2 = x1 + cell_width, y1 + cell_height
-                        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 0, 0), 1)
-                        text = str(cell)
-                        (tw, th), _ = cv2.getTextSize(text, font, font_scale, thickness)
-                        text_x = x1 + (cell_width - tw) // 2
-                        text_y = y1 + (cell_height + th) // 2
-                        cv2.putText(img, text, (text_x, text_y), font, font_scale, (0, 0, 0), thickness)
-
-                _, buffer = cv2.imencode(".png", img)
-                file_obj.file.save(file_obj.file.name, ContentFile(buffer.tobytes()), save=True)
+    @action(detail=True, methods=["patch"], url_path="cells", parser_classes=[JSONParser])
+    def patch_cells(self, request, pk=None):
+        """
+        Apply a few cell edits: {"version": n, "edits": [{"page", "row", "col", "value"}, ...]}.
+        CSV/XLSX get only the touched rows rewritten now; PDFs and images are re-rendered in the background.
+        """
+        if request.user.role not in ["admin", "viewer"]:
+            return Response({"detail": "Forbidden"}, status=403)
 
+        with transaction.atomic():
+            file_obj = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if request.data.get("version") != file_obj.content_version:
+                return Response({"detail": "File was edited by someone else", "version": file_obj.content_version}, status=409)
+
+            pages = stored_pages(file_obj)
+            if not pages:
+                return Response({"detail": "Load the file content before editing cells"}, status=409)
+            try:
+                pages, changed = apply_cell_edits(pages, request.data.get("edits"))
+            except CellEditError as e:
+                return Response({"detail": str(e)}, status=400)
+
+            file_name = file_obj.display_name.lower()
+            deferred = False
+            if file_name.endswith((".csv", ".xlsx")):
+                # One page of plain rows: row indexes are record indexes in the file
+                edited_rows = changed.get((0, "content"), {})
+                with open_content(file_obj) as src:
+                    if file_name.endswith(".csv"):
+                        output = patch_csv(src, edited_rows, format_cell)
+                    else:
+                        output = patch_xlsx(src, edited_rows, convert_cell)
+                with output:
+                    replace_file_content(file_obj, output)
+            elif file_name.endswith((".pdf", ".jpg", ".jpeg", ".png")):
+                deferred = True
             else:
                 return Response({"detail": "Unsupported file type"}, status=400)
 
-            file_obj.parsed_content = pages or content
-            file_obj.save(update_fields=["parsed_content"])
-            return Response({"detail": "Content updated successfully"})
+            FileContent.store(file_obj.pk, pages)
+            file_obj.content_version += 1
+            file_obj.save(update_fields=["content_version", "updated_at"])
+            version = file_obj.content_version
+            if deferred:
+                transaction.on_commit(lambda: rerender_file_content.delay(file_obj.id, version))
 
-        except Exception as e:
-            return Response({"detail": f"Failed to save content: {str(e)}"}, status=400)
+        log_action(request.user, f"edited {len(request.data['edits'])} cell(s) in {file_obj.display_name}", ip_address=get_client_ip(request))
+        return Response({"version": version, "rendering": deferred})
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -557,7 +698,7 @@ def export_files_report(request):
         writer = csv.writer(response)
         writer.writerow(["ID", "Filename", "Owner", "Status", "Uploaded At"])
         for f in files:
-            writer.writerow([f.id, f.file.name, f.owner.username, f.status, f.uploaded_at])
+            writer.writerow([f.id, f.display_name, f.owner.username, f.status, f.uploaded_at])
         return response
     
     elif format == "pdf":
@@ -568,7 +709,7 @@ def export_files_report(request):
         p.drawString(50, y, "Files Report")
         y -= 25
         for f in files:
-            p.drawString(50, y, f"{f.id} | {f.file.name} | {f.owner.username} | {f.status} | {f.uploaded_at}")
+            p.drawString(50, y, f"{f.id} | {f.display_name} | {f.owner.username} | {f.status} | {f.uploaded_at}")
             y -= 20
         p.showPage()
         p.save()
@@ -637,7 +778,12 @@ def file_audit_logs(request):
 @permission_classes([IsAuthenticated])
 def rejected_files(request):
     user = request.user
-    files = File.objects.filter(owner=user, status="rejected").order_by("-uploaded_at")
+    files = (
+        File.objects.filter(owner=user, status="rejected")
+        .select_related("owner")
+        .only(*FILE_LIST_FIELDS)
+        .order_by("-uploaded_at", "-id")
+    )
     serializer = FileSerializer(files, many=True)
     return Response(serializer.data)
 
@@ -649,6 +795,7 @@ def clean_value(value):
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
+@batched_version_bumps()
 def upload_employee_excel(request):
     file = request.FILES.get('file')
     if not file:
@@ -743,10 +890,16 @@ def upload_employee_excel(request):
     
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@renderer_classes(TABULAR_RENDERERS)
 def list_employees(request):
+    version, changed_at = DataVersion.current("employees")
+    etag = make_etag(request, "employees", version, changed_at)
+    cached = not_modified(request, etag, changed_at)
+    if cached:
+        return cached
     employees = EmployeeDirectory.objects.all().order_by("id")
     serializer = EmployeeDirectorySerializer(employees, many=True)
-    return Response(serializer.data)
+    return with_validators(Response(serializer.data), etag, changed_at)
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
@@ -850,6 +1003,7 @@ class DTRFileViewSet(viewsets.ModelViewSet):
         serializer.save(uploaded_by=self.request.user)
 
     @action(detail=True, methods=["post"])
+    @batched_version_bumps()
     def parse(self, request, pk=None):
         dtr_file = self.get_object()
         file_path = dtr_file.file.path
@@ -907,18 +1061,25 @@ class DTRFileViewSet(viewsets.ModelViewSet):
             traceback.print_exc()
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=["get"])
+    @action(detail=True, methods=["get"], renderer_classes=TABULAR_RENDERERS)
     def content(self, request, pk=None):
         dtr_file = self.get_object()
+        version, changed_at = DataVersion.current(dtr_version_key(dtr_file.id))
+        etag = make_etag(request, "dtr", dtr_file.id, dtr_file.start_date, dtr_file.end_date, version, changed_at)
+        last_modified = changed_at or dtr_file.uploaded_at
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
         entries = dtr_file.entries.all()
         serializer = DTREntrySerializer(entries, many=True)
-        return Response({
+        return with_validators(Response({
             "start_date": dtr_file.start_date,
             "end_date": dtr_file.end_date,
             "rows": serializer.data
-        })
+        }), etag, last_modified)
     
     @action(detail=False, methods=["post"], url_path="sync-all")
+    @batched_version_bumps()
     def sync_all_files(self, request):
         """
         Sync all DTR entries to EmployeeDirectory.
@@ -1006,3 +1167,4 @@ class DTREntryViewSet(viewsets.ModelViewSet):
     queryset = DTREntry.objects.all().order_by("full_name")
     serializer_class = DTREntrySerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = TABULAR_RENDERERS
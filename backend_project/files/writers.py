@@ -0,0 +1,93 @@
+#files/writers.py
+import csv
+import io
+import tempfile
+from django.core.files import File as DjangoFile
+
+# Regenerated files stay in memory up to this size, then spill to a temp file on disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+def spooled_file(spool):
+    """Rewind a finished spool and wrap it for storage.save(), which reads it in chunks."""
+    spool.seek(0)
+    return DjangoFile(spool)
+
+def write_csv(rows, format_cell=str):
+    """Stream rows into a spooled CSV file; nothing is held besides the current row."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    for row in rows:
+        writer.writerow([format_cell(cell) for cell in row])
+    text.flush()
+    text.detach()
+    return spooled_file(spool)
+
+def write_xlsx(rows, convert_cell=None):
+    """
+    Build an .xlsx with openpyxl's write-only mode, which serialises each row as it
+    is appended instead of keeping a cell object per value, and zip it into a spool.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for row in rows:
+        ws.append([convert_cell(cell) for cell in row] if convert_cell else row)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    wb.save(spool)
+    return spooled_file(spool)
+
+def line_ending(record):
+    """The terminator a raw CSV record ends with; "" for a last line without one."""
+    for ending in ("\r\n", "\n", "\r"):
+        if record.endswith(ending):
+            return ending
+    return ""
+
+def patch_csv(src, edited_rows, format_cell=str):
+    """
+    Copy a CSV through, re-serialising only the records in `edited_rows`
+    ({record index: row}); every other record keeps its original bytes. Edited
+    records keep their original line ending, so an LF file stays LF.
+    """
+    raw = []
+
+    def lines():
+        for line in io.TextIOWrapper(src, encoding="utf-8", newline=""):
+            raw.append(line)
+            yield line
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+    writers = {}
+    # csv.reader pulls lines only until a record is complete, so `raw` holds exactly that record
+    for index, _ in enumerate(csv.reader(lines())):
+        record = "".join(raw)
+        if index in edited_rows:
+            ending = line_ending(record)
+            if ending not in writers:
+                writers[ending] = csv.writer(text, lineterminator=ending)
+            writers[ending].writerow([format_cell(cell) for cell in edited_rows[index]])
+        else:
+            text.write(record)
+        raw.clear()
+    text.flush()
+    text.detach()
+    return spooled_file(spool)
+
+def patch_xlsx(src, edited_rows, convert_cell=None):
+    """Stream the active sheet row by row into a write-only workbook, swapping in `edited_rows`."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(src, read_only=True)
+    try:
+        def rows():
+            for index, row in enumerate(wb.active.iter_rows(values_only=True)):
+                if index in edited_rows:
+                    yield [convert_cell(cell) for cell in edited_rows[index]] if convert_cell else edited_rows[index]
+                else:
+                    yield row
+        return write_xlsx(rows())
+    finally:
+        wb.close()
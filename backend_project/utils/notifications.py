@@ -1,36 +1,176 @@
 # utils/notifications.py
-import os
 import logging
-from accounts.models import SMSLog  
-from twilio.rest import Client
+import os
+from datetime import timedelta
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import SMSLog, SMSOutbox
 
 logger = logging.getLogger(__name__)
-MOCK_SMS = True  
 
-def send_rejection_sms(phone_number, file_name, user=None):
+REJECTION_MESSAGE = "Your uploaded file '{file_name}' has been rejected. Please check your account for details."
+
+# How long a worker may hold claimed rows before another worker takes them over
+SEND_LEASE = timedelta(minutes=5)
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+class PermanentSMSError(Exception):
+    """The provider rejected the message itself (e.g. an invalid number); retrying will not help."""
+
+class ConsoleSMSProvider:
+    """Logs messages instead of sending them (the old MOCK_SMS behaviour)."""
+    mock = True
+
+    def send(self, phone_number, message):
+        logger.info("[MOCK SMS] To: %s | Message: %s", phone_number, message)
+        return None
+
+class FakeSMSProvider:
     """
-    Send SMS notification or mock it.
-    Logs all SMS messages to the database.
+    In-memory provider for tests and offline runs: records (phone_number, message)
+    in `sent`, and raises for the next `fail_next` sends (`permanent` picks the kind).
     """
-    message = f"Your uploaded file '{file_name}' has been rejected. Please check your account for details."
+    mock = True
 
-    if MOCK_SMS:
-        print(f"[MOCK SMS] To: {phone_number} | Message: {message}")
-        SMSLog.objects.create(user=user, phone_number=phone_number, message=message, mock=True)
-        return
+    def __init__(self):
+        self.sent = []
+        self.fail_next = 0
+        self.permanent = False
+
+    def send(self, phone_number, message):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise (PermanentSMSError if self.permanent else ConnectionError)("fake provider failure")
+        self.sent.append((phone_number, message))
+        return f"FAKE{len(self.sent)}"
+
+class TwilioSMSProvider:
+    """One Twilio client per worker process; its HTTP session keeps connections alive across sends."""
+    mock = False
+
+    def __init__(self):
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        account_sid = os.getenv("TWILIO_SID")
+        auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        self.from_number = os.getenv("TWILIO_FROM")
+        if not all([account_sid, auth_token, self.from_number]):
+            raise ImproperlyConfigured("Twilio credentials not set in environment variables")
+        http_client = TwilioHttpClient(pool_connections=True, timeout=settings.SMS_TIMEOUT)
+        self.client = Client(account_sid, auth_token, http_client=http_client)
+
+    def send(self, phone_number, message):
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            return self.client.messages.create(body=message, from_=self.from_number, to=phone_number).sid
+        except TwilioRestException as e:
+            # 4xx other than rate limiting means the request itself is bad
+            if 400 <= e.status < 500 and e.status != 429:
+                raise PermanentSMSError(str(e)) from e
+            raise
 
-    account_sid = os.getenv("TWILIO_SID")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-    from_number = os.getenv("TWILIO_FROM")
+SMS_PROVIDERS = {
+    "console": ConsoleSMSProvider,
+    "fake": FakeSMSProvider,
+    "twilio": TwilioSMSProvider,
+}
 
-    if not all([account_sid, auth_token, from_number]):
-        logger.error("Twilio credentials not set in environment variables")
+@lru_cache(maxsize=None)
+def get_sms_provider():
+    """The configured provider, built once per process (settings.SMS_PROVIDER)."""
+    return SMS_PROVIDERS[settings.SMS_PROVIDER]()
+
+def queue_rejection_sms(files):
+    """
+    Queue a rejection SMS for each file whose owner has a phone number. A file
+    whose rejection is still waiting to go out is not queued twice. Sending
+    starts once the surrounding transaction commits.
+    """
+    rows = [
+        SMSOutbox(
+            user=file_obj.owner,
+            phone_number=file_obj.owner.phone_number,
+            message=REJECTION_MESSAGE.format(file_name=file_obj.display_name),
+            dedupe_key=f"file-rejected:{file_obj.id}",
+        )
+        for file_obj in files
+        if file_obj.owner.phone_number
+    ]
+    if not rows:
         return
+    SMSOutbox.objects.bulk_create(rows, ignore_conflicts=True)
+
+    from accounts.tasks import drain_sms_outbox_task
+    transaction.on_commit(lambda: drain_sms_outbox_task.delay())
+
+def cancel_rejection_sms(file_ids):
+    """Drop unsent rejection SMS for files that are no longer rejected."""
+    SMSOutbox.objects.filter(
+        status=SMSOutbox.Status.PENDING,
+        dedupe_key__in=[f"file-rejected:{file_id}" for file_id in file_ids],
+    ).delete()
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+def claim_batch(batch_size):
+    """Lease up to batch_size due messages (pending, or abandoned mid-send) to this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            SMSOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=[SMSOutbox.Status.PENDING, SMSOutbox.Status.SENDING], next_attempt_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        SMSOutbox.objects.filter(id__in=[msg.id for msg in batch]).update(
+            status=SMSOutbox.Status.SENDING, next_attempt_at=now + SEND_LEASE
+        )
+    return batch
+
+def drain_outbox(batch_size=None):
+    """
+    Send every due message, a batch at a time, through the shared provider client.
+    Each batch ends with one bulk UPDATE of the outbox and one bulk INSERT into
+    SMSLog. Returns (sent, failed) counts.
+    """
+    provider = get_sms_provider()
+    batch_size = batch_size or settings.SMS_BATCH_SIZE
+    sent = failed = 0
+
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return sent, failed
+
+        logs = []
+        for msg in batch:
+            msg.attempts += 1
+            try:
+                provider.send(msg.phone_number, msg.message)
+            except PermanentSMSError as e:
+                msg.status, msg.last_error = SMSOutbox.Status.FAILED, str(e)
+            except Exception as e:
+                msg.last_error = str(e)
+                if msg.attempts >= settings.SMS_MAX_ATTEMPTS:
+                    msg.status = SMSOutbox.Status.FAILED
+                else:
+                    msg.status = SMSOutbox.Status.PENDING
+                    msg.next_attempt_at = timezone.now() + retry_delay(msg.attempts)
+            else:
+                msg.status, msg.sent_at, msg.last_error = SMSOutbox.Status.SENT, timezone.now(), ""
+                logs.append(SMSLog(user_id=msg.user_id, phone_number=msg.phone_number, message=msg.message, mock=provider.mock))
+
+            if msg.status == SMSOutbox.Status.FAILED:
+                logger.error("Giving up on SMS %s to %s: %s", msg.id, msg.phone_number, msg.last_error)
+                failed += 1
+        sent += len(logs)
 
-    try:
-        client = Client(account_sid, auth_token)
-        msg = client.messages.create(body=message, from_=from_number, to=phone_number)
-        logger.info(f"Sent rejection SMS to {phone_number}, SID: {msg.sid}")
-        SMSLog.objects.create(user=user, phone_number=phone_number, message=message, mock=False)
-    except Exception as e:
-        logger.error(f"Failed to send rejection SMS to {phone_number}: {str(e)}")
\ No newline at end of file
+        with transaction.atomic():
+            SMSOutbox.objects.bulk_update(batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+            SMSLog.objects.bulk_create(logs)
@@ -5,7 +5,9 @@ import EmojiPicker from "emoji-picker-react";
 import api from "../api"; 
 import "./styles/ChatSection.css"; 
 import ManageUsersModal from "./ManageUsersModal";
-import { getApiBase, getWsBase } from "../utils/hosts";   // ✅ import helpers
+import { getWsBase } from "../utils/hosts";   // ✅ import helpers
+
+const HISTORY_LIMIT = 100;
 
 export default function ChatSection({
   currentUser,
@@ -56,23 +58,12 @@ export default function ChatSection({
     setLoading(true);
   
     try {
-      let allMessages = [];
-      let url = `/chat/messages/${roomName}/`;
-      const API_BASE = getApiBase();   // ✅ use helper
-  
-      while (url) {
-        const res = await api.get(url, {
-          headers: { Authorization: `Bearer ${currentUser.token}` },
-        });
-  
-        const data = res.data;
-        allMessages = [...allMessages, ...data.results];
-  
-        // ✅ normalize next page URL
-        url = data.next ? data.next.replace(API_BASE, "") : null;
-      }
-  
-      allMessages.sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
+      // ✅ keyset page: only the latest messages, oldest first
+      const res = await api.get(`/chat/messages/${roomName}/`, {
+        params: { limit: HISTORY_LIMIT },
+        headers: { Authorization: `Bearer ${currentUser.token}` },
+      });
+      const allMessages = res.data.results;
   
       console.log("Final merged history:", allMessages);
       setMessages(allMessages);
@@ -21,6 +21,8 @@ export default function FileContent({ fileId, role }) {
   const [expanded, setExpanded] = useState(false);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const saveTimeout = useRef(null);
+  // content_version the edits are based on; saves are rejected (409) once someone else saved first
+  const contentVersion = useRef(null);
   const currentPageData = pages[currentPdfPage] || { text: "", tables: [] };
   const [fileInfo, setFileInfo] = useState(null);
   const fileOwner = fileInfo?.owner || "-";
@@ -273,6 +275,7 @@ export default function FileContent({ fileId, role }) {
         headers: { Authorization: `Bearer ${token}` },
       });
 
+      contentVersion.current = res.data.version;
       if (res.data.pages) {
         setPages(res.data.pages);
         setOriginalPages(JSON.parse(JSON.stringify(res.data.pages)));
@@ -365,10 +368,11 @@ export default function FileContent({ fileId, role }) {
       const structuredPages = preparePagesForBackend(pages);
       console.log("🕒 Auto-saving payload:", JSON.stringify({ pages: structuredPages }, null, 2));
 
-      await api.patch(
+      const res = await api.patch(
         `files/${fileId}/update-content/`,
-        { pages: structuredPages }
+        { pages: structuredPages, version: contentVersion.current }
       );
+      contentVersion.current = res.data.version;
 
       console.log("✅ Auto-saved successfully");
     } catch (error) {
@@ -413,17 +417,22 @@ export default function FileContent({ fileId, role }) {
       const structuredPages = preparePagesForBackend(pages);
       console.log("🚀 Sending payload to backend:", JSON.stringify({ pages: structuredPages }, null, 2));
 
-      await api.patch(
+      const res = await api.patch(
         `files/${fileId}/update-content/`,
-        { pages: structuredPages }
+        { pages: structuredPages, version: contentVersion.current }
       );
+      contentVersion.current = res.data.version;
 
       console.log("✅ Changes saved successfully");
       toast.success("Changes saved!");
     } catch (error) {
       if (error.response) {
         console.error("❌ Backend rejected:", error.response.data);
-        toast.error("Save failed: " + JSON.stringify(error.response.data));
+        if (error.response.status === 409) {
+          toast.error("This file was changed by someone else. Reload it before saving.");
+        } else {
+          toast.error("Save failed: " + JSON.stringify(error.response.data));
+        }
       } else {
         console.error("❌ Save error:", error);
         toast.error("Save error: " + error.message);
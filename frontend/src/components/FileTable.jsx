@@ -69,7 +69,7 @@ export default function FileTable({ role, setSelectedFile }) {
       setPrevPage(res.data.previous);
 
       if (unnotifiedFileIds.length) {
-        const fileNames = unnotifiedFiles.map(f => f.file.split("/").pop()).join(", ");
+        const fileNames = unnotifiedFiles.map(f => f.name).join(", ");
         toast.success(`${unnotifiedFileIds.length} new file(s) uploaded today: ${fileNames}`);
 
         setNotifiedFiles(prev => [...prev, ...unnotifiedFileIds]);
@@ -88,7 +88,7 @@ export default function FileTable({ role, setSelectedFile }) {
     return files
       .filter((file) => file.status === status)
       .filter((file) => {
-        const name = (file.file?.split("/").pop() || "").toLowerCase();
+        const name = (file.name || "").toLowerCase();
         const owner = (file.owner || "").toLowerCase();
         const query = search.toLowerCase();
         const matchesSearch = name.includes(query) || owner.includes(query);
@@ -378,7 +378,7 @@ export default function FileTable({ role, setSelectedFile }) {
                             style={{ color: "#007bff", cursor: "pointer" }}
                             onClick={() => setSelectedFileId(file.id)}
                           >
-                            {file.file.split("/").pop()}
+                            {file.name}
                           </td>
                           <td>{new Date(file.uploaded_at).toLocaleString()}</td>
                           <td>
@@ -404,7 +404,7 @@ export default function FileTable({ role, setSelectedFile }) {
                                 className="action-btn download"
                                 onClick={(e) => {
                                   e.stopPropagation(); 
-                                  handleDownload(file.id, file.file.split("/").pop());
+                                  handleDownload(file.id, file.name);
                                 }}
                                 disabled={downloadLoading[file.id]}
                               >
@@ -99,7 +99,7 @@ export default function OverallResultsTable({ role }) {
       let latestDate = null;
 
       for (const file of filesArray) {
-        const fileName = file.file ? file.file.split("/").pop() : "Unknown";
+        const fileName = file.name || "Unknown";
         const contentRes = await api.get(`files/${file.id}/content/`, {
           headers: { Authorization: `Bearer ${token}` },
         });
@@ -394,8 +394,8 @@ export default function OverallResultsTable({ role }) {
             <select value={selectedFile} onChange={(e) => setSelectedFile(e.target.value)}>
               <option value="all">All Files</option>
               {allFiles.map((file) => (
-                <option key={file.id} value={file.file.split("/").pop()}>
-                  {file.file.split("/").pop()}
+                <option key={file.id} value={file.name}>
+                  {file.name}
                 </option>
               ))}
             </select>
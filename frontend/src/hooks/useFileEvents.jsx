@@ -0,0 +1,50 @@
+// src/hooks/useFileEvents.jsx
+import { useEffect, useRef } from "react";
+import { getWsBase } from "../utils/hosts";
+
+// Live file events from /ws/notifications/: { type: "file_created" | "file_updated" |
+// "file_status_changed" | "file_deleted", files: [...], counters: { filesPending: -1, ... } }
+export default function useFileEvents(onEvent) {
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+
+  useEffect(() => {
+    const token = localStorage.getItem("access_token");
+    if (!token) return;
+
+    let ws;
+    let retryTimer;
+    let closed = false;
+
+    const connect = () => {
+      ws = new WebSocket(`${getWsBase()}/ws/notifications/?token=${token}`);
+      ws.onmessage = (e) => {
+        try {
+          handlerRef.current?.(JSON.parse(e.data));
+        } catch (err) {
+          console.error("Failed to handle file event:", err);
+        }
+      };
+      ws.onclose = (e) => {
+        // 4001: not authenticated, reconnecting will not help
+        if (!closed && e.code !== 4001) retryTimer = setTimeout(connect, 5000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      ws?.close();
+    };
+  }, []);
+}
+
+// Apply an event's counter deltas to a dashboard-stats object
+export function applyCounters(stats, counters = {}) {
+  const next = { ...stats };
+  Object.entries(counters).forEach(([key, delta]) => {
+    next[key] = (next[key] || 0) + delta;
+  });
+  return next;
+}
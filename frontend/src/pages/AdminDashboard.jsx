@@ -23,6 +23,7 @@ import RoomList from "../components/RoomList";
 import EmployeeDirectory from '../components/EmployeeDirectory';
 import "../components/styles/AdminDashboard.css"; 
 import api from "../api";
+import useFileEvents, { applyCounters } from "../hooks/useFileEvents";
 import jsPDF from "jspdf";
 import "jspdf-autotable";
 import { motion, AnimatePresence } from "framer-motion";
@@ -375,6 +376,10 @@ export default function AdminDashboard() {
     }
   };
   
+  useFileEvents((event) => {
+    if (event.counters) setStats((prev) => applyCounters(prev, event.counters));
+  });
+
   useEffect(() => {
     fetchDashboardStats();
     fetchUsers();